@@ -8,27 +8,163 @@ Detection methods:
 4. LLM Reasoning: Use gpt-5-nano to explain why it's an anomaly
 """
 
+import asyncio
+import hashlib
 import json
-from typing import Optional
-from uuid import UUID
+import logging
+from collections import OrderedDict
+from datetime import date
+from typing import Iterator, Optional, Sequence, Union
+from uuid import UUID, uuid4
 
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
-from openai import OpenAI
+from psycopg.types.json import Jsonb
 
-from .config import get_config
+from .llm import create_async_openai_client, get_openai_client, run_sync
+
+log = logging.getLogger(__name__)
 
 # Thresholds
 YOY_THRESHOLD_PCT = 30.0  # Year-over-year change threshold
 ROLLING_THRESHOLD_PCT = 25.0  # Deviation from 3-month rolling avg
 ZSCORE_THRESHOLD = 2.0  # Standard deviations from mean
 
+# Longest window lookback (YoY lag); rows older than this never affect a month
+DETECTION_LOOKBACK_MONTHS = 12
+
+# In-process LRU on top of the llm_explanation_cache table
+EXPLANATION_MEMO_SIZE = 4096
+_explanation_memo: "OrderedDict[str, str]" = OrderedDict()
+
+
+# Columns the anomaly getters may project
+ANOMALY_COLUMNS = (
+    "id", "company_id", "month", "metric_name",
+    "prev_value", "curr_value", "pct_change",
+    "severity_score", "status", "meta", "created_at",
+)
+# Default projection for list views: skips the (often TOASTed) JSONB meta
+LIST_COLUMNS = (
+    "id", "month", "metric_name",
+    "prev_value", "curr_value", "pct_change",
+    "severity_score", "status",
+)
+
+# Listing queries, precomposed once per optional-filter shape so each shape
+# is a stable statement the driver can prepare server-side
+_ANOMALIES_FOR_MONTH_TEMPLATE = sql.SQL("""
+    SELECT {columns}
+    FROM anomalies
+    WHERE company_id = %s AND month = %s
+    ORDER BY severity_score DESC
+""")
+
+_ANOMALIES_FOR_COMPANY_TEMPLATE = sql.SQL("""
+    SELECT {columns}
+    FROM anomalies
+    WHERE company_id = %s{status_filter}
+    ORDER BY month DESC, severity_score DESC LIMIT %s
+""")
+
+# CFO report rows: values arrive as float8 and the displayed percentages,
+# severity and detection signals come back already rounded
+_ANOMALIES_FOR_REPORT = """
+    SELECT
+        id, company_id, month, metric_name, status, meta,
+        prev_value::float8 AS prev_value,
+        curr_value::float8 AS curr_value,
+        ROUND(pct_change, 1)::float8 AS pct_change,
+        ROUND(severity_score, 1)::float8 AS severity_score,
+        ROUND((meta->>'yoy_pct')::numeric, 1)::float8 AS yoy_pct,
+        ROUND((meta->>'rolling_pct')::numeric, 1)::float8 AS rolling_pct,
+        ROUND((meta->>'zscore')::numeric, 2)::float8 AS zscore
+    FROM anomalies
+    WHERE company_id = %s AND month = %s
+    ORDER BY severity_score DESC
+"""
+
+_WITHOUT_CONTRIBUTORS_TEMPLATE = sql.SQL("""
+    SELECT a.id, a.company_id, a.month, a.metric_name,
+           a.prev_value, a.curr_value, a.pct_change
+    FROM anomalies a
+    WHERE NOT EXISTS (
+        SELECT 1 FROM anomaly_contributors ac WHERE ac.anomaly_id = a.id
+    ){company_filter}
+    ORDER BY a.created_at DESC LIMIT %s
+""")
+_WITHOUT_CONTRIBUTORS = _WITHOUT_CONTRIBUTORS_TEMPLATE.format(
+    company_filter=sql.SQL("")
+)
+_WITHOUT_CONTRIBUTORS_FOR_COMPANY = _WITHOUT_CONTRIBUTORS_TEMPLATE.format(
+    company_filter=sql.SQL(" AND a.company_id = %s")
+)
+
+_WITHOUT_HIGHLIGHTS_TEMPLATE = sql.SQL("""
+    SELECT a.id, a.company_id, a.month, a.metric_name,
+           a.prev_value, a.curr_value, a.pct_change, a.severity_score
+    FROM anomalies a
+    WHERE NOT EXISTS (
+        SELECT 1 FROM anomaly_highlights ah WHERE ah.anomaly_id = a.id
+    ){company_filter}
+    ORDER BY a.severity_score DESC LIMIT %s
+""")
+_WITHOUT_HIGHLIGHTS = _WITHOUT_HIGHLIGHTS_TEMPLATE.format(
+    company_filter=sql.SQL("")
+)
+_WITHOUT_HIGHLIGHTS_FOR_COMPANY = _WITHOUT_HIGHLIGHTS_TEMPLATE.format(
+    company_filter=sql.SQL(" AND a.company_id = %s")
+)
+
+
+def _select_columns(columns: Sequence[str]) -> sql.Composable:
+    """Compose a validated column list for the anomaly getters."""
+    unknown = set(columns) - set(ANOMALY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown anomaly columns: {sorted(unknown)}")
+    return sql.SQL(", ").join(map(sql.Identifier, columns))
+
+
+def _add_months(month: date, months: int) -> date:
+    """Shift a first-of-month date by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _detection_bounds(
+    since_month: Optional[Union[date, str]],
+    lookback_months: Optional[int] = None
+) -> tuple[date, date]:
+    """Return (first month to emit, first month to scan) for detection."""
+    if lookback_months is not None:
+        if lookback_months <= DETECTION_LOOKBACK_MONTHS:
+            raise ValueError(
+                f"lookback_months must exceed {DETECTION_LOOKBACK_MONTHS} to cover the YoY lag"
+            )
+        # Scan lookback_months back from today; only months with a full
+        # YoY window inside the scan are emitted
+        scan_from = _add_months(date.today().replace(day=1), -lookback_months)
+        since = _add_months(scan_from, DETECTION_LOOKBACK_MONTHS)
+        if since_month is None or date.fromisoformat(str(since_month)) < since:
+            since_month = since
+    if since_month is None:
+        return date.min, date.min
+    if isinstance(since_month, str):
+        since_month = date.fromisoformat(since_month)
+    since = since_month.replace(day=1)
+    return since, _add_months(since, -DETECTION_LOOKBACK_MONTHS)
+
 
 def detect_anomalies(
     conn: psycopg.Connection,
     company_id: UUID,
     yoy_threshold: float = YOY_THRESHOLD_PCT,
-    rolling_threshold: float = ROLLING_THRESHOLD_PCT
+    rolling_threshold: float = ROLLING_THRESHOLD_PCT,
+    threshold_pct: Optional[float] = None,
+    since_month: Optional[Union[date, str]] = None,
+    lookback_months: Optional[int] = None,
+    autocommit: bool = False,
 ) -> int:
     """
     Detect anomalies using hybrid approach:
@@ -36,13 +172,28 @@ def detect_anomalies(
     2. Rolling 3-month average comparison
     3. Z-score from 6-month historical mean
     
-    An anomaly is flagged if YoY OR rolling avg deviation exceeds threshold.
+    An anomaly is flagged if YoY OR rolling avg deviation OR z-score exceeds
+    its threshold. Passing `threshold_pct` switches to the legacy MoM rule
+    (flag when |MoM change| >= threshold_pct) within the same statement.
+    All window expressions share the named window `w`, so PostgreSQL sorts
+    each (company_id, metric_name) partition once for every signal.
+    
+    With `since_month`, only months >= since_month are (re)detected and the
+    windows scan just the 12 months of lookback before it, so the cost no
+    longer grows with history depth. `lookback_months` expresses the same
+    bound relative to today.
     
     Args:
         conn: Database connection
         company_id: Company GUID
         yoy_threshold: YoY percentage threshold
         rolling_threshold: Rolling average deviation threshold
+        threshold_pct: Legacy MoM percentage threshold (None = hybrid detection)
+        since_month: First month to detect (None = full history)
+        lookback_months: Only scan this many months back from today (must be
+            > 12; months without a full YoY window are not emitted)
+        autocommit: Commit before returning (otherwise the caller owns the
+            transaction, e.g. `with conn.transaction():`)
     
     Returns:
         int: Number of anomalies detected/upserted
@@ -59,24 +210,13 @@ def detect_anomalies(
                 -- Same month last year (YoY)
                 LAG(value, 12) OVER w AS yoy_value,
                 -- Rolling 3-month average (excluding current)
-                AVG(value) OVER (
-                    PARTITION BY company_id, metric_name 
-                    ORDER BY month
-                    ROWS BETWEEN 3 PRECEDING AND 1 PRECEDING
-                ) AS rolling_3m_avg,
+                AVG(value) OVER (w ROWS BETWEEN 3 PRECEDING AND 1 PRECEDING) AS rolling_3m_avg,
                 -- Rolling 6-month stats for z-score
-                AVG(value) OVER (
-                    PARTITION BY company_id, metric_name 
-                    ORDER BY month
-                    ROWS BETWEEN 6 PRECEDING AND 1 PRECEDING
-                ) AS rolling_6m_avg,
-                STDDEV(value) OVER (
-                    PARTITION BY company_id, metric_name 
-                    ORDER BY month
-                    ROWS BETWEEN 6 PRECEDING AND 1 PRECEDING
-                ) AS rolling_6m_stddev
+                AVG(value) OVER (w ROWS BETWEEN 6 PRECEDING AND 1 PRECEDING) AS rolling_6m_avg,
+                STDDEV(value) OVER (w ROWS BETWEEN 6 PRECEDING AND 1 PRECEDING) AS rolling_6m_stddev
             FROM monthly_kpis
-            WHERE company_id = %s
+            WHERE company_id = %(company_id)s
+              AND month >= %(lookback_from)s
             WINDOW w AS (PARTITION BY company_id, metric_name ORDER BY month)
         ),
         metrics AS (
@@ -88,18 +228,16 @@ def detect_anomalies(
                 prev_month_value,
                 yoy_value,
                 rolling_3m_avg,
-                rolling_6m_avg,
-                rolling_6m_stddev,
                 -- MoM change
-                CASE WHEN prev_month_value != 0 AND prev_month_value IS NOT NULL
+                CASE WHEN prev_month_value != 0
                      THEN (value - prev_month_value) / ABS(prev_month_value) * 100
                      ELSE NULL END AS mom_pct,
                 -- YoY change
-                CASE WHEN yoy_value != 0 AND yoy_value IS NOT NULL
+                CASE WHEN yoy_value != 0
                      THEN (value - yoy_value) / ABS(yoy_value) * 100
                      ELSE NULL END AS yoy_pct,
                 -- Rolling avg deviation
-                CASE WHEN rolling_3m_avg != 0 AND rolling_3m_avg IS NOT NULL
+                CASE WHEN rolling_3m_avg != 0
                      THEN (value - rolling_3m_avg) / ABS(rolling_3m_avg) * 100
                      ELSE NULL END AS rolling_pct,
                 -- Z-score
@@ -110,31 +248,22 @@ def detect_anomalies(
         ),
         anomalies_detected AS (
             SELECT
-                company_id,
-                metric_name,
-                month,
-                prev_month_value,
-                curr_value,
-                yoy_value,
-                rolling_3m_avg,
-                mom_pct,
-                yoy_pct,
-                rolling_pct,
-                zscore,
-                -- Primary: use MoM for display (what changed from last month)
-                mom_pct AS pct_change,
+                *,
                 -- Composite severity score
-                GREATEST(
+                CASE WHEN %(mom_only)s THEN ABS(mom_pct)
+                ELSE GREATEST(
                     COALESCE(ABS(yoy_pct), 0),
                     COALESCE(ABS(rolling_pct), 0),
                     COALESCE(ABS(zscore) * 15, 0)  -- Scale z-score to comparable range
-                ) AS severity_score,
+                ) END AS severity_score,
                 -- Detection reason
                 CASE
-                    WHEN ABS(yoy_pct) >= %s AND ABS(rolling_pct) >= %s THEN 'yoy_and_rolling'
-                    WHEN ABS(yoy_pct) >= %s THEN 'yoy'
-                    WHEN ABS(rolling_pct) >= %s THEN 'rolling'
-                    WHEN ABS(zscore) >= 2.0 THEN 'zscore'
+                    WHEN %(mom_only)s THEN
+                        CASE WHEN ABS(mom_pct) >= %(mom)s THEN 'mom' END
+                    WHEN ABS(yoy_pct) >= %(yoy)s AND ABS(rolling_pct) >= %(rolling)s THEN 'yoy_and_rolling'
+                    WHEN ABS(yoy_pct) >= %(yoy)s THEN 'yoy'
+                    WHEN ABS(rolling_pct) >= %(rolling)s THEN 'rolling'
+                    WHEN ABS(zscore) >= %(zscore)s THEN 'zscore'
                     ELSE NULL
                 END AS detection_reason
             FROM metrics
@@ -150,7 +279,8 @@ def detect_anomalies(
             metric_name,
             prev_month_value,
             curr_value,
-            pct_change,
+            -- Primary: use MoM for display (what changed from last month)
+            mom_pct,
             severity_score,
             'open',
             jsonb_build_object(
@@ -163,50 +293,281 @@ def detect_anomalies(
             )
         FROM anomalies_detected
         WHERE detection_reason IS NOT NULL
+          AND month >= %(since)s
         ON CONFLICT (company_id, month, metric_name) DO UPDATE
         SET prev_value     = EXCLUDED.prev_value,
             curr_value     = EXCLUDED.curr_value,
             pct_change     = EXCLUDED.pct_change,
             severity_score = EXCLUDED.severity_score,
             meta           = EXCLUDED.meta
-        RETURNING id
     """
     
+    since, lookback_from = _detection_bounds(since_month, lookback_months)
+    
     with conn.cursor() as cur:
-        cur.execute(query, (
-            str(company_id),
-            yoy_threshold, rolling_threshold,  # for yoy_and_rolling
-            yoy_threshold,  # for yoy only
-            rolling_threshold  # for rolling only
-        ))
-        rows = cur.fetchall()
+        cur.execute(query, {
+            "company_id": company_id,
+            "since": since,
+            "lookback_from": lookback_from,
+            "yoy": yoy_threshold,
+            "rolling": rolling_threshold,
+            "zscore": ZSCORE_THRESHOLD,
+            "mom": threshold_pct,
+            "mom_only": threshold_pct is not None,
+        })
+        count = cur.rowcount
+    if autocommit:
         conn.commit()
         
-    count = len(rows)
-    print(f"Detected {count} anomalies (YoY ≥{yoy_threshold}% OR Rolling ≥{rolling_threshold}%)")
+    if threshold_pct is not None:
+        log.info("Detected %d anomalies (MoM ≥%s%%)", count, threshold_pct)
+    else:
+        log.info("Detected %d anomalies (YoY ≥%s%% OR Rolling ≥%s%%)", count, yoy_threshold, rolling_threshold)
     return count
 
 
-def build_detection_prompt(anomaly: dict) -> str:
+def _pct_change(value: float, base: Optional[float]) -> Optional[float]:
+    """Percentage change vs base (None when base is missing or zero)."""
+    if base is None or base == 0:
+        return None
+    return (value - base) / abs(base) * 100
+
+
+def _detection_signals(
+    values: list[float],
+    yoy_threshold: float,
+    rolling_threshold: float,
+    threshold_pct: Optional[float]
+) -> list[Optional[tuple]]:
     """
-    Build the LLM prompt used to explain why a metric was flagged as an anomaly.
+    Compute detection signals for one metric's month-ordered values.
+    
+    Single pass with running sums for the 3- and 6-row trailing windows;
+    mirrors the window-function SQL in `detect_anomalies` (partial windows at
+    the start of history, sample standard deviation).
+    
+    Returns:
+        Per row: None if not anomalous, else (reason, prev, mom_pct, severity,
+        yoy_value, yoy_pct, rolling_3m_avg, rolling_pct, zscore)
+    """
+    results = []
+    sum3 = sum6 = sumsq6 = 0.0
 
-    This is factored out so we can export the exact LLM inputs without
-    re-calling the model.
+    for i, value in enumerate(values):
+        n3 = min(i, 3)
+        n6 = min(i, 6)
+        prev = values[i - 1] if i >= 1 else None
+        yoy_value = values[i - 12] if i >= 12 else None
+        rolling_3m_avg = sum3 / n3 if n3 else None
+        zscore = None
+        if n6 >= 2:
+            mean6 = sum6 / n6
+            variance = max((sumsq6 - n6 * mean6 * mean6) / (n6 - 1), 0.0)
+            if variance > 0:
+                zscore = (value - mean6) / variance ** 0.5
+
+        mom_pct = _pct_change(value, prev)
+        yoy_pct = _pct_change(value, yoy_value)
+        rolling_pct = _pct_change(value, rolling_3m_avg)
 
+        yoy_hit = yoy_pct is not None and abs(yoy_pct) >= yoy_threshold
+        rolling_hit = rolling_pct is not None and abs(rolling_pct) >= rolling_threshold
+        if threshold_pct is not None:
+            severity = abs(mom_pct) if mom_pct is not None else None
+            reason = "mom" if severity is not None and severity >= threshold_pct else None
+        else:
+            severity = max(
+                abs(yoy_pct or 0),
+                abs(rolling_pct or 0),
+                abs(zscore or 0) * 15,
+            )
+            if yoy_hit and rolling_hit:
+                reason = "yoy_and_rolling"
+            elif yoy_hit:
+                reason = "yoy"
+            elif rolling_hit:
+                reason = "rolling"
+            elif zscore is not None and abs(zscore) >= ZSCORE_THRESHOLD:
+                reason = "zscore"
+            else:
+                reason = None
+
+        results.append(
+            (reason, prev, mom_pct, severity, yoy_value, yoy_pct,
+             rolling_3m_avg, rolling_pct, zscore)
+            if reason else None
+        )
+
+        # Slide the trailing windows to end at the current row
+        sum3 += value
+        sum6 += value
+        sumsq6 += value * value
+        if i >= 3:
+            sum3 -= values[i - 3]
+        if i >= 6:
+            sum6 -= values[i - 6]
+            sumsq6 -= values[i - 6] ** 2
+
+    return results
+
+
+def upsert_anomalies(
+    conn: psycopg.Connection,
+    company_id: UUID,
+    anomalies: list[dict]
+) -> int:
+    """
+    Upsert anomalies computed in Python in a single statement.
+    
+    Rows are transposed into one array per column and expanded server-side
+    with UNNEST, so the whole batch is one round trip regardless of size.
+    Does not commit.
+    
     Args:
-        anomaly: Anomaly dict with `meta` containing detection details
+        conn: Database connection
+        company_id: Company GUID
+        anomalies: Dicts with month, metric_name, prev_value, curr_value,
+            pct_change, severity_score and meta
+    
+    Returns:
+        int: Number of anomalies inserted or updated
+    """
+    if not anomalies:
+        return 0
+
+    months, metric_names, prevs, currs, pcts, severities, metas = ([] for _ in range(7))
+    for anomaly in anomalies:
+        months.append(anomaly["month"])
+        metric_names.append(anomaly["metric_name"])
+        prevs.append(anomaly["prev_value"])
+        currs.append(anomaly["curr_value"])
+        pcts.append(anomaly["pct_change"])
+        severities.append(anomaly["severity_score"])
+        metas.append(Jsonb(anomaly.get("meta") or {}))
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO anomalies (
+                company_id, month, metric_name,
+                prev_value, curr_value, pct_change,
+                severity_score, status, meta
+            )
+            SELECT %s, month, metric_name, prev_value, curr_value,
+                   pct_change, severity_score, 'open', meta
+            FROM unnest(
+                %s::date[], %s::text[], %s::float8[], %s::float8[],
+                %s::float8[], %s::float8[], %s::jsonb[]
+            ) AS t(month, metric_name, prev_value, curr_value,
+                   pct_change, severity_score, meta)
+            ON CONFLICT (company_id, month, metric_name) DO UPDATE
+            SET prev_value     = EXCLUDED.prev_value,
+                curr_value     = EXCLUDED.curr_value,
+                pct_change     = EXCLUDED.pct_change,
+                severity_score = EXCLUDED.severity_score,
+                meta           = EXCLUDED.meta
+            """,
+            (company_id, months, metric_names, prevs, currs, pcts, severities, metas)
+        )
+        return cur.rowcount
+
 
+def detect_anomalies_vectorized(
+    conn: psycopg.Connection,
+    company_id: UUID,
+    yoy_threshold: float = YOY_THRESHOLD_PCT,
+    rolling_threshold: float = ROLLING_THRESHOLD_PCT,
+    threshold_pct: Optional[float] = None,
+    since_month: Optional[Union[date, str]] = None,
+    lookback_months: Optional[int] = None,
+    autocommit: bool = False,
+) -> int:
+    """
+    Detect anomalies client-side; same rules and results as `detect_anomalies`.
+    
+    KPIs are exported with a binary COPY already ordered by (metric, month),
+    signals are computed in one pass per metric, and all anomalies are
+    upserted with a single UNNEST statement. Meant for companies with very
+    long histories, where the per-frame window evaluation dominates.
+    
+    Args:
+        conn: Database connection
+        company_id: Company GUID
+        yoy_threshold: YoY percentage threshold
+        rolling_threshold: Rolling average deviation threshold
+        threshold_pct: Legacy MoM percentage threshold (None = hybrid detection)
+        since_month: First month to detect (None = full history)
+        lookback_months: Only scan this many months back from today (must be
+            > 12; months without a full YoY window are not emitted)
+        autocommit: Commit before returning (otherwise the caller owns the
+            transaction, e.g. `with conn.transaction():`)
+    
     Returns:
-        str: Prompt string
+        int: Number of anomalies detected/upserted
     """
-    meta = anomaly.get("meta") or {}
-    if isinstance(meta, str):
-        meta = json.loads(meta)
-    if meta is None:
-        meta = {}
+    since, lookback_from = _detection_bounds(since_month, lookback_months)
 
-    # Safely format values that might be None
+    series: dict[str, tuple[list[date], list[float]]] = {}
+    with conn.cursor() as cur:
+        with cur.copy(
+            """
+            COPY (
+                SELECT metric_name, month, value::float8
+                FROM monthly_kpis
+                WHERE company_id = %s AND month >= %s
+                ORDER BY metric_name, month
+            ) TO STDOUT (FORMAT BINARY)
+            """,
+            (company_id, lookback_from)
+        ) as copy:
+            copy.set_types(["text", "date", "float8"])
+            for metric_name, month, value in copy.rows():
+                months, values = series.setdefault(metric_name, ([], []))
+                months.append(month)
+                values.append(value)
+
+    detected = []
+    for metric_name, (months, values) in series.items():
+        signals = _detection_signals(values, yoy_threshold, rolling_threshold, threshold_pct)
+        for month, value, signal in zip(months, values, signals):
+            if signal is None or month < since:
+                continue
+            (reason, prev, mom_pct, severity, yoy_value, yoy_pct,
+             rolling_3m_avg, rolling_pct, zscore) = signal
+            detected.append({
+                "month": month,
+                "metric_name": metric_name,
+                "prev_value": prev,
+                "curr_value": value,
+                "pct_change": mom_pct,
+                "severity_score": severity,
+                "meta": {
+                    "detection_reason": reason,
+                    "yoy_value": yoy_value,
+                    "yoy_pct": yoy_pct,
+                    "rolling_3m_avg": rolling_3m_avg,
+                    "rolling_pct": rolling_pct,
+                    "zscore": zscore,
+                },
+            })
+
+    count = upsert_anomalies(conn, company_id, detected)
+    if autocommit:
+        conn.commit()
+
+    log.info("Detected %d anomalies (client-side pass over %d metrics)", count, len(series))
+    return count
+
+
+def detection_meta(anomaly: dict) -> dict:
+    """Return the anomaly's detection `meta` as a dict (JSONB arrives decoded)."""
+    meta = anomaly.get("meta")
+    # Only hand-built dicts (e.g. exports, tests) carry serialized meta
+    return json.loads(meta) if isinstance(meta, (bytes, str)) else (meta or {})
+
+
+def _format_signals(meta: dict) -> tuple[str, str, str]:
+    """Format YoY %, rolling % and z-score for prompts and fallback text."""
     yoy_pct = meta.get("yoy_pct")
     rolling_pct = meta.get("rolling_pct")
     zscore = meta.get("zscore")
@@ -214,39 +575,247 @@ def build_detection_prompt(anomaly: dict) -> str:
     yoy_str = f"{yoy_pct:.1f}%" if yoy_pct is not None else "N/A"
     rolling_str = f"{rolling_pct:.1f}%" if rolling_pct is not None else "N/A"
     zscore_str = f"{zscore:.2f}" if zscore is not None else "N/A"
+    return yoy_str, rolling_str, zscore_str
+
+
+def _bucketed_signals(anomaly: dict) -> dict:
+    """
+    Reduce an anomaly to the inputs of its detection explanation.
+    
+    Signals are bucketed (YoY and rolling % to whole numbers, z-score to one
+    decimal). Both the prompt and the cache fingerprint are built from this
+    alone, so a cached explanation never quotes another anomaly's figures.
+    """
+    meta = detection_meta(anomaly)
+
+    def bucket(value, ndigits: int) -> Optional[float]:
+        return None if value is None else round(float(value), ndigits)
+
+    return {
+        "metric_name": str(anomaly.get("metric_name")),
+        "detection_reason": str(meta.get("detection_reason", "unknown")),
+        "yoy_pct": bucket(meta.get("yoy_pct"), 0),
+        "rolling_pct": bucket(meta.get("rolling_pct"), 0),
+        "zscore": bucket(meta.get("zscore"), 1),
+    }
+
+
+def build_detection_prompt(anomaly: dict) -> str:
+    """
+    Build the LLM prompt used to explain why a metric was flagged as an anomaly.
+
+    This is factored out so we can export the exact LLM inputs without
+    re-calling the model. The prompt carries only the bucketed detection
+    signals (no company, month or amounts): explanations are shared across
+    anomalies with the same detection_fingerprint.
+
+    Args:
+        anomaly: Anomaly dict with `meta` containing detection details
+
+    Returns:
+        str: Prompt string
+    """
+    signals = _bucketed_signals(anomaly)
+
+    # Safely format values that might be None
+    yoy_str, rolling_str, zscore_str = _format_signals(signals)
 
     prompt = f"""You are a financial analyst. Explain briefly (2 sentences) why this metric was flagged as an anomaly.
 
-METRIC: {anomaly.get('metric_name')}
-MONTH: {anomaly.get('month')}
-CURRENT VALUE: {anomaly.get('curr_value')}
-PREVIOUS MONTH: {anomaly.get('prev_value')}
-SAME MONTH LAST YEAR: {meta.get('yoy_value', 'N/A')}
-3-MONTH ROLLING AVG: {meta.get('rolling_3m_avg', 'N/A')}
+METRIC: {signals['metric_name']}
 
 DETECTION SIGNALS:
 - YoY Change: {yoy_str} (threshold: ±{YOY_THRESHOLD_PCT}%)
 - Rolling Avg Deviation: {rolling_str} (threshold: ±{ROLLING_THRESHOLD_PCT}%)
-- Z-Score: {zscore_str} (threshold: ±2.0)
-- Detection Reason: {meta.get('detection_reason', 'unknown')}
+- Z-Score: {zscore_str} (threshold: ±{ZSCORE_THRESHOLD})
+- Detection Reason: {signals['detection_reason']}
 
-Explain in plain English why this is considered anomalous. Be specific about which signals triggered the detection."""
+Explain in plain English why this is considered anomalous. Be specific about which signals triggered the detection. Do not mention amounts, months or companies."""
 
     return prompt
 
 
-def explain_anomaly_detection(anomaly: dict) -> str:
+def fallback_detection_explanation(anomaly: dict) -> str:
+    """
+    Rule-based explanation used when the LLM is unavailable.
+    
+    Args:
+        anomaly: Anomaly dict with meta containing detection details
+    
+    Returns:
+        str: Template explanation based on the detection reason
+    """
+    meta = detection_meta(anomaly)
+    yoy_str, rolling_str, zscore_str = _format_signals(meta)
+    
+    reason = meta.get("detection_reason", "unknown")
+    if reason == "yoy_and_rolling":
+        return f"Flagged because both YoY ({yoy_str}) and rolling average deviation ({rolling_str}) exceed thresholds."
+    elif reason == "yoy":
+        return f"Flagged due to significant year-over-year change of {yoy_str} compared to same month last year."
+    elif reason == "rolling":
+        return f"Flagged because value deviates {rolling_str} from the trailing 3-month average."
+    elif reason == "zscore":
+        return f"Flagged as statistical outlier with z-score of {zscore_str} (>2 standard deviations from mean)."
+    elif reason == "mom":
+        pct = anomaly.get("pct_change")
+        mom_str = f"{float(pct):.1f}%" if pct is not None else "N/A"
+        return f"Flagged because the month-over-month change of {mom_str} exceeds the threshold."
+    return "Anomaly detected (legacy data without detection metadata)"
+
+
+def needs_llm_explanation(anomaly: dict) -> bool:
+    """
+    Decide whether an anomaly is worth a model call.
+    
+    A single clear signal is fully described by the rule-based template;
+    the model only adds value when several signals fire together or a
+    signal sits just above its threshold (within 1.5x).
+    
+    Args:
+        anomaly: Anomaly dict with meta containing detection details
+    
+    Returns:
+        bool: True if the LLM should explain this anomaly
+    """
+    meta = detection_meta(anomaly)
+    signals = [
+        (meta.get("yoy_pct"), YOY_THRESHOLD_PCT),
+        (meta.get("rolling_pct"), ROLLING_THRESHOLD_PCT),
+        (meta.get("zscore"), ZSCORE_THRESHOLD),
+    ]
+    present = [(abs(value), threshold) for value, threshold in signals if value is not None]
+    if len(present) <= 1:
+        return False
+    if meta.get("detection_reason") == "yoy_and_rolling":
+        return True
+    return any(threshold <= value < threshold * 1.5 for value, threshold in present)
+
+
+def detection_fingerprint(anomaly: dict) -> str:
+    """
+    Fingerprint the detection signals that determine an explanation.
+    
+    Covers exactly what build_detection_prompt sends (the bucketed
+    signals), so near-identical anomalies across companies/months share a
+    key and any explanation cached under it fits all of them.
+    
+    Args:
+        anomaly: Anomaly dict with meta containing detection details
+    
+    Returns:
+        str: 16-character hex fingerprint
+    """
+    # "v2": entries cached before prompts dropped the figures are not reused
+    key = "|".join([
+        "v2",
+        *("na" if value is None else str(value) for value in _bucketed_signals(anomaly).values()),
+    ])
+    return hashlib.blake2b(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _memo_put(fingerprint: str, text: str) -> None:
+    """Add an explanation to the in-process LRU, evicting the oldest entry."""
+    _explanation_memo[fingerprint] = text
+    _explanation_memo.move_to_end(fingerprint)
+    if len(_explanation_memo) > EXPLANATION_MEMO_SIZE:
+        _explanation_memo.popitem(last=False)
+
+
+def get_cached_explanations(
+    conn: Optional[psycopg.Connection],
+    fingerprints: list[str]
+) -> dict[str, str]:
+    """
+    Look up cached explanations, in-process first and then in the database.
+    
+    Args:
+        conn: Database connection (None to use only the in-process cache)
+        fingerprints: Detection fingerprints to look up
+    
+    Returns:
+        Dict mapping fingerprint -> explanation for every cache hit
+    """
+    hits = {}
+    misses = []
+    for fp in dict.fromkeys(fingerprints):
+        if fp in _explanation_memo:
+            _explanation_memo.move_to_end(fp)
+            hits[fp] = _explanation_memo[fp]
+        else:
+            misses.append(fp)
+
+    if conn is not None and misses:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT fingerprint, text FROM llm_explanation_cache WHERE fingerprint = ANY(%s)",
+                (misses,)
+            )
+            for fp, text in cur.fetchall():
+                _memo_put(fp, text)
+                hits[fp] = text
+    return hits
+
+
+def cache_explanations(
+    conn: Optional[psycopg.Connection],
+    explanations: dict[str, str],
+    autocommit: bool = False
+) -> None:
+    """
+    Store LLM explanations in the in-process and database caches.
+    
+    Args:
+        conn: Database connection (None to skip the database cache)
+        explanations: Dict mapping fingerprint -> explanation
+        autocommit: Commit before returning (otherwise the caller owns the
+            transaction)
+    """
+    for fp, text in explanations.items():
+        _memo_put(fp, text)
+
+    if conn is not None and explanations:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO llm_explanation_cache (fingerprint, text)
+                SELECT * FROM unnest(%s::text[], %s::text[])
+                ON CONFLICT (fingerprint) DO NOTHING
+                """,
+                (list(explanations.keys()), list(explanations.values()))
+            )
+        if autocommit:
+            conn.commit()
+
+
+def explain_anomaly_detection(
+    anomaly: dict,
+    conn: Optional[psycopg.Connection] = None
+) -> str:
     """
     Use gpt-5-nano to explain why this was flagged as an anomaly.
     
+    Clear-cut anomalies get the rule-based explanation without a model
+    call; the rest are cached by detection fingerprint, so semantically
+    identical anomalies only hit the model once.
+    
     Args:
         anomaly: Anomaly dict with meta containing detection details
+        conn: Optional database connection for the shared explanation cache
+            (new entries are written but not committed)
     
     Returns:
         str: LLM-generated explanation of why it's an anomaly
     """
-    config = get_config()
-    client = OpenAI(api_key=config.openai_api_key)
+    if not needs_llm_explanation(anomaly):
+        return fallback_detection_explanation(anomaly)
+
+    fingerprint = detection_fingerprint(anomaly)
+    cached = get_cached_explanations(conn, [fingerprint])
+    if fingerprint in cached:
+        return cached[fingerprint]
+
+    client = get_openai_client()
     prompt = build_detection_prompt(anomaly)
 
     try:
@@ -256,25 +825,185 @@ def explain_anomaly_detection(anomaly: dict) -> str:
             reasoning={"effort": "low"},
             text={"verbosity": "low"},
         )
-        return result.output_text.strip()
-    except Exception as e:
-        # Fallback to rule-based explanation
-        reason = meta.get('detection_reason', 'unknown') if meta else 'unknown'
-        if reason == 'yoy_and_rolling':
-            return f"Flagged because both YoY ({yoy_str}) and rolling average deviation ({rolling_str}) exceed thresholds."
-        elif reason == 'yoy':
-            return f"Flagged due to significant year-over-year change of {yoy_str} compared to same month last year."
-        elif reason == 'rolling':
-            return f"Flagged because value deviates {rolling_str} from the trailing 3-month average."
-        elif reason == 'zscore':
-            return f"Flagged as statistical outlier with z-score of {zscore_str} (>2 standard deviations from mean)."
-        return f"Anomaly detected (legacy data without detection metadata)"
+    except Exception:
+        # Fallback to rule-based explanation (not cached, so it is retried)
+        return fallback_detection_explanation(anomaly)
+
+    text = result.output_text.strip()
+    cache_explanations(conn, {fingerprint: text})
+    return text
+
+
+async def _explain_anomalies_async(
+    anomalies: list[dict],
+    max_concurrency: int
+) -> list[Optional[str]]:
+    """Run gpt-5-nano explanations concurrently, bounded by a semaphore (None on failure)."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # Create the async client inside the running event loop
+    async with create_async_openai_client() as client:
+
+        async def explain(anomaly: dict) -> Optional[str]:
+            async with semaphore:
+                try:
+                    result = await client.responses.create(
+                        model="gpt-5-nano",
+                        input=build_detection_prompt(anomaly),
+                        reasoning={"effort": "low"},
+                        text={"verbosity": "low"},
+                    )
+                    return result.output_text.strip()
+                except Exception:
+                    # One failed call (e.g. 429) must not poison the batch
+                    return None
+
+        return await asyncio.gather(*(explain(a) for a in anomalies))
+
+
+def _pending_explanations(
+    anomalies: list[dict],
+    conn: Optional[psycopg.Connection]
+) -> tuple[list[Optional[str]], dict[str, str], dict[str, dict]]:
+    """Fingerprint anomalies, read the cache and pick one anomaly per uncached fingerprint."""
+    # None marks anomalies the rule-based template explains on its own
+    fingerprints = [
+        detection_fingerprint(a) if needs_llm_explanation(a) else None
+        for a in anomalies
+    ]
+    explanations = get_cached_explanations(conn, [fp for fp in fingerprints if fp])
+
+    # One representative anomaly per uncached fingerprint
+    pending = {}
+    for fp, anomaly in zip(fingerprints, anomalies):
+        if fp and fp not in explanations:
+            pending.setdefault(fp, anomaly)
+    return fingerprints, explanations, pending
+
+
+def _merge_explanations(
+    anomalies: list[dict],
+    fingerprints: list[Optional[str]],
+    explanations: dict[str, str],
+    pending: dict[str, dict],
+    results: list[Optional[str]],
+    conn: Optional[psycopg.Connection]
+) -> list[str]:
+    """Cache fresh LLM results and resolve each anomaly's explanation in input order."""
+    fresh = {fp: text for fp, text in zip(pending, results) if text is not None}
+    cache_explanations(conn, fresh)
+    explanations.update(fresh)
+    return [
+        (fp and explanations.get(fp)) or fallback_detection_explanation(anomaly)
+        for fp, anomaly in zip(fingerprints, anomalies)
+    ]
+
+
+async def explain_anomalies_batch_async(
+    anomalies: list[dict],
+    max_concurrency: int = 32,
+    conn: Optional[psycopg.Connection] = None
+) -> list[str]:
+    """
+    Async variant of explain_anomalies_batch for callers on an event loop.
+    
+    Args:
+        anomalies: Anomaly dicts with meta containing detection details
+        max_concurrency: Maximum number of in-flight LLM requests
+        conn: Optional database connection for the shared explanation cache
+            (new entries are written but not committed)
+    
+    Returns:
+        List of explanations, in the same order as `anomalies`
+    """
+    if not anomalies:
+        return []
+
+    fingerprints, explanations, pending = _pending_explanations(anomalies, conn)
+    results = []
+    if pending:
+        results = await _explain_anomalies_async(list(pending.values()), max_concurrency)
+    return _merge_explanations(anomalies, fingerprints, explanations, pending, results, conn)
+
+
+def explain_anomalies_batch(
+    anomalies: list[dict],
+    max_concurrency: int = 32,
+    conn: Optional[psycopg.Connection] = None
+) -> list[str]:
+    """
+    Explain many anomalies with concurrent gpt-5-nano requests.
+    
+    Clear-cut anomalies are explained by the rule-based template, and only
+    one request is made per distinct detection fingerprint that is not
+    already cached; wall time is roughly misses / max_concurrency round-trips.
+    Safe to call from inside a running event loop (see llm.run_sync), but
+    async callers should await explain_anomalies_batch_async instead.
+    
+    Args:
+        anomalies: Anomaly dicts with meta containing detection details
+        max_concurrency: Maximum number of in-flight LLM requests
+        conn: Optional database connection for the shared explanation cache
+            (new entries are written but not committed)
+    
+    Returns:
+        List of explanations, in the same order as `anomalies`
+    """
+    if not anomalies:
+        return []
+
+    fingerprints, explanations, pending = _pending_explanations(anomalies, conn)
+    results = []
+    if pending:
+        results = run_sync(
+            _explain_anomalies_async(list(pending.values()), max_concurrency)
+        )
+    return _merge_explanations(anomalies, fingerprints, explanations, pending, results, conn)
+
+
+def store_detection_reasoning(
+    conn: psycopg.Connection,
+    anomaly_ids: list[int],
+    explanations: list[str],
+    autocommit: bool = False
+) -> int:
+    """
+    Persist detection explanations into `anomalies.meta` in one statement.
+    
+    Args:
+        conn: Database connection
+        anomaly_ids: Anomaly IDs
+        explanations: Explanation per anomaly (same order as anomaly_ids)
+        autocommit: Commit before returning (otherwise the caller owns the
+            transaction)
+    
+    Returns:
+        int: Number of anomalies updated
+    """
+    if not anomaly_ids:
+        return 0
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE anomalies a
+            SET meta = COALESCE(a.meta, '{}'::jsonb) || jsonb_build_object('reasoning', r.text)
+            FROM unnest(%s::bigint[], %s::text[]) AS r(id, text)
+            WHERE a.id = r.id
+            """,
+            (list(anomaly_ids), list(explanations))
+        )
+        count = cur.rowcount
+    if autocommit:
+        conn.commit()
+    return count
 
 
 def get_anomalies_for_month(
     conn: psycopg.Connection,
     company_id: UUID,
-    month: str  # YYYY-MM-DD format
+    month: date,
+    columns: Sequence[str] = LIST_COLUMNS
 ) -> list[dict]:
     """
     Get all anomalies for a specific month.
@@ -282,33 +1011,68 @@ def get_anomalies_for_month(
     Args:
         conn: Database connection
         company_id: Company GUID
-        month: Month as string (YYYY-MM-DD, first of month)
+        month: Month (first day)
+        columns: Columns to return (from ANOMALY_COLUMNS; add 'meta' for
+            detection details)
     
     Returns:
         List of anomaly dictionaries
     """
+    query = _ANOMALIES_FOR_MONTH_TEMPLATE.format(columns=_select_columns(columns))
+    
     with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            """
-            SELECT 
-                company_id,
-                id, month, metric_name, 
-                prev_value, curr_value, pct_change,
-                severity_score, status, meta, created_at
-            FROM anomalies
-            WHERE company_id = %s AND month = %s
-            ORDER BY severity_score DESC
-            """,
-            (str(company_id), month)
-        )
+        cur.execute(query, (company_id, month), prepare=True)
+        return cur.fetchall()
+
+
+def get_anomalies_for_report(
+    conn: psycopg.Connection,
+    company_id: UUID,
+    month: date
+) -> list[dict]:
+    """
+    Get a month's anomalies in display form for the CFO report.
+    
+    Like get_anomalies_for_month with every column, but values are floats and
+    pct_change/severity_score are rounded server-side, with the
+    meta signals yoy_pct, rolling_pct and zscore extracted the same way.
+    
+    Args:
+        conn: Database connection
+        company_id: Company GUID
+        month: Month (first day)
+    
+    Returns:
+        List of anomaly dictionaries, highest severity first
+    """
+    with conn.cursor(binary=True, row_factory=dict_row) as cur:
+        cur.execute(_ANOMALIES_FOR_REPORT, (company_id, month), prepare=True)
         return cur.fetchall()
 
 
+def _anomalies_for_company_query(
+    status: Optional[str],
+    columns: Sequence[str]
+) -> sql.Composed:
+    """Compose the company listing query for a status filter and projection."""
+    # Status is inlined as a literal (one prepared statement per status) so
+    # generic plans can still match the partial index on status = 'open'
+    if status:
+        status_filter = sql.SQL(" AND status = {}").format(sql.Literal(status))
+    else:
+        status_filter = sql.SQL("")
+    return _ANOMALIES_FOR_COMPANY_TEMPLATE.format(
+        columns=_select_columns(columns),
+        status_filter=status_filter,
+    )
+
+
 def get_anomalies_for_company(
     conn: psycopg.Connection,
     company_id: UUID,
     status: Optional[str] = None,
-    limit: int = 100
+    limit: int = 100,
+    columns: Sequence[str] = LIST_COLUMNS
 ) -> list[dict]:
     """
     Get all anomalies for a company.
@@ -318,30 +1082,49 @@ def get_anomalies_for_company(
         company_id: Internal company UUID
         status: Optional filter by status ('open', 'muted', 'confirmed')
         limit: Maximum number of results
+        columns: Columns to return (from ANOMALY_COLUMNS)
     
     Returns:
         List of anomaly dictionaries
     """
-    query = """
-        SELECT 
-            id, month, metric_name, 
-            prev_value, curr_value, pct_change,
-            severity_score, status, created_at
-        FROM anomalies
-        WHERE company_id = %s
+    query = _anomalies_for_company_query(status, columns)
+    
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(query, (company_id, limit), prepare=True)
+        return cur.fetchall()
+
+
+def get_anomalies_for_company_iter(
+    conn: psycopg.Connection,
+    company_id: UUID,
+    status: Optional[str] = None,
+    limit: int = 100_000,
+    columns: Sequence[str] = LIST_COLUMNS,
+    itersize: int = 500
+) -> Iterator[dict]:
     """
-    params = [str(company_id)]
+    Stream anomalies for a company through a server-side cursor.
     
-    if status:
-        query += " AND status = %s"
-        params.append(status)
+    Rows arrive `itersize` at a time, so peak memory stays flat for large
+    limits; use `get_anomalies_for_company` for small pages.
     
-    query += " ORDER BY month DESC, severity_score DESC LIMIT %s"
-    params.append(limit)
+    Args:
+        conn: Database connection (must not be in autocommit mode)
+        company_id: Internal company UUID
+        status: Optional filter by status ('open', 'muted', 'confirmed')
+        limit: Maximum number of results
+        columns: Columns to return (from ANOMALY_COLUMNS)
+        itersize: Rows fetched per network round trip
     
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(query, params)
-        return cur.fetchall()
+    Yields:
+        Anomaly dictionaries
+    """
+    query = _anomalies_for_company_query(status, columns)
+    
+    with conn.cursor(name=f"anomalies_{uuid4().hex}", row_factory=dict_row) as cur:
+        cur.itersize = itersize
+        cur.execute(query, (company_id, limit))
+        yield from cur
 
 
 def get_anomalies_without_contributors(
@@ -360,24 +1143,13 @@ def get_anomalies_without_contributors(
     Returns:
         List of anomaly dictionaries
     """
-    query = """
-        SELECT a.id, a.company_id, a.month, a.metric_name,
-               a.prev_value, a.curr_value, a.pct_change
-        FROM anomalies a
-        LEFT JOIN anomaly_contributors ac ON ac.anomaly_id = a.id
-        WHERE ac.id IS NULL
-    """
-    params = []
-    
     if company_id:
-        query += " AND a.company_id = %s"
-        params.append(str(company_id))
-    
-    query += " ORDER BY a.created_at DESC LIMIT %s"
-    params.append(limit)
+        query, params = _WITHOUT_CONTRIBUTORS_FOR_COMPANY, (company_id, limit)
+    else:
+        query, params = _WITHOUT_CONTRIBUTORS, (limit,)
     
     with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(query, params)
+        cur.execute(query, params, prepare=True)
         return cur.fetchall()
 
 
@@ -397,48 +1169,84 @@ def get_anomalies_without_highlights(
     Returns:
         List of anomaly dictionaries
     """
-    query = """
-        SELECT a.id, a.company_id, a.month, a.metric_name,
-               a.prev_value, a.curr_value, a.pct_change, a.severity_score
-        FROM anomalies a
-        LEFT JOIN anomaly_highlights ah ON ah.anomaly_id = a.id
-        WHERE ah.id IS NULL
+    if company_id:
+        query, params = _WITHOUT_HIGHLIGHTS_FOR_COMPANY, (company_id, limit)
+    else:
+        query, params = _WITHOUT_HIGHLIGHTS, (limit,)
+    
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(query, params, prepare=True)
+        return cur.fetchall()
+
+
+def get_pending_work(
+    conn: psycopg.Connection,
+    company_id: Optional[UUID] = None,
+    limit: int = 100
+) -> dict:
     """
-    params = []
+    Get anomalies still missing contributors and highlights in one round trip.
+    
+    Both listing queries are sent in a single pipeline, so libpq ships them
+    together and waits for one Sync instead of two.
     
+    Args:
+        conn: Database connection
+        company_id: Optional company filter
+        limit: Maximum number of results per list
+    
+    Returns:
+        Dict with 'without_contributors' and 'without_highlights' lists
+    """
     if company_id:
-        query += " AND a.company_id = %s"
-        params.append(str(company_id))
+        contributors_query = _WITHOUT_CONTRIBUTORS_FOR_COMPANY
+        highlights_query = _WITHOUT_HIGHLIGHTS_FOR_COMPANY
+        params = (company_id, limit)
+    else:
+        contributors_query = _WITHOUT_CONTRIBUTORS
+        highlights_query = _WITHOUT_HIGHLIGHTS
+        params = (limit,)
     
-    query += " ORDER BY a.severity_score DESC LIMIT %s"
-    params.append(limit)
+    with conn.pipeline():
+        contributors_cur = conn.cursor(row_factory=dict_row)
+        highlights_cur = conn.cursor(row_factory=dict_row)
+        contributors_cur.execute(contributors_query, params, prepare=True)
+        highlights_cur.execute(highlights_query, params, prepare=True)
     
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(query, params)
-        return cur.fetchall()
+    with contributors_cur, highlights_cur:
+        return {
+            "without_contributors": contributors_cur.fetchall(),
+            "without_highlights": highlights_cur.fetchall(),
+        }
 
 
 def update_anomaly_status(
     conn: psycopg.Connection,
     anomaly_id: int,
-    status: str
+    status: str,
+    autocommit: bool = False
 ) -> bool:
     """
     Update the status of an anomaly.
     
+    The caller owns the transaction, so many updates can share one commit.
+    
     Args:
         conn: Database connection
         anomaly_id: Anomaly ID
         status: New status ('open', 'muted', 'confirmed')
+        autocommit: Commit before returning
     
     Returns:
         bool: True if updated, False if not found
     """
     with conn.cursor() as cur:
         cur.execute(
-            "UPDATE anomalies SET status = %s WHERE id = %s RETURNING id",
-            (status, anomaly_id)
+            "UPDATE anomalies SET status = %s WHERE id = %s",
+            (status, anomaly_id),
+            prepare=True
         )
-        row = cur.fetchone()
+        updated = cur.rowcount > 0
+    if autocommit:
         conn.commit()
-        return row is not None
+    return updated
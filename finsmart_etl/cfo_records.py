@@ -0,0 +1,130 @@
+"""
+CFO view records: per-row assembly of the CFO month view payload.
+
+Provides:
+- Metric overview records
+- Anomaly records with detection context, contributors and evidence
+
+These builders are the CPU-bound part of a view build once the database
+reads are batched. They are pure functions over already-fetched rows
+(no I/O, no dynamic attribute access), so the module can be compiled
+ahead of time (e.g. with mypyc) without changing callers.
+"""
+
+from typing import Optional
+
+from .anomalies import detection_meta
+from .explanations import format_amount_tr, metric_name_tr
+
+
+def _amount_pair(value) -> tuple[Optional[float], str]:
+    """Return (float value, Turkish-formatted amount), or (None, "-") if missing."""
+    if value is None:
+        return None, "-"
+    value = float(value)
+    return value, format_amount_tr(value)
+
+
+def build_metric_record(row: dict) -> dict:
+    """
+    Build the CFO view record for one metrics overview row.
+    
+    Args:
+        row: Row from get_metrics_overview's query or the cfo_month_view
+            function (float values, rounded pct_change)
+    
+    Returns:
+        dict: Metric record with Turkish name and formatted amounts
+    """
+    prev_value, prev_formatted = _amount_pair(row["prev_value"])
+    curr_value, curr_formatted = _amount_pair(row["curr_value"])
+    return {
+        "metric_name": row["metric_name"],
+        "metric_name_tr": metric_name_tr(row["metric_name"]),
+        "prev_value": prev_value,
+        "curr_value": curr_value,
+        "prev_formatted": prev_formatted,
+        "curr_formatted": curr_formatted,
+        "pct_change": row["pct_change"],
+        "is_anomalous": row["is_anomalous"],
+    }
+
+
+def build_anomaly_record(
+    anomaly: dict,
+    contributors: list[dict],
+    highlights: dict,
+    evidence: list[dict]
+) -> dict:
+    """
+    Build the CFO view record for one anomaly.
+    
+    Args:
+        anomaly: Report row from get_anomalies_for_report or the
+            cfo_month_view function
+        contributors: Contributor rows for the anomaly (largest first)
+        highlights: {"tr": "...", "en": "..."} highlight texts
+        evidence: Evidence transaction rows for the anomaly's metric
+    
+    Returns:
+        dict: Anomaly record with detection context, contributors,
+        highlights and evidence sample
+    """
+    meta = detection_meta(anomaly)
+    
+    # Detection reasoning is generated separately but not surfaced in reports
+    detection_reasoning = None
+    
+    prev_value, prev_formatted = _amount_pair(anomaly["prev_value"])
+    curr_value, curr_formatted = _amount_pair(anomaly["curr_value"])
+    return {
+        "metric_name": anomaly["metric_name"],
+        "metric_name_tr": metric_name_tr(anomaly["metric_name"]),
+        "prev_value": prev_value,
+        "curr_value": curr_value,
+        "prev_formatted": prev_formatted,
+        "curr_formatted": curr_formatted,
+        "pct_change": anomaly["pct_change"],
+        "severity_score": anomaly["severity_score"],
+        "status": anomaly["status"],
+        # Detection context
+        "detection": {
+            "reason": meta.get("detection_reason"),
+            "yoy_value": meta.get("yoy_value"),
+            "yoy_pct": anomaly["yoy_pct"],
+            "rolling_3m_avg": meta.get("rolling_3m_avg"),
+            "rolling_pct": anomaly["rolling_pct"],
+            "zscore": anomaly["zscore"],
+            "reasoning": detection_reasoning,
+        },
+        "contributors": [_contributor_record(c) for c in contributors],
+        "highlights": highlights,
+        "evidence_sample": [_evidence_record(e) for e in evidence],
+    }
+
+
+def _contributor_record(contributor: dict) -> dict:
+    """Build the record for one contributor row."""
+    amount, amount_formatted = _amount_pair(contributor["amount"])
+    return {
+        "label": contributor["label"],
+        "amount": amount,
+        "amount_formatted": amount_formatted,
+        "share_pct": round(float(contributor["share_of_total"]) * 100, 1),
+    }
+
+
+def _evidence_record(transaction: dict) -> dict:
+    """Build the record for one evidence transaction row."""
+    amount, amount_formatted = _amount_pair(transaction["amount"])
+    return {
+        "date": str(transaction["tx_date"]),
+        "account_code": transaction["account_code"],
+        "account_name": transaction["account_name"],
+        "coa_code": transaction["coa_code"],
+        "coa_name": transaction["coa_name"],
+        "description": transaction["description"],
+        "customer_name": transaction["customer_name"],
+        "amount": amount,
+        "amount_formatted": amount_formatted,
+    }
@@ -5,35 +5,121 @@ Provides:
 - Metrics overview with MoM changes
 - Anomaly details with contributors and explanations
 - Evidence samples for human verification
-- Consolidated executive report
+- Consolidated executive report (optionally streamed as partial drafts)
+- Read-only (sync and async) views for dashboards
 """
 
+import asyncio
+import copy
 import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
-from typing import Optional
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional
 from uuid import UUID
 
+import jiter
 import psycopg
+from psycopg import AsyncConnection
 from psycopg.rows import dict_row
-from openai import OpenAI
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
-from .config import get_config
+from .cfo_records import build_anomaly_record, build_metric_record
+from .db import ConnOrPool, accepts_pool, get_async_pool
+from .jobs import enqueue_compute
+from .llm import (
+    JSON_TEXT_FORMAT,
+    create_async_openai_client,
+    get_openai_client,
+    parse_llm_json,
+    prompt_json,
+    run_response_batch,
+)
 from .metrics import compute_monthly_kpis
-from .anomalies import detect_anomalies, get_anomalies_for_month, explain_anomaly_detection
+from .anomalies import (
+    detect_anomalies,
+    get_pending_work,
+    get_anomalies_for_report,
+    detection_meta,
+    explain_anomalies_batch,
+    store_detection_reasoning,
+)
 from .contributors import (
     compute_contributors_for_company,
-    get_contributors_for_anomaly,
-    get_evidence_transactions,
+    get_contributors_for_anomalies,
+    get_evidence_transactions_for_metrics,
+    get_evidence_transactions_for_metrics_async,
 )
 from .explanations import (
     generate_highlights_for_new_anomalies,
-    get_highlights_for_anomaly,
+    get_highlights_for_anomalies,
     generate_highlight_for_anomaly,
+    generate_highlights_for_anomalies,
+    generate_highlights_for_anomalies_batch,
     month_label_tr,
-    metric_name_tr,
-    format_amount_tr,
 )
 
+log = logging.getLogger(__name__)
+
+# Company rows are effectively immutable; cache lookups per process
+COMPANY_CACHE_TTL = 300  # seconds
+COMPANY_CACHE_SIZE = 1024
+_company_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+# Read-only month views, keyed by (company, month, data version)
+CFO_VIEW_CACHE_TTL = 3600  # seconds
+CFO_VIEW_CACHE_SIZE = 256
+_cfo_view_cache: OrderedDict[tuple[str, date, str], tuple[float, dict]] = OrderedDict()
+
+# Both caches are shared by pool workers and request threads
+_cache_lock = threading.Lock()
+
+_COMPANY_BY_GUID = "SELECT * FROM companies WHERE finsmart_guid = %s"
+
+_CFO_MONTH_VIEW = "SELECT cfo_month_view(%s, %s)"
+
+# Data version of everything a month view reads: companies.data_version is
+# bumped by triggers on every write to the company's transactions, KPIs,
+# anomalies, contributors and highlights, and the row's xmin also changes
+# with the company's own fields. A primary-key lookup, so cache hits stay
+# cheap; the token is per company, so any write invalidates all its months.
+_MONTH_DATA_VERSION = """
+    SELECT (
+        SELECT data_version || '.' || xmin::text
+        FROM companies WHERE finsmart_guid = %s
+    )
+"""
+
+
+_MONTH_DATA_COUNTS = """
+    SELECT
+        (SELECT COUNT(*) FROM monthly_kpis
+         WHERE company_id = %(company_id)s AND month = %(month)s),
+        (SELECT COUNT(*) FROM anomalies
+         WHERE company_id = %(company_id)s AND month = %(month)s),
+        (SELECT COUNT(*) FROM anomaly_contributors ac
+         JOIN anomalies a ON ac.anomaly_id = a.id
+         WHERE a.company_id = %(company_id)s AND a.month = %(month)s)
+"""
+
+
+# Anomaly counts by direction of the (displayed, 1-decimal) MoM change;
+# NULL changes count as negative, as in the cfo_month_view function
+_ANOMALY_SUMMARY = """
+    SELECT
+        COUNT(*) AS total_anomalies,
+        COUNT(*) FILTER (WHERE ROUND(pct_change, 1) > 0) AS positive_anomalies,
+        COUNT(*) FILTER (WHERE (ROUND(pct_change, 1) > 0) IS NOT TRUE) AS negative_anomalies
+    FROM anomalies
+    WHERE company_id = %(company_id)s AND month = %(month)s
+"""
+
 
 def build_executive_report_prompt(
     company_name: str,
@@ -94,7 +180,7 @@ def build_executive_report_prompt(
 DÖNEM: {month_label}
 
 ANOMALİ DETAYLARI:
-{json.dumps(anomaly_details, indent=2, ensure_ascii=False)}
+{prompt_json(anomaly_details)}
 
 ÖNEMLİ KURALLAR:
 1. Önce TAMAMEN TÜRKÇE bir rapor oluştur (hiç İngilizce kelime kullanma)
@@ -160,10 +246,109 @@ Sadece JSON döndür, başka açıklama ekleme."""
     return prompt, anomaly_details
 
 
+# Responses API parameters for the executive report (shared by the
+# synchronous and Batch API paths)
+EXECUTIVE_REPORT_REQUEST_PARAMS = {
+    "model": "gpt-5-mini",
+    "reasoning": {"effort": "low"},
+    "text": {"verbosity": "low", "format": JSON_TEXT_FORMAT},
+}
+EXECUTIVE_REPORT_PARSE_EVERY = 32  # streamed text deltas between partial parses
+
+
+def parse_executive_report(
+    raw_text: str,
+    month_label: str,
+    anomalies: list[dict],
+    anomaly_details: list[dict]
+) -> dict:
+    """
+    Parse the executive report LLM response.
+    
+    Falls back to a report built from the anomaly details when the
+    response is not valid JSON.
+    
+    Args:
+        raw_text: Model output text
+        month_label: Turkish month label (e.g., "Eylül 2023")
+        anomalies: List of anomaly details
+        anomaly_details: Prompt details from build_executive_report_prompt
+    
+    Returns:
+        dict: Executive report with separate Turkish and English sections
+    """
+    try:
+        report = parse_llm_json(raw_text)
+    except json.JSONDecodeError as e:
+        return _fallback_executive_report(
+            month_label, anomalies, anomaly_details, f"Could not parse LLM response: {e}"
+        )
+    
+    if not isinstance(report, dict) or not ("report_tr" in report or "report_en" in report):
+        return _fallback_executive_report(
+            month_label, anomalies, anomaly_details, "LLM response is not an executive report"
+        )
+    return report
+
+
+def _fallback_executive_report(
+    month_label: str,
+    anomalies: list[dict],
+    anomaly_details: list[dict],
+    error: str
+) -> dict:
+    """Build the executive report from existing data when the LLM output is unusable."""
+    anomaly_items_tr = []
+    anomaly_items_en = []
+    for a in anomaly_details:
+        anomaly_items_tr.append({
+            "metric": a["metric_tr"],
+            "change": f"{a['pct_change']} {a['direction']}",
+            "why_anomaly": a["detection_reasoning"] or "Eşik değerleri aşıldı",
+            "root_cause": a["root_cause_tr"] or "Detaylı analiz bekleniyor"
+        })
+        anomaly_items_en.append({
+            "metric": a["metric"],
+            "change": a["pct_change"],
+            "why_anomaly": a["detection_reasoning"] or "Thresholds exceeded",
+            "root_cause": a["root_cause_en"] or "Detailed analysis pending"
+        })
+
+    return {
+        "report_tr": {
+            "title": f"{month_label} Finansal Anomali Özet Raporu",
+            "overview": f"Bu dönemde {len(anomalies)} finansal anomali tespit edilmiştir.",
+            "anomalies": anomaly_items_tr,
+            "action_recommendations": ["Detaylı inceleme yapılması önerilir"]
+        },
+        "report_en": {
+            "title": f"{month_label} Financial Anomaly Summary Report",
+            "overview": f"{len(anomalies)} financial anomalies were detected this period.",
+            "anomalies": anomaly_items_en,
+            "action_recommendations": ["Detailed review recommended"]
+        },
+        # Simple fallback narratives when LLM JSON parsing fails
+        "narrative_tr": (
+            f"{month_label} döneminde toplam {len(anomalies)} finansal anomali tespit edilmiştir. "
+            "Bu anomaliler özellikle gelir ve gider kalemlerindeki olağandışı sıçramalar ile "
+            "yoğunlaşan müşteri ve tedarikçi işlemlerinden kaynaklanmaktadır. Detaylı inceleme "
+            "ve gerekli düzeltmelerin yapılması önerilmektedir."
+        ),
+        "narrative_en": (
+            f"During {month_label}, a total of {len(anomalies)} financial anomalies were detected. "
+            "These anomalies are primarily driven by unusual spikes in revenue and expense items, "
+            "as well as highly concentrated customer and supplier transactions. A detailed review "
+            "and appropriate corrective actions are recommended."
+        ),
+        "error": error
+    }
+
+
 def generate_executive_report(
     company_name: str,
     month_label: str,
-    anomalies: list[dict]
+    anomalies: list[dict],
+    batch_func=None
 ) -> dict:
     """
     Generate a consolidated executive report summarizing all anomalies.
@@ -175,13 +360,14 @@ def generate_executive_report(
         company_name: Company name
         month_label: Turkish month label (e.g., "Eylül 2023")
         anomalies: List of anomaly details
+        batch_func: Optional function taking {custom_id: request body} and
+            returning {custom_id: output text}; when given, the report is
+            requested through it (e.g. llm.run_response_batch) instead of a
+            synchronous call
     
     Returns:
         dict: Executive report with separate Turkish and English sections
     """
-    config = get_config()
-    client = OpenAI(api_key=config.openai_api_key)
-
     prompt, anomaly_details = build_executive_report_prompt(
         company_name=company_name,
         month_label=month_label,
@@ -189,118 +375,151 @@ def generate_executive_report(
     )
 
     try:
-        result = client.responses.create(
-            model="gpt-5-mini",
-            input=prompt,
-            reasoning={"effort": "low"},
-            text={"verbosity": "low"},
-        )
-        
-        raw_text = result.output_text.strip()
-        
-        # Handle potential markdown code blocks
-        if raw_text.startswith("```"):
-            lines = raw_text.split("\n")
-            # Remove first and last lines (```json and ```)
-            raw_text = "\n".join(lines[1:-1]) if len(lines) > 2 else raw_text
-            if raw_text.startswith("json"):
-                raw_text = raw_text[4:].strip()
-        
-        report = json.loads(raw_text)
-        return report
-        
-    except json.JSONDecodeError as e:
-        # Fallback: build report from existing data
-        anomaly_items_tr = []
-        anomaly_items_en = []
-        for a in anomaly_details:
-            anomaly_items_tr.append({
-                "metric": a["metric_tr"],
-                "change": f"{a['pct_change']} {a['direction']}",
-                "why_anomaly": a["detection_reasoning"] or "Eşik değerleri aşıldı",
-                "root_cause": a["root_cause_tr"] or "Detaylı analiz bekleniyor"
-            })
-            anomaly_items_en.append({
-                "metric": a["metric"],
-                "change": a["pct_change"],
-                "why_anomaly": a["detection_reasoning"] or "Thresholds exceeded",
-                "root_cause": a["root_cause_en"] or "Detailed analysis pending"
+        if batch_func is not None:
+            outputs = batch_func({
+                "executive_report": {"input": prompt, **EXECUTIVE_REPORT_REQUEST_PARAMS}
             })
+            if "executive_report" not in outputs:
+                raise RuntimeError("Executive report batch request failed")
+            raw_text = outputs["executive_report"]
+        else:
+            result = get_openai_client().responses.create(
+                input=prompt, **EXECUTIVE_REPORT_REQUEST_PARAMS
+            )
+            raw_text = result.output_text
+        
+        return parse_executive_report(raw_text, month_label, anomalies, anomaly_details)
         
-        return {
-            "report_tr": {
-                "title": f"{month_label} Finansal Anomali Özet Raporu",
-                "overview": f"Bu dönemde {len(anomalies)} finansal anomali tespit edilmiştir.",
-                "anomalies": anomaly_items_tr,
-                "action_recommendations": ["Detaylı inceleme yapılması önerilir"]
-            },
-            "report_en": {
-                "title": f"{month_label} Financial Anomaly Summary Report",
-                "overview": f"{len(anomalies)} financial anomalies were detected this period.",
-                "anomalies": anomaly_items_en,
-                "action_recommendations": ["Detailed review recommended"]
-            },
-            # Simple fallback narratives when LLM JSON parsing fails
-            "narrative_tr": (
-                f"{month_label} döneminde toplam {len(anomalies)} finansal anomali tespit edilmiştir. "
-                "Bu anomaliler özellikle gelir ve gider kalemlerindeki olağandışı sıçramalar ile "
-                "yoğunlaşan müşteri ve tedarikçi işlemlerinden kaynaklanmaktadır. Detaylı inceleme "
-                "ve gerekli düzeltmelerin yapılması önerilmektedir."
-            ),
-            "narrative_en": (
-                f"During {month_label}, a total of {len(anomalies)} financial anomalies were detected. "
-                "These anomalies are primarily driven by unusual spikes in revenue and expense items, "
-                "as well as highly concentrated customer and supplier transactions. A detailed review "
-                "and appropriate corrective actions are recommended."
-            ),
-            "error": f"Could not parse LLM response: {e}"
-        }
     except Exception as e:
-        return {
-            "report_tr": {
-                "title": f"{month_label} Finansal Anomali Özet Raporu",
-                "overview": f"Bu dönemde {len(anomalies)} anomali tespit edildi.",
-                "anomalies": [],
-                "action_recommendations": []
-            },
-            "report_en": {
-                "title": f"{month_label} Financial Anomaly Summary Report",
-                "overview": f"{len(anomalies)} anomalies were detected this period.",
-                "anomalies": [],
-                "action_recommendations": []
-            },
-            "error": str(e)
-        }
-
-
-def get_company_info(conn: psycopg.Connection, company_id: UUID) -> dict:
+        return _executive_report_error(month_label, anomalies, e)
+
+
+async def stream_executive_report(
+    company_name: str,
+    month_label: str,
+    anomalies: list[dict],
+    parse_every: int = EXECUTIVE_REPORT_PARSE_EVERY
+) -> AsyncIterator[dict]:
+    """
+    Stream the executive report, yielding progressively more complete drafts.
+    
+    Text deltas are accumulated and re-parsed every `parse_every` deltas
+    with jiter's partial mode, so callers can render the Turkish overview
+    while the rest is still generating. The last item is always the final
+    report, parsed (with fallback) exactly as generate_executive_report does.
+    
+    Args:
+        company_name: Company name
+        month_label: Turkish month label (e.g., "Eylül 2023")
+        anomalies: List of anomaly details
+        parse_every: Number of text deltas between partial parses
+    
+    Yields:
+        dict: Partial executive reports, then the final one
+    """
+    prompt, anomaly_details = build_executive_report_prompt(
+        company_name=company_name,
+        month_label=month_label,
+        anomalies=anomalies,
+    )
+    buf = bytearray()
+    
+    try:
+        async with create_async_openai_client() as client:
+            stream = await client.responses.create(
+                input=prompt, stream=True, **EXECUTIVE_REPORT_REQUEST_PARAMS
+            )
+            deltas = 0
+            last_partial = None
+            async for event in stream:
+                if event.type != "response.output_text.delta":
+                    continue
+                buf += event.delta.encode("utf-8")
+                deltas += 1
+                if deltas % parse_every:
+                    continue
+                partial = _parse_partial_report(buf)
+                if partial and partial != last_partial:
+                    last_partial = partial
+                    yield partial
+    except Exception as e:
+        yield _executive_report_error(month_label, anomalies, e)
+        return
+    
+    yield parse_executive_report(buf.decode("utf-8"), month_label, anomalies, anomaly_details)
+
+
+def _parse_partial_report(buf: bytearray) -> Optional[dict]:
+    """Parse an incomplete report JSON (None until an object has started)."""
+    start = buf.find(b"{")
+    if start < 0:
+        return None
+    data = bytes(buf[start:])
+    try:
+        partial = jiter.from_json(data, partial_mode="trailing-strings")
+    except ValueError:
+        return None
+    return partial if isinstance(partial, dict) else None
+
+
+def _executive_report_error(month_label: str, anomalies: list[dict], error: Exception) -> dict:
+    """Minimal executive report for when the LLM call fails."""
+    return {
+        "report_tr": {
+            "title": f"{month_label} Finansal Anomali Özet Raporu",
+            "overview": f"Bu dönemde {len(anomalies)} anomali tespit edildi.",
+            "anomalies": [],
+            "action_recommendations": []
+        },
+        "report_en": {
+            "title": f"{month_label} Financial Anomaly Summary Report",
+            "overview": f"{len(anomalies)} anomalies were detected this period.",
+            "anomalies": [],
+            "action_recommendations": []
+        },
+        "error": str(error)
+    }
+
+
+@accepts_pool
+def get_company_info(conn: ConnOrPool, company_id: UUID) -> dict:
     """
     Get company information.
     
     Args:
-        conn: Database connection
+        conn: Database connection or connection pool
         company_id: Company GUID (primary key)
     
     Returns:
         dict: Company info
     """
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            """
-            SELECT finsmart_guid, name, business_model, created_at
-            FROM companies
-            WHERE finsmart_guid = %s
-            """,
-            (str(company_id),)
-        )
-        row = cur.fetchone()
-        if not row:
-            raise ValueError(f"Company {company_id} not found")
-        return dict(row)
+    return _company_info(company_id, get_company_by_guid(conn, company_id))
+
+
+async def get_company_info_async(aconn: AsyncConnection, company_id: UUID) -> dict:
+    """
+    Async variant of get_company_info.
+    
+    Args:
+        aconn: Async database connection
+        company_id: Company GUID (primary key)
+    
+    Returns:
+        dict: Company info
+    """
+    return _company_info(company_id, await get_company_by_guid_async(aconn, company_id))
+
+
+def _company_info(company_id: UUID, company: Optional[dict]) -> dict:
+    """Project a company row to the view's company info (raises if missing)."""
+    if not company:
+        raise ValueError(f"Company {company_id} not found")
+    return {key: company[key] for key in ("finsmart_guid", "name", "business_model", "created_at")}
 
 
+@accepts_pool
 def get_metrics_overview(
-    conn: psycopg.Connection,
+    conn: ConnOrPool,
     company_id: UUID,
     month: date
 ) -> list[dict]:
@@ -308,7 +527,7 @@ def get_metrics_overview(
     Get all metrics for a month with MoM comparison.
     
     Args:
-        conn: Database connection
+        conn: Database connection or connection pool
         company_id: Company GUID
         month: Target month (first of month)
     
@@ -321,90 +540,80 @@ def get_metrics_overview(
     else:
         prev_month = month.replace(month=month.month - 1)
     
-    # Get current month KPIs
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            """
-            SELECT metric_name, value
-            FROM monthly_kpis
-            WHERE company_id = %s AND month = %s
-            """,
-            (str(company_id), month)
-        )
-        current_kpis = {row["metric_name"]: row["value"] for row in cur.fetchall()}
-    
-    # Get previous month KPIs
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            """
-            SELECT metric_name, value
-            FROM monthly_kpis
-            WHERE company_id = %s AND month = %s
-            """,
-            (str(company_id), prev_month)
-        )
-        prev_kpis = {row["metric_name"]: row["value"] for row in cur.fetchall()}
-    
-    # Get anomalies for this month
-    with conn.cursor() as cur:
+    # Current vs previous KPIs joined per metric, flagged against this
+    # month's anomalies, in a single statement. Values are cast to float8
+    # and the percentage change (NULL when there is no previous value to
+    # divide by) is computed and rounded server-side, so rows arrive (in
+    # binary format) as floats ready to format.
+    with conn.cursor(binary=True, row_factory=dict_row) as cur:
         cur.execute(
             """
-            SELECT metric_name
-            FROM anomalies
-            WHERE company_id = %s AND month = %s
+            SELECT
+                metric_name,
+                p.value::float8 AS prev_value,
+                c.value::float8 AS curr_value,
+                ROUND(
+                    (c.value - p.value) / NULLIF(ABS(p.value), 0) * 100,
+                    1
+                )::float8 AS pct_change,
+                EXISTS (
+                    SELECT 1 FROM anomalies a
+                    WHERE a.company_id = %(company_id)s
+                      AND a.month = %(month)s
+                      AND a.metric_name = COALESCE(c.metric_name, p.metric_name)
+                ) AS is_anomalous
+            FROM (
+                SELECT metric_name, value FROM monthly_kpis
+                WHERE company_id = %(company_id)s AND month = %(month)s
+            ) c
+            FULL OUTER JOIN (
+                SELECT metric_name, value FROM monthly_kpis
+                WHERE company_id = %(company_id)s AND month = %(prev_month)s
+            ) p USING (metric_name)
+            ORDER BY metric_name
             """,
-            (str(company_id), month)
+            {"company_id": company_id, "month": month, "prev_month": prev_month},
+            prepare=True
         )
-        anomaly_metrics = {row[0] for row in cur.fetchall()}
-    
-    # Build overview
-    metrics = []
-    all_metric_names = set(current_kpis.keys()) | set(prev_kpis.keys())
-    
-    for metric_name in sorted(all_metric_names):
-        curr_val = current_kpis.get(metric_name)
-        prev_val = prev_kpis.get(metric_name)
-        
-        # Calculate percentage change
-        pct_change = None
-        if prev_val and prev_val != 0 and curr_val is not None:
-            pct_change = float((curr_val - prev_val) / abs(prev_val) * 100)
-        
-        metrics.append({
-            "metric_name": metric_name,
-            "metric_name_tr": metric_name_tr(metric_name),
-            "prev_value": float(prev_val) if prev_val else None,
-            "curr_value": float(curr_val) if curr_val else None,
-            "prev_formatted": format_amount_tr(prev_val) if prev_val else "-",
-            "curr_formatted": format_amount_tr(curr_val) if curr_val else "-",
-            "pct_change": round(pct_change, 1) if pct_change else None,
-            "is_anomalous": metric_name in anomaly_metrics,
-        })
+        rows = cur.fetchall()
     
-    return metrics
+    return [build_metric_record(row) for row in rows]
 
 
+@accepts_pool
 def get_anomaly_details(
-    conn: psycopg.Connection,
+    conn: ConnOrPool,
     company_id: UUID,
     month: date,
-    generate_missing_highlights: bool = True
+    generate_missing_highlights: bool = True,
+    batch_mode: bool = False
 ) -> list[dict]:
     """
     Get detailed anomaly information for a month.
     
     Args:
-        conn: Database connection
+        conn: Database connection or connection pool
         company_id: Company GUID
         month: Target month
         generate_missing_highlights: If True, generate highlights on-the-fly
+        batch_mode: If True, generate missing highlights through the Batch API
     
     Returns:
         List of detailed anomaly dictionaries
     """
-    import sys
+    anomalies = get_anomalies_for_report(conn, company_id, month)
     
-    anomalies = get_anomalies_for_month(conn, company_id, str(month))
+    # Contributors, highlights and evidence for all anomalies up front
+    # (three queries total instead of three per anomaly)
+    anomaly_ids = [a["id"] for a in anomalies]
+    contributors_by_id = get_contributors_for_anomalies(conn, anomaly_ids)
+    if generate_missing_highlights:
+        highlights_by_id = _generate_explanations(conn, anomalies, batch_mode)
+    else:
+        highlights_by_id = get_highlights_for_anomalies(conn, anomaly_ids)
+    evidence_by_metric = get_evidence_transactions_for_metrics(
+        conn, company_id, month, [a["metric_name"] for a in anomalies], limit=10
+    )
     
     details = []
     total = len(anomalies)
@@ -412,127 +621,92 @@ def get_anomaly_details(
         anomaly_id = anomaly["id"]
         metric = anomaly["metric_name"]
         
-        print(f"  [{i}/{total}] Processing anomaly: {metric}...", file=sys.stderr)
+        log.debug("  [%d/%d] Processing anomaly: %s...", i, total, metric)
         
-        # Get contributors
-        contributors = get_contributors_for_anomaly(conn, anomaly_id)
-        print(f"    - Found {len(contributors)} contributors", file=sys.stderr)
+        contributors = contributors_by_id.get(anomaly_id, [])
+        log.debug("    - Found %d contributors", len(contributors))
         
-        # Get highlights
-        highlights = get_highlights_for_anomaly(conn, anomaly_id)
+        highlights = highlights_by_id[anomaly_id]
         
-        # Generate missing highlights on-the-fly
-        if generate_missing_highlights and not highlights.get("tr"):
-            print(f"    - Generating LLM explanation (gpt-5-mini)...", file=sys.stderr)
-            try:
-                generate_highlight_for_anomaly(conn, anomaly_id)
-                highlights = get_highlights_for_anomaly(conn, anomaly_id)
-                print(f"    - ✓ Explanation generated", file=sys.stderr)
-            except Exception as e:
-                print(f"    - ✗ Could not generate highlights: {e}", file=sys.stderr)
-        else:
-            print(f"    - Explanation already exists", file=sys.stderr)
-        
-        # Get evidence sample
-        evidence = get_evidence_transactions(
-            conn, company_id, str(month), anomaly["metric_name"], limit=10
-        )
-        print(f"    - Found {len(evidence)} evidence transactions", file=sys.stderr)
+        evidence = evidence_by_metric.get(metric, [])
+        log.debug("    - Found %d evidence transactions", len(evidence))
         
-        # Get detection metadata
-        meta = anomaly.get("meta") or {}
-        if isinstance(meta, str):
-            import json
-            meta = json.loads(meta)
-
-        # Optionally call gpt-5-nano for detection reasoning, but do not use its
-        # output in the current flow. This keeps the code path available without
-        # surfacing the explanation in reports.
-        detection_reasoning = None
-        if generate_missing_highlights and meta:
-            print(f"    - Generating detection reasoning (gpt-5-nano)...", file=sys.stderr)
-            try:
-                _ = explain_anomaly_detection(anomaly)
-                print(f"    - ✓ Detection reasoning generated (not displayed)", file=sys.stderr)
-            except Exception as e:
-                print(f"    - ✗ Could not generate detection reasoning: {e}", file=sys.stderr)
-        
-        details.append({
-            "metric_name": anomaly["metric_name"],
-            "metric_name_tr": metric_name_tr(anomaly["metric_name"]),
-            "prev_value": float(anomaly["prev_value"]) if anomaly["prev_value"] else None,
-            "curr_value": float(anomaly["curr_value"]) if anomaly["curr_value"] else None,
-            "prev_formatted": format_amount_tr(anomaly["prev_value"]) if anomaly["prev_value"] else "-",
-            "curr_formatted": format_amount_tr(anomaly["curr_value"]) if anomaly["curr_value"] else "-",
-            "pct_change": round(float(anomaly["pct_change"]), 1) if anomaly["pct_change"] else None,
-            "severity_score": round(float(anomaly["severity_score"]), 1) if anomaly["severity_score"] else None,
-            "status": anomaly["status"],
-            # Detection context
-            "detection": {
-                "reason": meta.get("detection_reason"),
-                "yoy_value": meta.get("yoy_value"),
-                "yoy_pct": round(float(meta.get("yoy_pct", 0)), 1) if meta.get("yoy_pct") else None,
-                "rolling_3m_avg": meta.get("rolling_3m_avg"),
-                "rolling_pct": round(float(meta.get("rolling_pct", 0)), 1) if meta.get("rolling_pct") else None,
-                "zscore": round(float(meta.get("zscore", 0)), 2) if meta.get("zscore") else None,
-                "reasoning": detection_reasoning,
-            },
-            "contributors": [
-                {
-                    "label": c["label"],
-                    "amount": float(c["amount"]),
-                    "amount_formatted": format_amount_tr(c["amount"]),
-                    "share_pct": round(float(c["share_of_total"]) * 100, 1),
-                }
-                for c in contributors
-            ],
-            "highlights": highlights,
-            "evidence_sample": [
-                {
-                    "date": str(e["tx_date"]),
-                    "account_code": e["account_code"],
-                    "account_name": e["account_name"],
-                    "coa_code": e["coa_code"],
-                    "coa_name": e["coa_name"],
-                    "description": e["description"],
-                    "customer_name": e["customer_name"],
-                    "amount": float(e["amount"]),
-                    "amount_formatted": format_amount_tr(e["amount"]),
-                }
-                for e in evidence
-            ],
-        })
+        details.append(build_anomaly_record(anomaly, contributors, highlights, evidence))
     
     return details
 
 
-def has_data_for_month(conn: psycopg.Connection, company_id: UUID, month: date) -> dict:
+def _generate_explanations(
+    conn: psycopg.Connection,
+    anomalies: list[dict],
+    batch_mode: bool
+) -> dict[int, dict]:
+    """
+    Generate detection reasoning and missing highlights for report anomalies.
+    
+    Both are persisted and committed, so they survive the connection going
+    back to a pool; anomalies that already have reasoning or highlights are
+    not rewritten. LLM failures are logged and leave the affected
+    highlights empty.
+    
+    Args:
+        conn: Database connection
+        anomalies: Rows from get_anomalies_for_report
+        batch_mode: If True, generate missing highlights through the Batch API
+    
+    Returns:
+        Dict mapping anomaly_id -> {"tr": "...", "en": "..."}, existing and
+        newly generated highlights
+    """
+    # Optionally call gpt-5-nano for detection reasoning, but do not use its
+    # output in the current flow. Anomalies without stored reasoning are
+    # explained in one concurrent batch and persisted to anomalies.meta in a
+    # single UPDATE; once all have it, repeat builds write nothing (and so
+    # do not bump the company's data_version)
+    to_explain = [
+        a for a in anomalies
+        if a.get("meta") and detection_meta(a).get("reasoning") is None
+    ]
+    if to_explain:
+        log.info("  Generating detection reasoning for %d anomalies (gpt-5-nano)...", len(to_explain))
+        try:
+            explanations = explain_anomalies_batch(to_explain, conn=conn)
+            # Also commits the explanation cache rows written above
+            store_detection_reasoning(
+                conn, [a["id"] for a in to_explain], explanations, autocommit=True
+            )
+            log.info("  ✓ Detection reasoning generated (not displayed)")
+        except Exception as e:
+            log.warning("  ✗ Could not generate detection reasoning: %s", e)
+    
+    anomaly_ids = [a["id"] for a in anomalies]
+    highlights_by_id = get_highlights_for_anomalies(conn, anomaly_ids)
+    
+    # Generate all missing highlights in one batch, overlapping the LLM calls
+    missing = [anomaly_id for anomaly_id in anomaly_ids if not highlights_by_id[anomaly_id]["tr"]]
+    if missing:
+        log.info("  Generating LLM explanations for %d anomalies (gpt-5-mini)...", len(missing))
+        try:
+            if batch_mode:
+                generated = generate_highlights_for_anomalies_batch(conn, missing)
+            else:
+                generated = generate_highlights_for_anomalies(conn, missing)
+            for anomaly_id, highlights in generated.items():
+                highlights_by_id[anomaly_id].update(highlights)
+            log.info("  ✓ %d/%d explanations generated", len(generated), len(missing))
+        except Exception as e:
+            log.warning("  ✗ Could not generate highlights: %s", e)
+    
+    return highlights_by_id
+
+
+@accepts_pool
+def has_data_for_month(conn: ConnOrPool, company_id: UUID, month: date) -> dict:
     """Check if data already exists for this month."""
     with conn.cursor() as cur:
-        # Check KPIs
-        cur.execute(
-            "SELECT COUNT(*) FROM monthly_kpis WHERE company_id = %s AND month = %s",
-            (str(company_id), month)
-        )
-        kpi_count = cur.fetchone()[0]
-        
-        # Check anomalies
-        cur.execute(
-            "SELECT COUNT(*) FROM anomalies WHERE company_id = %s AND month = %s",
-            (str(company_id), month)
-        )
-        anomaly_count = cur.fetchone()[0]
-        
-        # Check contributors for this month's anomalies
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM anomaly_contributors ac
-            JOIN anomalies a ON ac.anomaly_id = a.id
-            WHERE a.company_id = %s AND a.month = %s
-            """,
-            (str(company_id), month)
-        )
-        contributor_count = cur.fetchone()[0]
+        # KPIs, anomalies and this month's anomaly contributors in one round trip
+        cur.execute(_MONTH_DATA_COUNTS, {"company_id": company_id, "month": month}, prepare=True)
+        kpi_count, anomaly_count, contributor_count = cur.fetchone()
     
     return {
         "kpis": kpi_count,
@@ -542,94 +716,395 @@ def has_data_for_month(conn: psycopg.Connection, company_id: UUID, month: date)
     }
 
 
-def build_cfo_month_view(
+@accepts_pool
+def get_anomaly_summary(conn: ConnOrPool, company_id: UUID, month: date) -> dict:
+    """
+    Count a month's anomalies by direction of change.
+    
+    Args:
+        conn: Database connection or connection pool
+        company_id: Company GUID
+        month: Target month (first of month)
+    
+    Returns:
+        dict with total_anomalies, positive_anomalies and negative_anomalies
+    """
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(_ANOMALY_SUMMARY, {"company_id": company_id, "month": month}, prepare=True)
+        return cur.fetchone()
+
+
+def _enrich_anomalies_concurrently(
+    conn: psycopg.Connection,
+    pool: ConnectionPool,
+    company_id: UUID,
+    generate_highlights: bool,
+    highlight_batch_size: int = 10
+) -> None:
+    """
+    Compute contributors, then highlights with one worker per anomaly.
+    
+    Contributors for every anomaly are one statement (see
+    compute_contributors_for_company), run and committed on the caller's
+    connection before the highlight workers start since highlights read
+    them. The LLM calls then proceed in parallel on pooled connections.
+    The caller's connection may itself come from `pool`, so at most
+    `pool.max_size - 1` workers run; with a single-connection pool the
+    highlights are generated on `conn` one at a time.
+    """
+    compute_contributors_for_company(conn, company_id, autocommit=True)
+    if not generate_highlights:
+        return
+    pending = get_pending_work(conn, company_id, limit=highlight_batch_size)
+    
+    anomaly_ids = [a["id"] for a in pending["without_highlights"]]
+    if not anomaly_ids:
+        return
+    
+    max_workers = min(pool.max_size - 1, len(anomaly_ids))
+    if max_workers < 1:
+        for anomaly_id in anomaly_ids:
+            try:
+                generate_highlight_for_anomaly(conn, anomaly_id)
+            except Exception as e:
+                conn.rollback()
+                log.warning("[CFO View] ✗ Could not enrich anomaly %s: %s", anomaly_id, e)
+        return
+    
+    def enrich(anomaly_id: int) -> None:
+        with pool.connection() as worker_conn:
+            generate_highlight_for_anomaly(worker_conn, anomaly_id)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(enrich, anomaly_id): anomaly_id for anomaly_id in anomaly_ids}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                log.warning("[CFO View] ✗ Could not enrich anomaly %s: %s", futures[future], e)
+
+
+def run_compute_pipeline(
     conn: psycopg.Connection,
     company_id: UUID,
     month: date,
+    generate_highlights: bool = True,
+    pool: Optional[ConnectionPool] = None,
+    on_stage: Optional[Callable[[str], None]] = None
+) -> None:
+    """
+    Compute KPIs, anomalies, contributors and highlights for a company.
+    
+    Args:
+        conn: Database connection
+        company_id: Company GUID (primary key)
+        month: First month to (re)detect anomalies for
+        generate_highlights: If True, generate highlights for new anomalies
+        pool: Optional connection pool; when given, contributors and
+            highlights are computed concurrently across anomalies
+        on_stage: Optional callback receiving each stage name as it starts
+            ("kpis", "anomalies", "enrichment")
+    """
+    def stage(name: str) -> None:
+        if on_stage is not None:
+            on_stage(name)
+    
+    stage("kpis")
+    compute_monthly_kpis(conn, company_id)
+    stage("anomalies")
+    if pool is not None:
+        # Commit so the pooled workers' sessions see the new anomalies
+        detect_anomalies(conn, company_id, since_month=month, autocommit=True)
+        stage("enrichment")
+        _enrich_anomalies_concurrently(conn, pool, company_id, generate_highlights)
+    else:
+        detect_anomalies(conn, company_id, since_month=month)
+        stage("enrichment")
+        compute_contributors_for_company(conn, company_id, autocommit=True)
+        
+        if generate_highlights:
+            generate_highlights_for_new_anomalies(conn, company_id, batch_size=10)
+
+
+def build_cfo_month_view(
+    conn: ConnOrPool,
+    company_id: UUID,
+    month: date,
     ensure_computed: bool = True,
-    generate_highlights: bool = True
+    generate_highlights: bool = True,
+    pool: Optional[ConnectionPool] = None,
+    batch_mode: bool = False,
+    background: bool = False
 ) -> dict:
     """
     Build comprehensive CFO view for a company and month.
     
     This is the main entrypoint for UI and agents.
     
+    Missing LLM text (detection reasoning, highlights) is generated and
+    persisted first; the view data then comes back as one JSONB document
+    from the `cfo_month_view` SQL function, as in
+    build_cfo_month_view_readonly, and the executive report is added on top.
+    
     Args:
-        conn: Database connection
+        conn: Database connection or connection pool
         company_id: Company GUID (primary key)
         month: Target month (will be normalized to first of month)
         ensure_computed: If True, run compute pipeline first (if needed)
         generate_highlights: If True, generate missing highlights
+        pool: Optional connection pool; when given, contributors and
+            highlights are computed concurrently across anomalies
+        batch_mode: If True, the month's missing highlights and the
+            executive report go through the OpenAI Batch API (half price,
+            but this call blocks until the batches finish); for bulk jobs
+        background: If True and the month still needs computing, queue the
+            compute pipeline (see jobs.enqueue_compute) and return
+            {"status": "computing", "job_id": ...} immediately; poll
+            jobs.get_job and call again once it is done
     
     Returns:
         dict: Complete CFO view with metrics, anomalies, and evidence
     """
-    import sys
+    if isinstance(conn, ConnectionPool):
+        # Borrow one session for the view; the pool also drives enrichment
+        with conn.connection() as pooled_conn:
+            return build_cfo_month_view(
+                pooled_conn, company_id, month,
+                ensure_computed=ensure_computed,
+                generate_highlights=generate_highlights,
+                pool=pool or conn,
+                batch_mode=batch_mode,
+                background=background,
+            )
     
     # Normalize month to first of month
     month = month.replace(day=1)
     month_str = month.strftime("%Y-%m")
     
-    print(f"[CFO View] Building view for {month_str}...", file=sys.stderr)
+    log.info("[CFO View] Building view for %s...", month_str)
     
     # Check if data already exists
     existing = has_data_for_month(conn, company_id, month)
-    print(f"[CFO View] Existing data: {existing['kpis']} KPIs, {existing['anomalies']} anomalies, {existing['contributors']} contributors", file=sys.stderr)
+    log.info(
+        "[CFO View] Existing data: %d KPIs, %d anomalies, %d contributors",
+        existing["kpis"], existing["anomalies"], existing["contributors"]
+    )
     
     # Only recompute if ensure_computed=True AND data is missing
-    if ensure_computed and not existing["complete"]:
-        print("[CFO View] Data incomplete, running compute pipeline...", file=sys.stderr)
-        compute_monthly_kpis(conn, company_id)
-        detect_anomalies(conn, company_id)
-        compute_contributors_for_company(conn, company_id)
-        
-        if generate_highlights:
-            generate_highlights_for_new_anomalies(conn, company_id, batch_size=10)
+    if ensure_computed and not existing["complete"] and background:
+        job_id = enqueue_compute(company_id, month, generate_highlights=generate_highlights)
+        log.info("[CFO View] Data incomplete, compute queued as job %s.", job_id)
+        return {"status": "computing", "job_id": job_id, "company_id": str(company_id), "month": month_str}
+    elif ensure_computed and not existing["complete"]:
+        log.info("[CFO View] Data incomplete, running compute pipeline...")
+        # In batch mode the month's highlights are batched below instead
+        run_compute_pipeline(
+            conn, company_id, month,
+            generate_highlights=generate_highlights and not batch_mode,
+            pool=pool,
+        )
     elif ensure_computed:
-        print("[CFO View] Data already exists, skipping recompute.", file=sys.stderr)
+        log.info("[CFO View] Data already exists, skipping recompute.")
     else:
-        print("[CFO View] Skip-compute mode, using existing data.", file=sys.stderr)
-    
-    # Get company info
-    print(f"[CFO View] Fetching company info...", file=sys.stderr)
-    company = get_company_info(conn, company_id)
+        log.info("[CFO View] Skip-compute mode, using existing data.")
     
-    # Get metrics overview
-    print(f"[CFO View] Fetching metrics overview for {month_str}...", file=sys.stderr)
-    metrics_overview = get_metrics_overview(conn, company_id, month)
-    print(f"[CFO View] Found {len(metrics_overview)} metrics.", file=sys.stderr)
+    # Persist missing LLM text first, so the view document below includes it
+    if generate_highlights:
+        log.info("[CFO View] Generating missing explanations for %s...", month_str)
+        _generate_explanations(conn, get_anomalies_for_report(conn, company_id, month), batch_mode)
     
-    # Get anomaly details
-    print(f"[CFO View] Fetching anomaly details for {month_str}...", file=sys.stderr)
-    anomalies = get_anomaly_details(
-        conn, company_id, month,
-        generate_missing_highlights=generate_highlights
+    log.info("[CFO View] Fetching company info and month data for %s...", month_str)
+    view = _document_view(conn, company_id, month)
+    anomalies = view["anomalies"]
+    summary = view["summary"]
+    log.info(
+        "[CFO View] Found %d metrics and %d anomalies (%d positive, %d negative).",
+        summary["total_metrics"], summary["total_anomalies"],
+        summary["positive_anomalies"], summary["negative_anomalies"]
     )
-    print(f"[CFO View] Found {len(anomalies)} anomalies for this month.", file=sys.stderr)
-    
-    # Build summary
-    total_anomalies = len(anomalies)
-    positive_anomalies = sum(1 for a in anomalies if a["pct_change"] and a["pct_change"] > 0)
-    negative_anomalies = total_anomalies - positive_anomalies
-    
-    print(f"[CFO View] Summary: {total_anomalies} anomalies ({positive_anomalies} positive, {negative_anomalies} negative)", file=sys.stderr)
     
     # Generate consolidated executive report
-    executive_report = None
     if generate_highlights and anomalies:
-        print(f"[CFO View] Generating consolidated executive report (gpt-5-mini)...", file=sys.stderr)
+        log.info("[CFO View] Generating consolidated executive report (gpt-5-mini)...")
         try:
-            executive_report = generate_executive_report(
-                company_name=company["name"],
-                month_label=month_label_tr(month),
-                anomalies=anomalies
+            view["executive_report"] = generate_executive_report(
+                company_name=view["company"]["name"],
+                month_label=view["month_label_tr"],
+                anomalies=anomalies,
+                batch_func=run_response_batch if batch_mode else None
             )
-            print(f"[CFO View] ✓ Executive report generated", file=sys.stderr)
+            log.info("[CFO View] ✓ Executive report generated")
         except Exception as e:
-            print(f"[CFO View] ✗ Could not generate executive report: {e}", file=sys.stderr)
+            log.warning("[CFO View] ✗ Could not generate executive report: %s", e)
     
-    print(f"[CFO View] Done! Outputting JSON...", file=sys.stderr)
+    log.info("[CFO View] Done! Outputting JSON...")
+    
+    return view
+
+
+@accepts_pool
+def build_cfo_month_view_readonly(
+    conn: ConnOrPool,
+    company_id: UUID,
+    month: date
+) -> dict:
+    """
+    Build the CFO view from existing data only (read-only dashboard path).
+    
+    Equivalent to build_cfo_month_view with ensure_computed=False and
+    generate_highlights=False. The metrics overview and anomalies (with
+    contributors and highlights) come back as one JSONB document from the
+    `cfo_month_view` SQL function; only evidence, whose filters come from
+    the Python metric definitions, is a second query. Nothing is written,
+    so a read-replica pool works too.
+    
+    Views are cached in-process for CFO_VIEW_CACHE_TTL seconds under the
+    company's data version, so a hit costs one primary-key lookup and any
+    write to the company's data is a miss.
+    
+    Args:
+        conn: Database connection or connection pool (primary or read replica)
+        company_id: Company GUID (primary key)
+        month: Target month (will be normalized to first of month)
+    
+    Returns:
+        dict: CFO view with metrics and anomalies (no executive report)
+    """
+    month = month.replace(day=1)
+    
+    with conn.cursor() as cur:
+        cur.execute(_MONTH_DATA_VERSION, (company_id,), prepare=True)
+        key = (str(company_id), month, cur.fetchone()[0])
+    
+    cached = _cached_view(key)
+    if cached is not None:
+        return cached
+    
+    return _store_view(key, _document_view(conn, company_id, month))
+
+
+async def build_cfo_month_view_async(
+    pool: Optional[AsyncConnectionPool],
+    company_id: UUID,
+    month: date
+) -> dict:
+    """
+    Async variant of build_cfo_month_view_readonly for async servers.
+    
+    The company lookup and the `cfo_month_view` document are fetched
+    concurrently on separate pool connections, then evidence for the
+    month's anomalies; the event loop is free during every round trip.
+    Shares the read-only view cache with the sync variant.
+    
+    Args:
+        pool: Async connection pool (primary or read replica); None uses
+            the shared pool from db.get_async_pool
+        company_id: Company GUID (primary key)
+        month: Target month (will be normalized to first of month)
+    
+    Returns:
+        dict: CFO view with metrics and anomalies (no executive report)
+    """
+    month = month.replace(day=1)
+    if pool is None:
+        pool = await get_async_pool()
+    
+    async with pool.connection() as aconn:
+        async with aconn.cursor() as cur:
+            await cur.execute(_MONTH_DATA_VERSION, (company_id,), prepare=True)
+            key = (str(company_id), month, (await cur.fetchone())[0])
+    
+    cached = _cached_view(key)
+    if cached is not None:
+        return cached
+    
+    async def fetch_company() -> dict:
+        async with pool.connection() as aconn:
+            return await get_company_info_async(aconn, company_id)
+    
+    async def fetch_data() -> dict:
+        async with pool.connection() as aconn:
+            async with aconn.cursor() as cur:
+                await cur.execute(_CFO_MONTH_VIEW, (company_id, month), prepare=True)
+                return (await cur.fetchone())[0]
+    
+    company, data = await asyncio.gather(fetch_company(), fetch_data())
+    
+    async with pool.connection() as aconn:
+        evidence_by_metric = await get_evidence_transactions_for_metrics_async(
+            aconn, company_id, month, [a["metric_name"] for a in data["anomalies"]], limit=10
+        )
+    
+    return _store_view(key, _view_from_document(company, month, data, evidence_by_metric))
+
+
+def _document_view(conn: psycopg.Connection, company_id: UUID, month: date) -> dict:
+    """Build a month view (no executive report) from the cfo_month_view document."""
+    company = get_company_info(conn, company_id)
+    with conn.cursor() as cur:
+        cur.execute(_CFO_MONTH_VIEW, (company_id, month), prepare=True)
+        data = cur.fetchone()[0]
+    
+    evidence_by_metric = get_evidence_transactions_for_metrics(
+        conn, company_id, month, [a["metric_name"] for a in data["anomalies"]], limit=10
+    )
     
+    return _view_from_document(company, month, data, evidence_by_metric)
+
+
+def _cached_view(key: tuple) -> Optional[dict]:
+    """Return a copy of a fresh cached read-only view, or None."""
+    with _cache_lock:
+        cached = _cfo_view_cache.get(key)
+        if not cached or time.monotonic() - cached[0] >= CFO_VIEW_CACHE_TTL:
+            return None
+        _cfo_view_cache.move_to_end(key)
+    # Cached views are never mutated, so copying outside the lock is safe
+    return copy.deepcopy(cached[1])
+
+
+def _store_view(key: tuple, view: dict) -> dict:
+    """Cache a read-only view (evicting the least recently used) and return a copy."""
+    with _cache_lock:
+        _cfo_view_cache[key] = (time.monotonic(), view)
+        _cfo_view_cache.move_to_end(key)
+        if len(_cfo_view_cache) > CFO_VIEW_CACHE_SIZE:
+            _cfo_view_cache.popitem(last=False)
+    return copy.deepcopy(view)
+
+
+def _view_from_document(
+    company: dict,
+    month: date,
+    data: dict,
+    evidence_by_metric: dict[str, list[dict]]
+) -> dict:
+    """Assemble a month view from the cfo_month_view document and evidence."""
+    metrics_overview = [build_metric_record(row) for row in data["metrics_overview"]]
+    anomalies = [
+        build_anomaly_record(
+            anomaly,
+            anomaly["contributors"],
+            {"tr": "", "en": "", **anomaly["highlights"]},
+            evidence_by_metric.get(anomaly["metric_name"], []),
+        )
+        for anomaly in data["anomalies"]
+    ]
+    return _month_view(
+        company, month, metrics_overview, anomalies,
+        data["summary"], executive_report=None
+    )
+
+
+def _month_view(
+    company: dict,
+    month: date,
+    metrics_overview: list[dict],
+    anomalies: list[dict],
+    summary: dict,
+    executive_report: Optional[dict]
+) -> dict:
+    """Assemble the CFO month view payload."""
     return {
         "company": {
             # Expose the Finsmart GUID as the single canonical identifier
@@ -642,9 +1117,7 @@ def build_cfo_month_view(
         "month_label_tr": month_label_tr(month),
         "summary": {
             "total_metrics": len(metrics_overview),
-            "total_anomalies": total_anomalies,
-            "positive_anomalies": positive_anomalies,
-            "negative_anomalies": negative_anomalies,
+            **summary,
         },
         "metrics_overview": metrics_overview,
         "anomalies": anomalies,
@@ -653,6 +1126,35 @@ def build_cfo_month_view(
     }
 
 
+# Section headings and fallbacks for format_report_markdown, per language
+_REPORT_LABELS = {
+    "tr": {
+        "overview": "## Genel Değerlendirme",
+        "anomalies": "## Tespit Edilen Anomaliler",
+        "change": "**Değişim:**",
+        "why_anomaly": "**Neden Anomali?**",
+        "why_anomaly_missing": "Bilgi mevcut değil",
+        "root_cause": "**Kök Neden Analizi:**",
+        "root_cause_missing": "Analiz bekleniyor",
+        "actions": "## Aksiyon Önerileri",
+        "narrative": "## Yönetici Özeti (Anlatı Formatı)",
+        "footer": "*Bu rapor otomatik olarak oluşturulmuştur.*",
+    },
+    "en": {
+        "overview": "## Executive Overview",
+        "anomalies": "## Detected Anomalies",
+        "change": "**Change:**",
+        "why_anomaly": "**Why Anomaly?**",
+        "why_anomaly_missing": "Information not available",
+        "root_cause": "**Root Cause Analysis:**",
+        "root_cause_missing": "Analysis pending",
+        "actions": "## Recommended Actions",
+        "narrative": "## Executive Narrative Summary",
+        "footer": "*This report was generated automatically.*",
+    },
+}
+
+
 def format_report_markdown(report: dict, language: str = "tr") -> str:
     """
     Format executive report as professional Markdown.
@@ -669,104 +1171,55 @@ def format_report_markdown(report: dict, language: str = "tr") -> str:
     if not lang_report:
         return f"# Report not available for language: {language}"
     
-    lines = []
-    
-    # Title
-    title = lang_report.get("title", "Financial Report")
-    lines.append(f"# {title}")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
+    labels = _REPORT_LABELS["tr" if language == "tr" else "en"]
     
-    # Overview section
-    if language == "tr":
-        lines.append("## Genel Değerlendirme")
-    else:
-        lines.append("## Executive Overview")
-    lines.append("")
-    lines.append(lang_report.get("overview", ""))
-    lines.append("")
+    # Title and overview
+    sections = [
+        f"# {lang_report.get('title', 'Financial Report')}\n\n---\n\n"
+        f"{labels['overview']}\n\n{lang_report.get('overview', '')}\n"
+    ]
     
     # Anomalies section
     anomalies = lang_report.get("anomalies", [])
     if anomalies:
-        if language == "tr":
-            lines.append("## Tespit Edilen Anomaliler")
-        else:
-            lines.append("## Detected Anomalies")
-        lines.append("")
-        
-        for i, a in enumerate(anomalies, 1):
-            metric = a.get("metric", "Unknown")
-            change = a.get("change", "N/A")
-            
-            lines.append(f"### {i}. {metric}")
-            lines.append("")
-            
-            if language == "tr":
-                lines.append(f"**Değişim:** {change}")
-                lines.append("")
-                lines.append(f"**Neden Anomali?**")
-                lines.append(f"> {a.get('why_anomaly', 'Bilgi mevcut değil')}")
-                lines.append("")
-                lines.append(f"**Kök Neden Analizi:**")
-                lines.append(f"> {a.get('root_cause', 'Analiz bekleniyor')}")
-            else:
-                lines.append(f"**Change:** {change}")
-                lines.append("")
-                lines.append(f"**Why Anomaly?**")
-                lines.append(f"> {a.get('why_anomaly', 'Information not available')}")
-                lines.append("")
-                lines.append(f"**Root Cause Analysis:**")
-                lines.append(f"> {a.get('root_cause', 'Analysis pending')}")
-            
-            lines.append("")
+        sections.append(f"{labels['anomalies']}\n")
+        sections.extend(_anomaly_block(i, a, labels) for i, a in enumerate(anomalies, 1))
     
     # Action recommendations
     actions = lang_report.get("action_recommendations", [])
     if actions:
-        lines.append("---")
-        lines.append("")
-        if language == "tr":
-            lines.append("## Aksiyon Önerileri")
-        else:
-            lines.append("## Recommended Actions")
-        lines.append("")
-        
-        for action in actions:
-            lines.append(f"- {action}")
-        lines.append("")
-
+        action_lines = "\n".join(f"- {action}" for action in actions)
+        sections.append(f"---\n\n{labels['actions']}\n\n{action_lines}\n")
+    
     # Narrative section (continuous executive narrative)
-    narrative_key = "narrative_tr" if language == "tr" else "narrative_en"
-    narrative_text = report.get(narrative_key, "")
+    narrative_text = report.get("narrative_tr" if language == "tr" else "narrative_en", "")
     if narrative_text:
-        lines.append("---")
-        lines.append("")
-        if language == "tr":
-            lines.append("## Yönetici Özeti (Anlatı Formatı)")
-        else:
-            lines.append("## Executive Narrative Summary")
-        lines.append("")
-        lines.append(narrative_text)
-        lines.append("")
+        sections.append(f"---\n\n{labels['narrative']}\n\n{narrative_text}\n")
     
     # Footer
-    lines.append("---")
-    lines.append("")
-    if language == "tr":
-        lines.append("*Bu rapor otomatik olarak oluşturulmuştur.*")
-    else:
-        lines.append("*This report was generated automatically.*")
+    sections.append(f"---\n\n{labels['footer']}")
     
-    return "\n".join(lines)
+    return "\n".join(sections)
+
+
+def _anomaly_block(index: int, anomaly: dict, labels: dict) -> str:
+    """Render one anomaly of the executive report as Markdown."""
+    return (
+        f"### {index}. {anomaly.get('metric', 'Unknown')}\n\n"
+        f"{labels['change']} {anomaly.get('change', 'N/A')}\n\n"
+        f"{labels['why_anomaly']}\n"
+        f"> {anomaly.get('why_anomaly', labels['why_anomaly_missing'])}\n\n"
+        f"{labels['root_cause']}\n"
+        f"> {anomaly.get('root_cause', labels['root_cause_missing'])}\n"
+    )
 
 
 def save_reports_to_files(
     report: dict,
     company_name: str,
     month_str: str,
-    output_dir: str = "."
+    output_dir: str = ".",
+    markdown: Optional[dict] = None
 ) -> dict:
     """
     Save executive reports as Markdown files.
@@ -776,75 +1229,187 @@ def save_reports_to_files(
         company_name: Company name for filename
         month_str: Month string (YYYY-MM)
         output_dir: Directory to save files
+        markdown: Optional {"tr": ..., "en": ...} already rendered with
+            format_report_markdown (rendered here when missing)
     
     Returns:
         dict with file paths
     """
-    import os
-    import re
+    contents = _report_file_contents(report, company_name, month_str, output_dir, markdown)
+    for filepath, content in contents.values():
+        Path(filepath).write_text(content, encoding="utf-8")
+    return {lang: filepath for lang, (filepath, _) in contents.items()}
+
+
+async def save_reports_to_files_async(
+    report: dict,
+    company_name: str,
+    month_str: str,
+    output_dir: str = ".",
+    markdown: Optional[dict] = None
+) -> dict:
+    """
+    Async variant of save_reports_to_files (the writes run in a worker thread).
+    
+    Args:
+        report: Executive report dict
+        company_name: Company name for filename
+        month_str: Month string (YYYY-MM)
+        output_dir: Directory to save files
+        markdown: Optional {"tr": ..., "en": ...} already rendered with
+            format_report_markdown (rendered here when missing)
     
+    Returns:
+        dict with file paths
+    """
+    return await asyncio.to_thread(
+        save_reports_to_files, report, company_name, month_str, output_dir, markdown
+    )
+
+
+def _report_file_contents(
+    report: dict,
+    company_name: str,
+    month_str: str,
+    output_dir: str,
+    markdown: Optional[dict]
+) -> dict[str, tuple[str, str]]:
+    """Map each language to its report file path and Markdown content."""
     # Sanitize company name for filename
     safe_name = re.sub(r'[^\w\-]', '_', company_name.lower())
     
-    files = {}
-    
+    contents = {}
     for lang in ["tr", "en"]:
-        md_content = format_report_markdown(report, lang)
+        if markdown and lang in markdown:
+            md_content = markdown[lang]
+        else:
+            md_content = format_report_markdown(report, lang)
         filename = f"report_{safe_name}_{month_str}_{lang}.md"
-        filepath = os.path.join(output_dir, filename)
-        
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(md_content)
-        
-        files[lang] = filepath
-    
-    return files
+        contents[lang] = (os.path.join(output_dir, filename), md_content)
+    return contents
 
 
+@accepts_pool
 def get_available_months(
-    conn: psycopg.Connection,
+    conn: ConnOrPool,
     company_id: UUID
 ) -> list[str]:
     """
     Get list of months with data for a company.
     
     Args:
-        conn: Database connection
+        conn: Database connection or connection pool
         company_id: Company GUID
     
     Returns:
         List of month strings (YYYY-MM-DD format)
     """
-    with conn.cursor() as cur:
+    # Formatted and aggregated server-side: one row holding a text array
+    with conn.cursor(binary=True) as cur:
         cur.execute(
             """
-            SELECT DISTINCT month
-            FROM monthly_kpis
-            WHERE company_id = %s
-            ORDER BY month DESC
+            SELECT array_agg(month ORDER BY month DESC)
+            FROM (
+                SELECT DISTINCT to_char(month, 'YYYY-MM-DD') AS month
+                FROM monthly_kpis
+                WHERE company_id = %s
+            ) months
             """,
-            (str(company_id),)
+            (company_id,),
+            prepare=True
         )
-        return [str(row[0]) for row in cur.fetchall()]
+        return cur.fetchone()[0] or []
 
 
+@accepts_pool
 def get_company_by_guid(
-    conn: psycopg.Connection,
+    conn: ConnOrPool,
     finsmart_guid: str
 ) -> Optional[dict]:
     """
     Get company by Finsmart GUID.
     
+    Rows are cached in-process for COMPANY_CACHE_TTL seconds, so back-to-back
+    view builds for the same company skip the lookup.
+    
     Args:
-        conn: Database connection
+        conn: Database connection or connection pool
         finsmart_guid: Finsmart company GUID
     
     Returns:
         Company dict or None if not found
     """
+    cached = _cached_company(finsmart_guid)
+    if cached is not None:
+        return cached
+    
     with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            "SELECT * FROM companies WHERE finsmart_guid = %s",
-            (finsmart_guid,)
-        )
-        return cur.fetchone()
+        cur.execute(_COMPANY_BY_GUID, (finsmart_guid,), prepare=True)
+        return _cache_company(finsmart_guid, cur.fetchone())
+
+
+async def get_company_by_guid_async(
+    aconn: AsyncConnection,
+    finsmart_guid: str
+) -> Optional[dict]:
+    """
+    Async variant of get_company_by_guid (shares its cache).
+    
+    Args:
+        aconn: Async database connection
+        finsmart_guid: Finsmart company GUID
+    
+    Returns:
+        Company dict or None if not found
+    """
+    cached = _cached_company(finsmart_guid)
+    if cached is not None:
+        return cached
+    
+    async with aconn.cursor(row_factory=dict_row) as cur:
+        await cur.execute(_COMPANY_BY_GUID, (finsmart_guid,), prepare=True)
+        return _cache_company(finsmart_guid, await cur.fetchone())
+
+
+def _cached_company(finsmart_guid: str) -> Optional[dict]:
+    """Return a copy of a fresh cached company row, or None."""
+    key = str(finsmart_guid)
+    with _cache_lock:
+        cached = _company_cache.get(key)
+        if not cached or time.monotonic() - cached[0] >= COMPANY_CACHE_TTL:
+            return None
+        _company_cache.move_to_end(key)
+        return dict(cached[1])
+
+
+def _cache_company(finsmart_guid: str, company: Optional[dict]) -> Optional[dict]:
+    """Cache a fetched company row (misses are not cached) and return a copy."""
+    if company is None:
+        return None
+    key = str(finsmart_guid)
+    with _cache_lock:
+        _company_cache[key] = (time.monotonic(), company)
+        _company_cache.move_to_end(key)
+        if len(_company_cache) > COMPANY_CACHE_SIZE:
+            _company_cache.popitem(last=False)
+    return dict(company)
+
+
+def clear_company_cache(finsmart_guid: Optional[str] = None) -> None:
+    """
+    Drop cached company rows (all, or just one company).
+    
+    Args:
+        finsmart_guid: Company to invalidate (None = everything)
+    """
+    with _cache_lock:
+        if finsmart_guid is None:
+            _company_cache.clear()
+        else:
+            _company_cache.pop(str(finsmart_guid), None)
+
+
+def clear_cfo_view_cache() -> None:
+    """Drop all cached read-only month views."""
+    with _cache_lock:
+        _cfo_view_cache.clear()
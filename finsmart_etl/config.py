@@ -2,6 +2,7 @@
 Configuration management via environment variables.
 """
 
+import functools
 import os
 from dataclasses import dataclass
 from typing import Optional
@@ -18,10 +19,12 @@ class Config:
     db_user: str
     db_password: str
     db_pool_size: int
+    db_pool_max_overflow: int
     
     # OpenAI
     openai_api_key: str
     openai_reasoning_model: str
+    openai_max_retries: int
     
     # Finsmart API
     finsmart_base_url: str
@@ -53,7 +56,9 @@ def load_config() -> Config:
         - DB_USER (ozgurguler)
         - DB_PASSWORD (empty)
         - DB_POOL_SIZE (5)
+        - DB_POOL_MAX_OVERFLOW (10)
         - OPENAI_REASONING_MODEL (gpt-4o-mini)
+        - OPENAI_MAX_RETRIES (4)
         - FINSMART_BASE_URL
         - COMPANY_GUID
     """
@@ -65,10 +70,12 @@ def load_config() -> Config:
         db_user=os.getenv("DB_USER", "ozgurguler"),
         db_password=os.getenv("DB_PASSWORD", ""),
         db_pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        db_pool_max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
         
         # OpenAI
         openai_api_key=os.getenv("OPENAI_API_KEY", ""),
         openai_reasoning_model=os.getenv("OPENAI_REASONING_MODEL", "gpt-4o-mini"),
+        openai_max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "4")),
         
         # Finsmart
         finsmart_base_url=os.getenv("FINSMART_BASE_URL", "https://dev-datauploadapi.finsmart.ai"),
@@ -78,13 +85,11 @@ def load_config() -> Config:
     )
 
 
-# Singleton config instance
-_config: Optional[Config] = None
-
-
+@functools.cache
 def get_config() -> Config:
-    """Get or create the singleton config instance."""
-    global _config
-    if _config is None:
-        _config = load_config()
-    return _config
+    """
+    Get the singleton config instance (loaded on first call).
+    
+    Call get_config.cache_clear() to reload from the environment.
+    """
+    return load_config()
@@ -4,50 +4,62 @@ Root-Cause Contributors: Compute top contributors for each anomaly.
 Identifies which vendors/customers/line items drove the anomalous change.
 """
 
+import functools
+import logging
+from collections import defaultdict
+from datetime import date
 from typing import Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
 
 from .metrics import get_metric_definition, METRIC_DEFINITIONS
 
+log = logging.getLogger(__name__)
 
+# Fallback filters for common metrics without a METRIC_DEFINITIONS entry
+FALLBACK_METRIC_FILTERS = {
+    "net_sales": "account_code LIKE '1.1%%'",
+    "advisory_expense": "(account_name = 'Advisory' OR coa_name ILIKE '%%DANISMAN%%')",
+    "software_expense": "account_name = 'Software'",
+    "payroll": "account_name = 'Payroll'",
+    "marketing": "account_name = 'Marketing'",
+    "hospitality": "account_name = 'Hospitality'",
+    "office_rent": "account_name = 'Office Rent'",
+    "car_expenses": "account_name = 'Car Expenses'",
+    "food_expenses": "account_name = 'Food Expenses'",
+}
+
+
+@functools.lru_cache(maxsize=256)
 def metric_filter_condition(metric_name: str) -> str:
     """
     Return a SQL WHERE condition snippet for a metric.
     
+    The snippet is constant per metric (values are inlined as quoted
+    literals, with `%` doubled for psycopg's placeholder syntax), so it can
+    be spliced into a parameterized query and the query text stays stable
+    for prepared-statement reuse.
+    
     Args:
         metric_name: Name of the metric
     
     Returns:
-        str: SQL condition (without 'WHERE')
-    
-    Raises:
-        ValueError: If metric not found
+        str: SQL condition (without 'WHERE'); metrics without a definition
+        or fallback filter match on account_name
     """
     metric = get_metric_definition(metric_name)
     if metric:
         return metric.sql_filter
     
-    # Fallback mappings for common metrics
-    fallbacks = {
-        "net_sales": "account_code LIKE '1.1%'",
-        "advisory_expense": "(account_name = 'Advisory' OR coa_name ILIKE '%DANISMAN%')",
-        "software_expense": "account_name = 'Software'",
-        "payroll": "account_name = 'Payroll'",
-        "marketing": "account_name = 'Marketing'",
-        "hospitality": "account_name = 'Hospitality'",
-        "office_rent": "account_name = 'Office Rent'",
-        "car_expenses": "account_name = 'Car Expenses'",
-        "food_expenses": "account_name = 'Food Expenses'",
-    }
-    
-    if metric_name in fallbacks:
-        return fallbacks[metric_name]
-    
-    # Generic fallback - match account_name
-    return f"account_name = '{metric_name}'"
+    if metric_name in FALLBACK_METRIC_FILTERS:
+        return FALLBACK_METRIC_FILTERS[metric_name]
+    
+    # Generic fallback - match account_name (quoted, never spliced raw)
+    literal = sql.Literal(metric_name).as_string(None).replace("%", "%%")
+    return f"account_name = {literal}"
 
 
 def compute_contributors_for_anomaly(
@@ -89,85 +101,86 @@ def compute_contributors_for_anomaly(
     month = anomaly["month"]
     metric_name = anomaly["metric_name"]
     
-    # Get filter condition for this metric
-    try:
-        filter_cond = metric_filter_condition(metric_name)
-    except ValueError:
-        print(f"Unknown metric {metric_name}, skipping contributors")
-        return 0
+    filter_cond = metric_filter_condition(metric_name)
     
-    # Query transactions grouped by label
+    # Group transactions by label, compute each label's share of the total
+    # and the running share (largest first) with window functions, keep
+    # labels until the coverage threshold is reached (up to top_n), and
+    # replace the anomaly's stored contributors with them, all in one
+    # statement. The DELETE runs as a data-modifying CTE.
     query = f"""
-        SELECT 
-            COALESCE(NULLIF(customer_name, ''), NULLIF(description, ''), 'Unknown') AS label,
-            SUM(amount) AS total_amount,
-            COUNT(*) AS tx_count
-        FROM transactions
-        WHERE company_id = %s 
-          AND month = %s
-          AND {filter_cond}
-        GROUP BY label
-        ORDER BY ABS(SUM(amount)) DESC
-        LIMIT %s
+        WITH deleted AS (
+            DELETE FROM anomaly_contributors WHERE anomaly_id = %(anomaly_id)s
+        ),
+        grouped AS (
+            SELECT
+                COALESCE(NULLIF(customer_name, ''), NULLIF(description, ''), 'Unknown') AS label,
+                SUM(amount) AS total_amount
+            FROM transactions
+            WHERE company_id = %(company_id)s
+              AND month = %(month)s
+              AND {filter_cond}
+            GROUP BY label
+        ),
+        shares AS (
+            SELECT
+                label,
+                total_amount,
+                ABS(total_amount) / NULLIF(SUM(ABS(total_amount)) OVER (), 0) AS share,
+                SUM(ABS(total_amount)) OVER (
+                    ORDER BY ABS(total_amount) DESC, label
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) / NULLIF(SUM(ABS(total_amount)) OVER (), 0) AS cumulative_share
+            FROM grouped
+        )
+        INSERT INTO anomaly_contributors (anomaly_id, label, amount, share_of_total)
+        SELECT %(anomaly_id)s, label, total_amount, share
+        FROM shares
+        WHERE cumulative_share - share < %(coverage_threshold)s
+        ORDER BY ABS(total_amount) DESC, label
+        LIMIT %(top_n)s
     """
     
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(query, (str(company_id), month, top_n * 2))  # Get extra to check coverage
-        contributors = cur.fetchall()
-    
-    if not contributors:
-        return 0
-    
-    # Calculate total and filter to top contributors
-    total = sum(abs(c["total_amount"]) for c in contributors)
-    if total == 0:
-        return 0
-    
-    # Select contributors until we hit coverage threshold or top_n
-    selected = []
-    cumulative = 0
-    for c in contributors:
-        if len(selected) >= top_n:
-            break
-        share = abs(c["total_amount"]) / total
-        selected.append({
-            "label": c["label"],
-            "amount": c["total_amount"],
-            "share_of_total": share,
-        })
-        cumulative += share
-        if cumulative >= coverage_threshold:
-            break
-    
-    # Delete existing contributors for this anomaly
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM anomaly_contributors WHERE anomaly_id = %s", (anomaly_id,))
-    
-    # Insert new contributors
     with conn.cursor() as cur:
-        for contrib in selected:
-            cur.execute(
-                """
-                INSERT INTO anomaly_contributors (anomaly_id, label, amount, share_of_total)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (anomaly_id, contrib["label"], contrib["amount"], contrib["share_of_total"])
-            )
+        cur.execute(
+            query,
+            {
+                "anomaly_id": anomaly_id,
+                "company_id": company_id,
+                "month": month,
+                "coverage_threshold": coverage_threshold,
+                "top_n": top_n,
+            },
+            prepare=True
+        )
+        count = cur.rowcount
         conn.commit()
     
-    return len(selected)
+    return count
 
 
 def compute_contributors_for_company(
     conn: psycopg.Connection,
-    company_id: UUID
+    company_id: UUID,
+    top_n: int = 10,
+    coverage_threshold: float = 0.8,
+    autocommit: bool = False
 ) -> int:
     """
     Compute contributors for all anomalies of a company that don't have them yet.
     
+    All anomalies are computed and stored in one statement (see
+    compute_contributors_for_anomaly for the selection rule). The insert
+    runs in a savepoint: if it fails, only it is rolled back and the error
+    propagates, leaving the caller's transaction usable.
+    
     Args:
         conn: Database connection
         company_id: Company GUID
+        top_n: Maximum number of contributors to keep per anomaly
+        coverage_threshold: Target coverage (0-1)
+        autocommit: Commit before returning (otherwise the caller owns the
+            transaction, e.g. `with conn.transaction():`)
     
     Returns:
         int: Total number of contributors computed
@@ -176,25 +189,75 @@ def compute_contributors_for_company(
     with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT a.id
+            SELECT a.id, a.metric_name
             FROM anomalies a
             LEFT JOIN anomaly_contributors ac ON ac.anomaly_id = a.id
             WHERE a.company_id = %s AND ac.id IS NULL
-            ORDER BY a.month DESC
             """,
-            (str(company_id),)
+            (company_id,)
+        )
+        targets = cur.fetchall()
+    
+    matchers, params = _metric_matchers([metric_name for _, metric_name in targets])
+    if not matchers:
+        return 0
+    
+    # One statement for every target anomaly: each transaction of the
+    # company's target months is tagged with the metrics it feeds (the
+    # lateral matcher), grouped per anomaly and label, and selected with
+    # the same share/coverage rule as compute_contributors_for_anomaly
+    query = f"""
+        WITH targets AS (
+            SELECT id, month, metric_name FROM anomalies WHERE id = ANY(%s)
+        ),
+        grouped AS (
+            SELECT
+                tg.id AS anomaly_id,
+                COALESCE(NULLIF(t.customer_name, ''), NULLIF(t.description, ''), 'Unknown') AS label,
+                SUM(t.amount) AS total_amount
+            FROM transactions t
+            CROSS JOIN LATERAL (
+                {matchers}
+            ) AS m(metric_name)
+            JOIN targets tg ON tg.month = t.month AND tg.metric_name = m.metric_name
+            WHERE t.company_id = %s
+              AND t.month IN (SELECT month FROM targets)
+            GROUP BY tg.id, label
+        ),
+        shares AS (
+            SELECT
+                anomaly_id,
+                label,
+                total_amount,
+                ABS(total_amount) / NULLIF(SUM(ABS(total_amount)) OVER per_anomaly, 0) AS share,
+                SUM(ABS(total_amount)) OVER (
+                    per_anomaly ORDER BY ABS(total_amount) DESC, label
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) / NULLIF(SUM(ABS(total_amount)) OVER per_anomaly, 0) AS cumulative_share,
+                ROW_NUMBER() OVER (
+                    per_anomaly ORDER BY ABS(total_amount) DESC, label
+                ) AS rn
+            FROM grouped
+            WINDOW per_anomaly AS (PARTITION BY anomaly_id)
         )
-        anomaly_ids = [row[0] for row in cur.fetchall()]
+        INSERT INTO anomaly_contributors (anomaly_id, label, amount, share_of_total)
+        SELECT anomaly_id, label, total_amount, share
+        FROM shares
+        WHERE cumulative_share - share < %s
+          AND rn <= %s
+        ORDER BY anomaly_id, rn
+    """
     
-    total = 0
-    for anomaly_id in anomaly_ids:
-        try:
-            count = compute_contributors_for_anomaly(conn, anomaly_id)
-            total += count
-        except Exception as e:
-            print(f"Error computing contributors for anomaly {anomaly_id}: {e}")
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute(
+            query,
+            [[anomaly_id for anomaly_id, _ in targets], *params, company_id, coverage_threshold, top_n]
+        )
+        total = cur.rowcount
+    if autocommit:
+        conn.commit()
     
-    print(f"Computed contributors for {len(anomaly_ids)} anomalies ({total} total)")
+    log.info("Computed contributors for %d anomalies (%d total)", len(targets), total)
     return total
 
 
@@ -220,49 +283,287 @@ def get_contributors_for_anomaly(
             WHERE anomaly_id = %s
             ORDER BY ABS(amount) DESC
             """,
-            (anomaly_id,)
+            (anomaly_id,),
+            prepare=True
         )
         return cur.fetchall()
 
 
+def get_contributors_for_anomalies(
+    conn: psycopg.Connection,
+    anomaly_ids: list[int]
+) -> dict[int, list[dict]]:
+    """
+    Get contributors for many anomalies in one query.
+    
+    Args:
+        conn: Database connection
+        anomaly_ids: IDs of the anomalies
+    
+    Returns:
+        Dict mapping anomaly_id -> contributor dictionaries (largest first);
+        anomalies without contributors are absent
+    """
+    grouped = defaultdict(list)
+    if not anomaly_ids:
+        return grouped
+    
+    with conn.cursor(binary=True, row_factory=dict_row) as cur:
+        cur.execute(
+            """
+            SELECT anomaly_id, label, amount, share_of_total
+            FROM anomaly_contributors
+            WHERE anomaly_id = ANY(%s)
+            ORDER BY anomaly_id, ABS(amount) DESC
+            """,
+            (list(anomaly_ids),),
+            prepare=True
+        )
+        for row in cur:
+            grouped[row.pop("anomaly_id")].append(row)
+    return grouped
+
+
+@functools.lru_cache(maxsize=256)
+def _evidence_query(metric_name: str) -> str:
+    """Build the evidence query for one metric (one constant text per metric)."""
+    return f"""
+        SELECT 
+            tx_date, account_code, account_name,
+            coa_code, coa_name, description,
+            customer_name, amount
+        FROM transactions
+        WHERE company_id = %s 
+          AND month = %s
+          AND {metric_filter_condition(metric_name)}
+        ORDER BY ABS(amount) DESC
+        LIMIT %s
+    """
+
+
 def get_evidence_transactions(
     conn: psycopg.Connection,
     company_id: UUID,
-    month: str,
+    month: date,
     metric_name: str,
     limit: int = 10
 ) -> list[dict]:
     """
     Get sample transactions as evidence for an anomaly.
     
+    The query text is built once per metric, so psycopg's prepared
+    statement for it is reused by every later call on the connection.
+    
     Args:
         conn: Database connection
         company_id: Company GUID
-        month: Month (YYYY-MM-DD format)
+        month: Month (first day)
         metric_name: Name of the metric
         limit: Maximum number of transactions to return
     
     Returns:
         List of transaction dictionaries
     """
-    try:
-        filter_cond = metric_filter_condition(metric_name)
-    except ValueError:
-        return []
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(_evidence_query(metric_name), (company_id, month, limit), prepare=True)
+        return cur.fetchall()
+
+
+def _metric_matchers(metric_names: list[str]) -> tuple[Optional[str], list]:
+    """
+    Build a lateral subquery tagging a transaction with the metrics it feeds.
+    
+    Evaluated per transaction row (columns unqualified), it yields one
+    metric_name row for each metric whose filter matches.
+    
+    Returns the subquery (None if no metric names are given) and its
+    metric-name parameters.
+    """
+    matchers = []
+    params = []
+    for metric_name in dict.fromkeys(metric_names):
+        matchers.append(f"SELECT %s::text WHERE {metric_filter_condition(metric_name)}")
+        params.append(metric_name)
+    
+    if not matchers:
+        return None, params
+    return " UNION ALL ".join(matchers), params
+
+
+def _evidence_for_metrics_query(metric_names: list[str]) -> tuple[Optional[str], list]:
+    """
+    Build the single-scan evidence query for several metrics.
+    
+    Returns the query (None if no metric names are given) and the
+    metric-name parameters; callers append (company_id, month, limit).
+    """
+    matchers, params = _metric_matchers(metric_names)
+    if not matchers:
+        return None, params
     
     query = f"""
-        SELECT 
+        SELECT
+            metric_name,
             tx_date, account_code, account_name,
             coa_code, coa_name, description,
             customer_name, amount
-        FROM transactions
-        WHERE company_id = %s 
-          AND month = %s
-          AND {filter_cond}
-        ORDER BY ABS(amount) DESC
-        LIMIT %s
+        FROM (
+            SELECT
+                m.metric_name,
+                t.tx_date, t.account_code, t.account_name,
+                t.coa_code, t.coa_name, t.description,
+                t.customer_name, t.amount,
+                ROW_NUMBER() OVER (
+                    PARTITION BY m.metric_name ORDER BY ABS(t.amount) DESC
+                ) AS rn
+            FROM transactions t
+            CROSS JOIN LATERAL (
+                {matchers}
+            ) AS m(metric_name)
+            WHERE t.company_id = %s
+              AND t.month = %s
+        ) ranked
+        WHERE rn <= %s
+        ORDER BY metric_name, rn
+    """
+    return query, params
+
+
+def get_evidence_transactions_for_metrics(
+    conn: psycopg.Connection,
+    company_id: UUID,
+    month: date,
+    metric_names: list[str],
+    limit: int = 10,
+    itersize: int = 500
+) -> dict[str, list[dict]]:
     """
+    Get evidence transactions for several metrics of one month in one query.
+    
+    The month's transactions are scanned once: a lateral list of metric
+    filters tags each row with every metric it belongs to, ROW_NUMBER keeps
+    the top-`limit` per metric, and rows stream in through a server-side
+    cursor.
+    
+    Args:
+        conn: Database connection
+        company_id: Company GUID
+        month: Month (first day)
+        metric_names: Names of the metrics
+        limit: Maximum number of transactions per metric
+        itersize: Rows fetched per network round trip
+    
+    Returns:
+        Dict mapping metric_name -> transaction dictionaries
+    """
+    grouped = defaultdict(list)
+    query, params = _evidence_for_metrics_query(metric_names)
+    if query is None:
+        return grouped
+    
+    with conn.cursor(
+        name=f"evidence_{uuid4().hex}", binary=True, row_factory=dict_row
+    ) as cur:
+        cur.itersize = itersize
+        cur.execute(query, [*params, company_id, month, limit])
+        for row in cur:
+            grouped[row.pop("metric_name")].append(row)
+    return grouped
+
+
+def get_evidence_for_anomalies(
+    conn: psycopg.Connection,
+    anomalies: list[tuple[UUID, date, str]],
+    limit: int = 10
+) -> list[list[dict]]:
+    """
+    Get evidence transactions for many anomalies in one query.
+    
+    The (company_id, month, metric_name) keys are unnested server-side and
+    each one gets its top-`limit` transactions from a lateral subquery; the
+    metric filter is picked per key by a CASE over the metrics involved.
+    
+    Args:
+        conn: Database connection
+        anomalies: (company_id, month, metric_name) per anomaly
+        limit: Maximum number of transactions per anomaly
+    
+    Returns:
+        One list of transaction dictionaries per input key, in input order
+    """
+    evidence = [[] for _ in anomalies]
+    if not anomalies:
+        return evidence
+    
+    metric_names = list(dict.fromkeys(metric_name for _, _, metric_name in anomalies))
+    cases = " ".join(
+        f"WHEN %s THEN ({metric_filter_condition(metric_name)})" for metric_name in metric_names
+    )
+    query = f"""
+        SELECT a.idx, e.*
+        FROM unnest(%s::uuid[], %s::date[], %s::text[])
+            WITH ORDINALITY AS a(company_id, month, metric_name, idx)
+        CROSS JOIN LATERAL (
+            SELECT 
+                tx_date, account_code, account_name,
+                coa_code, coa_name, description,
+                customer_name, amount
+            FROM transactions
+            WHERE company_id = a.company_id
+              AND month = a.month
+              AND CASE a.metric_name {cases} ELSE false END
+            ORDER BY ABS(amount) DESC
+            LIMIT %s
+        ) e
+        ORDER BY a.idx, ABS(e.amount) DESC
+    """
+    params = [
+        [company_id for company_id, _, _ in anomalies],
+        [month for _, month, _ in anomalies],
+        [metric_name for _, _, metric_name in anomalies],
+        *metric_names,
+        limit,
+    ]
     
     with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(query, (str(company_id), month, limit))
-        return cur.fetchall()
+        cur.execute(query, params)
+        for row in cur:
+            evidence[row.pop("idx") - 1].append(row)
+    return evidence
+
+
+async def get_evidence_transactions_for_metrics_async(
+    aconn: psycopg.AsyncConnection,
+    company_id: UUID,
+    month: date,
+    metric_names: list[str],
+    limit: int = 10,
+    itersize: int = 500
+) -> dict[str, list[dict]]:
+    """
+    Async variant of get_evidence_transactions_for_metrics.
+    
+    Args:
+        aconn: Async database connection
+        company_id: Company GUID
+        month: Month (first day)
+        metric_names: Names of the metrics
+        limit: Maximum number of transactions per metric
+        itersize: Rows fetched per network round trip
+    
+    Returns:
+        Dict mapping metric_name -> transaction dictionaries
+    """
+    grouped = defaultdict(list)
+    query, params = _evidence_for_metrics_query(metric_names)
+    if query is None:
+        return grouped
+    
+    async with aconn.cursor(
+        name=f"evidence_{uuid4().hex}", binary=True, row_factory=dict_row
+    ) as cur:
+        cur.itersize = itersize
+        await cur.execute(query, [*params, company_id, month, limit])
+        async for row in cur:
+            grouped[row.pop("metric_name")].append(row)
+    return grouped
@@ -2,26 +2,49 @@
 Database connection helpers using psycopg 3.
 
 Provides:
-- Lazy-initialized connection pool
+- Lazy-initialized connection pool (sync and async)
 - Context manager for connections
 - Simple execute/fetchall helpers
 - Health check CLI
 """
 
+import functools
+import json
 import os
 import sys
 from contextlib import contextmanager
-from typing import Any, Generator, Optional
+from typing import Any, Callable, Generator, Optional, TypeVar, Union
 
 import psycopg
 from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
+from psycopg.types.json import set_json_dumps, set_json_loads
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
 from .config import get_config
 
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used when not installed
+    orjson = None
+
+# Encode and decode JSONB columns (anomalies.meta, raw payloads) with
+# orjson when available. Either way non-ASCII text (Turkish labels) is
+# sent as UTF-8 rather than \u escapes, with compact separators.
+if orjson is not None:
+    set_json_dumps(orjson.dumps)
+    set_json_loads(orjson.loads)
+else:
+    set_json_dumps(functools.partial(json.dumps, ensure_ascii=False, separators=(",", ":")))
+
 
 # Module-level pool (lazily initialized)
 _pool: Optional[ConnectionPool] = None
+_async_pool: Optional[AsyncConnectionPool] = None
+
+# Either a single session or a pool to borrow one from
+ConnOrPool = Union[psycopg.Connection, ConnectionPool]
+
+F = TypeVar("F", bound=Callable[..., Any])
 
 
 def _get_dsn() -> str:
@@ -51,11 +74,42 @@ def get_pool() -> ConnectionPool:
             dsn,
             min_size=1,
             max_size=pool_size,
+            max_idle=60,  # Release idle connections beyond min_size after 1 min
             open=True,
         )
     return _pool
 
 
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Get or create the async connection pool (lazy initialization).
+    
+    Keeps DB_POOL_SIZE connections open and grows by up to
+    DB_POOL_MAX_OVERFLOW more under load. The pool belongs to the event
+    loop that opened it; call close_async_pool before that loop ends.
+    
+    Returns:
+        AsyncConnectionPool: The psycopg async connection pool.
+    """
+    global _async_pool
+    if _async_pool is None:
+        config = get_config()
+        pool = AsyncConnectionPool(
+            _get_dsn(),
+            min_size=config.db_pool_size,
+            max_size=config.db_pool_size + config.db_pool_max_overflow,
+            max_idle=60,  # Release idle connections beyond min_size after 1 min
+            open=False,
+        )
+        await pool.open()
+        if _async_pool is None:
+            _async_pool = pool
+        else:
+            # Another coroutine opened one while we awaited
+            await pool.close()
+    return _async_pool
+
+
 @contextmanager
 def get_conn() -> Generator[psycopg.Connection, None, None]:
     """
@@ -88,6 +142,29 @@ def get_dict_conn() -> Generator[psycopg.Connection, None, None]:
         yield conn
 
 
+def accepts_pool(func: F) -> F:
+    """
+    Let a function taking a connection first argument also take a pool.
+    
+    When called with a ConnectionPool, a connection is borrowed for the
+    duration of the call (and committed/returned by the pool afterwards),
+    so concurrent callers each get their own session.
+    
+    Args:
+        func: Function whose first parameter is a psycopg connection.
+    
+    Returns:
+        The wrapped function.
+    """
+    @functools.wraps(func)
+    def wrapper(conn_or_pool: ConnOrPool, *args, **kwargs):
+        if isinstance(conn_or_pool, ConnectionPool):
+            with conn_or_pool.connection() as conn:
+                return func(conn, *args, **kwargs)
+        return func(conn_or_pool, *args, **kwargs)
+    return wrapper
+
+
 def execute(query: str, params: Optional[tuple] = None) -> None:
     """
     Execute a query without returning results.
@@ -193,6 +270,14 @@ def close_pool() -> None:
         _pool = None
 
 
+async def close_async_pool() -> None:
+    """Close the async connection pool (for cleanup)."""
+    global _async_pool
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.close()
+
+
 # CLI health check
 if __name__ == "__main__":
     import argparse
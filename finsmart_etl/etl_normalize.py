@@ -7,39 +7,83 @@ Handles:
 - Idempotent insertion into transactions table
 """
 
-import json
-from datetime import date, datetime
+from datetime import date
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
 import psycopg
-from psycopg.rows import dict_row
 
+_ZERO = Decimal("0")
 
-def has_transactions_for_report(conn: psycopg.Connection, raw_report_id: int) -> bool:
-    """
-    Check if transactions already exist for this raw report.
-    
-    Args:
-        conn: Database connection
-        raw_report_id: ID of the raw report
-    
-    Returns:
-        bool: True if transactions exist, False otherwise
-    """
-    with conn.cursor() as cur:
-        cur.execute(
-            "SELECT EXISTS(SELECT 1 FROM transactions WHERE source_report_id = %s)",
-            (raw_report_id,)
+# Raw reports normalized per transaction by normalize_all_pending
+NORMALIZE_BATCH_SIZE = 50
+
+# Normalize one stored report in a single statement: `items` is the
+# report's reportData array with each item's 0-based line_no (payloads
+# stored as a JSON string scalar are unwrapped first), `inserted` is the
+# server-side equivalent of map_report_item_to_tx_row over it, and
+# `processed` marks the report done. Idempotency is the unique
+# (source_report_id, line_no) index: items already inserted by an earlier
+# or concurrent run are skipped by ON CONFLICT DO NOTHING. Returns whether
+# the report exists, its item count, and the rows inserted.
+_NORMALIZE_REPORT = """
+    WITH report AS (
+        SELECT id, company_id, payload
+        FROM raw_reports
+        WHERE id = %(raw_report_id)s
+    ),
+    items AS (
+        SELECT r.id, r.company_id, e.item, e.ord - 1 AS line_no
+        FROM report r
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE jsonb_typeof(r.payload)
+                WHEN 'string' THEN (r.payload #>> '{}')::jsonb
+                ELSE r.payload
+            END #> '{data,reportData}'
+        ) WITH ORDINALITY AS e(item, ord)
+    ),
+    inserted AS (
+        INSERT INTO transactions (
+            company_id, tx_date, account_code, account_name,
+            coa_code, coa_name, description, customer_name, amount,
+            source_report_id, line_no
         )
-        return cur.fetchone()[0]
+        SELECT
+            company_id,
+            COALESCE(NULLIF(left(item->>'receiptDate', 10), '')::date, CURRENT_DATE),
+            COALESCE(item->>'accountCode', ''),
+            COALESCE(item->>'accountName', ''),
+            COALESCE(item->>'code', ''),
+            COALESCE(item->>'name', ''),
+            COALESCE(item->>'description', ''),
+            item->>'customerName',
+            COALESCE(NULLIF(item->>'amount', '')::numeric, 0),
+            id,
+            line_no
+        FROM items
+        ON CONFLICT (source_report_id, line_no) DO NOTHING
+        RETURNING 1
+    ),
+    processed AS (
+        UPDATE raw_reports SET status = 'processed'
+        WHERE id = (SELECT id FROM report) AND status IS DISTINCT FROM 'processed'
+        RETURNING 1
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM report),
+        (SELECT COUNT(*) FROM items),
+        (SELECT COUNT(*) FROM inserted)
+"""
 
 
 def map_report_item_to_tx_row(item: dict) -> dict:
     """
     Pure function mapping a single reportData JSON row to a transaction row dict.
     
+    normalize_raw_report applies the same mapping in SQL (_NORMALIZE_REPORT)
+    to a whole stored report; keep the two in sync.
+    
     Args:
         item: Single item from reportData array
     
@@ -47,13 +91,10 @@ def map_report_item_to_tx_row(item: dict) -> dict:
         dict with keys: tx_date, month, account_code, account_name, 
                        coa_code, coa_name, description, customer_name, amount
     """
-    # Parse date - handle different formats
-    date_str = item.get("receiptDate", "")
+    # Parse date - ISO date, optionally with time: "2022-01-01T00:00:00"
+    date_str = item.get("receiptDate") or ""
     if date_str:
-        # Handle ISO format with time: "2022-01-01T00:00:00"
-        if "T" in date_str:
-            date_str = date_str.split("T")[0]
-        tx_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        tx_date = date.fromisoformat(date_str[:10])
     else:
         tx_date = date.today()
     
@@ -68,9 +109,16 @@ def map_report_item_to_tx_row(item: dict) -> dict:
     description = item.get("description", "")
     customer_name = item.get("customerName")
     
-    # Amount - ensure it's a Decimal
+    # Amount - ensure it's a Decimal. Ints and strings convert exactly;
+    # floats go through str() so 0.1 stays 0.1 rather than its binary
+    # expansion.
     amount_raw = item.get("amount", 0)
-    amount = Decimal(str(amount_raw)) if amount_raw else Decimal("0")
+    if not amount_raw:
+        amount = _ZERO
+    elif isinstance(amount_raw, (int, str)):
+        amount = Decimal(amount_raw)
+    else:
+        amount = Decimal(str(amount_raw))
     
     return {
         "tx_date": tx_date,
@@ -85,102 +133,59 @@ def map_report_item_to_tx_row(item: dict) -> dict:
     }
 
 
-def normalize_raw_report(conn: psycopg.Connection, raw_report_id: int) -> int:
+def normalize_raw_report(
+    conn: psycopg.Connection,
+    raw_report_id: int,
+    autocommit: bool = True
+) -> int:
     """
     Normalize a raw report into transactions.
     
-    Idempotent: if transactions already exist for this report, do nothing.
+    Idempotent: items already inserted for this report are skipped.
     
     Args:
         conn: Database connection
         raw_report_id: ID of the raw report to normalize
+        autocommit: Commit before returning (otherwise the caller owns the
+            transaction, e.g. `with conn.transaction():`)
     
     Returns:
         int: Number of transactions inserted (0 if already processed)
     """
-    # Check if already processed
-    if has_transactions_for_report(conn, raw_report_id):
-        print(f"Transactions already exist for report {raw_report_id}, skipping")
-        return 0
-    
-    # Load raw payload
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            "SELECT company_id, payload FROM raw_reports WHERE id = %s",
-            (raw_report_id,)
-        )
-        row = cur.fetchone()
-        if not row:
-            raise ValueError(f"Raw report {raw_report_id} not found")
-        
-        company_id = row["company_id"]
-        payload = row["payload"]
-    
-    # Handle payload as string or dict
-    if isinstance(payload, str):
-        payload = json.loads(payload)
-    
-    # Extract reportData
-    report_data = payload.get("data", {}).get("reportData", [])
-    if not report_data:
-        print(f"No reportData in raw report {raw_report_id}")
-        # Mark as processed anyway
-        with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE raw_reports SET status = 'processed' WHERE id = %s",
-                (raw_report_id,)
-            )
-            conn.commit()
-        return 0
-    
-    # Map and insert transactions
-    rows_to_insert = []
-    for item in report_data:
-        tx_row = map_report_item_to_tx_row(item)
-        rows_to_insert.append((
-            str(company_id),
-            tx_row["tx_date"],
-            tx_row["month"],
-            tx_row["account_code"],
-            tx_row["account_name"],
-            tx_row["coa_code"],
-            tx_row["coa_name"],
-            tx_row["description"],
-            tx_row["customer_name"],
-            tx_row["amount"],
-            raw_report_id,
-        ))
-    
-    # Batch insert
+    # Map and insert every reportData item, and mark the report processed,
+    # in one set-based statement: the payload is already stored as JSONB,
+    # so it never travels to Python and no per-row Python work is done
     with conn.cursor() as cur:
-        cur.executemany(
-            """
-            INSERT INTO transactions (
-                company_id, tx_date, month, account_code, account_name,
-                coa_code, coa_name, description, customer_name, amount,
-                source_report_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            rows_to_insert
-        )
-        
-        # Update raw_reports status
-        cur.execute(
-            "UPDATE raw_reports SET status = 'processed' WHERE id = %s",
-            (raw_report_id,)
-        )
+        cur.execute(_NORMALIZE_REPORT, {"raw_report_id": raw_report_id}, prepare=True)
+        found, items, count = cur.fetchone()
+        if not found:
+            raise ValueError(f"Raw report {raw_report_id} not found")
+    if autocommit:
         conn.commit()
     
-    print(f"Inserted {len(rows_to_insert)} transactions from report {raw_report_id}")
-    return len(rows_to_insert)
+    if count:
+        print(f"Inserted {count} transactions from report {raw_report_id}")
+    elif items:
+        print(f"Transactions already exist for report {raw_report_id}, skipping")
+    else:
+        print(f"No reportData in raw report {raw_report_id}")
+    return count
 
 
-def normalize_all_pending(conn: psycopg.Connection) -> int:
+def normalize_all_pending(
+    conn: psycopg.Connection,
+    batch_size: int = NORMALIZE_BATCH_SIZE
+) -> int:
     """
     Normalize all pending raw reports.
     
+    Reports are committed in batches (one commit per `batch_size` reports).
+    Each report runs in its own savepoint, so a failing report is rolled
+    back alone and marked 'error' without losing the rest of its batch.
+    
     Args:
         conn: Database connection
+        batch_size: Number of reports per transaction
     
     Returns:
         int: Total number of transactions inserted
@@ -190,20 +195,24 @@ def normalize_all_pending(conn: psycopg.Connection) -> int:
             "SELECT id FROM raw_reports WHERE status = 'pending' ORDER BY id"
         )
         pending_ids = [row[0] for row in cur.fetchall()]
+    # End the read so each batch below is its own transaction
+    conn.commit()
     
     total = 0
-    for report_id in pending_ids:
-        try:
-            count = normalize_raw_report(conn, report_id)
-            total += count
-        except Exception as e:
-            print(f"Error normalizing report {report_id}: {e}")
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE raw_reports SET status = 'error' WHERE id = %s",
-                    (report_id,)
-                )
-                conn.commit()
+    for start in range(0, len(pending_ids), batch_size):
+        # Pipeline mode sends each SAVEPOINT/RELEASE along with the next
+        # statement instead of as separate round trips
+        with conn.pipeline(), conn.transaction():
+            for report_id in pending_ids[start:start + batch_size]:
+                try:
+                    with conn.transaction():
+                        total += normalize_raw_report(conn, report_id, autocommit=False)
+                except Exception as e:
+                    print(f"Error normalizing report {report_id}: {e}")
+                    conn.execute(
+                        "UPDATE raw_reports SET status = 'error' WHERE id = %s",
+                        (report_id,)
+                    )
     
     return total
 
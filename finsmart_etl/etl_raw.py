@@ -7,15 +7,18 @@ Handles:
 - Storing raw payloads in raw_reports table
 """
 
-import json
+import logging
 from datetime import date
-from typing import Optional
+from typing import Optional, Union
 from uuid import UUID
 
 import psycopg
+from psycopg.types.json import Jsonb
 
 from .finsmart_client import FinsmartClient
 
+log = logging.getLogger(__name__)
+
 
 def get_or_create_company(
     conn: psycopg.Connection,
@@ -35,27 +38,22 @@ def get_or_create_company(
     Returns:
         UUID: Company GUID (primary key)
     """
+    # One round trip whether or not the company exists. DO NOTHING (rather
+    # than a no-op DO UPDATE) leaves existing rows unwritten; the key is the
+    # GUID itself, so there is nothing to read back
     with conn.cursor() as cur:
-        # Try to find existing by Finsmart GUID
-        cur.execute(
-            "SELECT finsmart_guid FROM companies WHERE finsmart_guid = %s",
-            (finsmart_guid,)
-        )
-        row = cur.fetchone()
-        if row:
-            return row[0]
-        
-        # Create new using Finsmart GUID as the primary key
         cur.execute(
             """
             INSERT INTO companies (finsmart_guid, name, business_model)
             VALUES (%s, %s, %s)
-            RETURNING finsmart_guid
+            ON CONFLICT (finsmart_guid) DO NOTHING
             """,
             (finsmart_guid, name, business_model)
         )
-        conn.commit()
-        return cur.fetchone()[0]
+    # Committed so a later rollback (e.g. a raw report insert race) cannot
+    # drop a company that reports already reference
+    conn.commit()
+    return UUID(str(finsmart_guid))
 
 
 def get_existing_raw_report_id(
@@ -90,12 +88,33 @@ def get_existing_raw_report_id(
         return row[0] if row else None
 
 
+def _payload_param(payload: Union[dict, bytes], placeholder: str = "%b") -> tuple[str, object]:
+    """
+    Build the SQL placeholder and parameter for a raw report payload.
+    
+    The payload is sent as a binary parameter (%b): a dict is serialized
+    once by psycopg's Jsonb dumper (compact UTF-8; see db.py); raw bytes go
+    as bytea and are parsed by the server, so no Python objects are built
+    for the payload at all.
+    
+    Args:
+        payload: Parsed payload, or the undecoded UTF-8 response body
+        placeholder: Binary placeholder to use ("%b" or a named "%(name)b")
+    
+    Returns:
+        Tuple of (SQL expression yielding jsonb, parameter)
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return f"convert_from({placeholder}, 'UTF8')::jsonb", payload
+    return placeholder, Jsonb(payload)
+
+
 def ingest_report(
     conn: psycopg.Connection,
     company_id: UUID,
     period_start: date,
     period_end: date,
-    payload: dict,
+    payload: Union[dict, bytes],
 ) -> int:
     """
     Insert a new raw report into the database.
@@ -105,24 +124,89 @@ def ingest_report(
         company_id: Company GUID
         period_start: Report period start date
         period_end: Report period end date
-        payload: Raw JSON payload from Finsmart API
+        payload: Raw JSON payload from Finsmart API, parsed or as the
+            undecoded UTF-8 response body
     
     Returns:
         int: New raw_reports.id
     """
+    payload_sql, payload_param = _payload_param(payload)
     with conn.cursor() as cur:
         cur.execute(
-            """
+            f"""
             INSERT INTO raw_reports (company_id, period_start, period_end, payload, status)
-            VALUES (%s, %s, %s, %s, 'pending')
+            VALUES (%s, %s, %s, {payload_sql}, 'pending')
             RETURNING id
             """,
-            (str(company_id), period_start, period_end, json.dumps(payload))
+            (str(company_id), period_start, period_end, payload_param)
         )
         conn.commit()
         return cur.fetchone()[0]
 
 
+# Store a fetched report in one statement: `new` parses the payload once,
+# `company` applies its companyInfo (empty fields keep current values),
+# and on force_refresh `stale` drops the transactions normalized from the
+# report being replaced while `stale_kpis` / `stale_anomalies` drop the
+# KPIs and anomalies (with their contributors and highlights, by cascade)
+# of the months in its period. The insert's ON CONFLICT on (company_id,
+# period_start, period_end) is the idempotency check: a report inserted
+# concurrently is kept as is, while force_refresh replaces its payload in
+# place (same id) and re-queues it.
+_STORE_REPORT = """
+    WITH new AS (
+        SELECT {payload} AS payload
+    ),
+    company AS (
+        UPDATE companies c
+        SET name = COALESCE(NULLIF(n.payload #>> '{{data,companyInfo,companyName}}', ''), c.name),
+            business_model = COALESCE(
+                NULLIF(n.payload #>> '{{data,companyInfo,businessModelName}}', ''),
+                c.business_model
+            )
+        FROM new n
+        WHERE c.finsmart_guid = %(company_id)s
+          AND jsonb_typeof(n.payload #> '{{data,companyInfo}}') = 'object'
+        RETURNING 1
+    ),
+    stale AS (
+        DELETE FROM transactions t
+        USING raw_reports r
+        WHERE %(force_refresh)s
+          AND t.source_report_id = r.id
+          AND r.company_id = %(company_id)s
+          AND r.period_start = %(period_start)s
+          AND r.period_end = %(period_end)s
+        RETURNING 1
+    ),
+    stale_kpis AS (
+        DELETE FROM monthly_kpis
+        WHERE %(force_refresh)s
+          AND company_id = %(company_id)s
+          AND month BETWEEN date_trunc('month', %(period_start)s::timestamp)::date AND %(period_end)s
+        RETURNING 1
+    ),
+    stale_anomalies AS (
+        DELETE FROM anomalies
+        WHERE %(force_refresh)s
+          AND company_id = %(company_id)s
+          AND month BETWEEN date_trunc('month', %(period_start)s::timestamp)::date AND %(period_end)s
+        RETURNING 1
+    )
+    INSERT INTO raw_reports (company_id, period_start, period_end, payload, status)
+    SELECT %(company_id)s, %(period_start)s, %(period_end)s, payload, 'pending'
+    FROM new
+    ON CONFLICT (company_id, period_start, period_end) DO UPDATE
+    SET payload = CASE WHEN %(force_refresh)s THEN EXCLUDED.payload ELSE raw_reports.payload END,
+        status = CASE WHEN %(force_refresh)s THEN 'pending' ELSE raw_reports.status END
+    RETURNING
+        id,
+        (xmax = 0) AS inserted,
+        (SELECT COUNT(*) FROM company) > 0 AS company_updated,
+        (SELECT COUNT(*) FROM stale_kpis) + (SELECT COUNT(*) FROM stale_anomalies) AS derived_deleted
+"""
+
+
 def ensure_raw_report(
     conn: psycopg.Connection,
     finsmart_client: FinsmartClient,
@@ -136,7 +220,15 @@ def ensure_raw_report(
     Idempotent ETL entrypoint for raw data ingestion.
     
     - If a raw report exists for (company, period) and force_refresh=False, return its id.
-    - Otherwise, fetch from Finsmart API and insert.
+    - Otherwise, fetch from Finsmart API and store it in one statement
+      (company info update + insert, or in-place replace on force_refresh).
+    
+    A forced refresh also deletes everything derived from the old payload
+    for the months in the period: its transactions, and the company's KPIs
+    and anomalies (with contributors, highlights and any status set on
+    them). Cached month views are invalidated by the schema's data-version
+    triggers. Run normalization, KPIs and anomaly detection again (e.g. the
+    runner pipeline) to rebuild those months.
     
     Args:
         conn: Database connection
@@ -154,59 +246,44 @@ def ensure_raw_report(
     if not force_refresh:
         existing_id = get_existing_raw_report_id(conn, company_id, period_start, period_end)
         if existing_id is not None:
-            print(f"Raw report already exists (id={existing_id}), skipping API call")
+            log.info("Raw report already exists (id=%s), skipping API call", existing_id)
             return existing_id
     
-    # Fetch from Finsmart API
-    print(f"Fetching data from Finsmart API for company {company_guid}...")
-    payload = finsmart_client.fetch_company_data(company_guid)
-    
-    # Extract company info if available
-    company_info = payload.get("data", {}).get("companyInfo", {})
-    if company_info:
-        # Update company name if we have it
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                UPDATE companies 
-                SET name = COALESCE(NULLIF(%s, ''), name),
-                    business_model = COALESCE(NULLIF(%s, ''), business_model)
-                WHERE id = %s
-                """,
-                (
-                    company_info.get("companyName", ""),
-                    company_info.get("businessModelName", ""),
-                    str(company_id)
-                )
-            )
-            conn.commit()
-    
-    # Handle force_refresh: delete existing before insert
-    if force_refresh:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                DELETE FROM raw_reports 
-                WHERE company_id = %s AND period_start = %s AND period_end = %s
-                """,
-                (str(company_id), period_start, period_end)
-            )
-            conn.commit()
-    
-    # Insert new report
-    try:
-        report_id = ingest_report(conn, company_id, period_start, period_end, payload)
-        print(f"Ingested raw report (id={report_id})")
-        return report_id
-        
-    except psycopg.errors.UniqueViolation:
-        # Race condition: another process inserted, fetch existing
-        conn.rollback()
-        existing_id = get_existing_raw_report_id(conn, company_id, period_start, period_end)
-        if existing_id:
-            print(f"Report inserted by concurrent process (id={existing_id})")
-            return existing_id
-        raise
+    # Fetch from Finsmart API; the body is stored undecoded (the database
+    # parses it), so the reportData rows never become Python objects
+    log.info("Fetching data from Finsmart API for company %s...", company_guid)
+    payload = finsmart_client.fetch_company_data(company_guid, raw=True)
+    
+    payload_sql, payload_param = _payload_param(payload, "%(payload)b")
+    with conn.cursor() as cur:
+        cur.execute(
+            _STORE_REPORT.format(payload=payload_sql),
+            {
+                "company_id": str(company_id),
+                "period_start": period_start,
+                "period_end": period_end,
+                "payload": payload_param,
+                "force_refresh": force_refresh,
+            }
+        )
+        report_id, inserted, company_updated, derived_deleted = cur.fetchone()
+        conn.commit()
+    
+    if company_updated:
+        # Cached company lookups would otherwise serve the old name
+        from .cfo_view import clear_company_cache
+        clear_company_cache(company_id)
+    
+    if inserted:
+        log.info("Ingested raw report (id=%s)", report_id)
+    elif force_refresh:
+        log.info(
+            "Replaced raw report payload (id=%s); deleted %d derived KPI/anomaly rows, "
+            "recompute the period", report_id, derived_deleted
+        )
+    else:
+        log.info("Report inserted by concurrent process (id=%s)", report_id)
+    return report_id
 
 
 def load_from_file(
@@ -232,11 +309,11 @@ def load_from_file(
     # Check existing
     existing_id = get_existing_raw_report_id(conn, company_id, period_start, period_end)
     if existing_id is not None:
-        print(f"Raw report already exists (id={existing_id})")
+        log.info("Raw report already exists (id=%s)", existing_id)
         return existing_id
     
-    # Load from file
-    with open(filepath, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+    # Load from file; the database parses the JSON
+    with open(filepath, "rb") as f:
+        payload = f.read()
     
     return ingest_report(conn, company_id, period_start, period_end, payload)
@@ -4,18 +4,38 @@ LLM Explanations: Generate human-readable explanations for anomalies.
 Uses OpenAI's API to create Turkish and English explanations.
 """
 
+import asyncio
+import functools
+import hashlib
 import json
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 from typing import Optional
 from uuid import UUID
 
 import psycopg
 from psycopg.rows import dict_row
-from openai import OpenAI
 
-from .config import get_config
-from .contributors import get_contributors_for_anomaly, get_evidence_transactions
+from .llm import (
+    JSON_TEXT_FORMAT,
+    create_async_openai_client,
+    get_openai_client,
+    parse_llm_json,
+    prompt_json,
+    response_output_text,
+    run_response_batch,
+    run_sync,
+)
+from .contributors import (
+    get_contributors_for_anomalies,
+    get_contributors_for_anomaly,
+    get_evidence_for_anomalies,
+    get_evidence_transactions,
+)
+
+log = logging.getLogger(__name__)
 
 
 # Turkish month names
@@ -46,6 +66,7 @@ METRIC_NAMES_TR = {
 }
 
 
+@functools.lru_cache(maxsize=256)
 def month_label_tr(month_date: date) -> str:
     """
     Return Turkish month label (e.g., 'Eylül 2025').
@@ -73,6 +94,9 @@ def metric_name_tr(metric_name: str) -> str:
     return METRIC_NAMES_TR.get(metric_name, metric_name)
 
 
+# Amounts are NUMERIC(18,2), so repeats (same KPI in overview, anomaly and
+# contributor rows) are common
+@functools.lru_cache(maxsize=4096)
 def format_amount_tr(amount: float) -> str:
     """
     Format amount in Turkish style (e.g., '82k TL').
@@ -95,29 +119,40 @@ def format_amount_tr(amount: float) -> str:
 def build_anomaly_payload(
     conn: psycopg.Connection,
     anomaly: dict,
-    include_evidence: bool = True
+    include_evidence: bool = True,
+    contributors: Optional[list[dict]] = None,
+    company: Optional[dict] = None,
+    evidence: Optional[list[dict]] = None
 ) -> dict:
     """
     Build structured payload for LLM prompt.
     
+    Contributors, company and evidence are looked up unless passed in
+    (batch callers prefetch them for many anomalies at once).
+    
     Args:
         conn: Database connection
         anomaly: Anomaly dictionary
         include_evidence: Whether to include sample transactions
+        contributors: Prefetched contributor rows for the anomaly
+        company: Prefetched company row (name, business_model)
+        evidence: Prefetched evidence transactions for the anomaly's metric
     
     Returns:
         dict: Structured payload for LLM
     """
     # Get contributors
-    contributors = get_contributors_for_anomaly(conn, anomaly["id"])
+    if contributors is None:
+        contributors = get_contributors_for_anomaly(conn, anomaly["id"])
     
     # Get company info (lookup by Finsmart GUID, which is now the primary key)
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            "SELECT name, business_model FROM companies WHERE finsmart_guid = %s",
-            (str(anomaly["company_id"]),)
-        )
-        company = cur.fetchone() or {}
+    if company is None:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(
+                "SELECT name, business_model FROM companies WHERE finsmart_guid = %s",
+                (anomaly["company_id"],)
+            )
+            company = cur.fetchone() or {}
     
     # Parse month date
     month_date = anomaly["month"]
@@ -156,13 +191,14 @@ def build_anomaly_payload(
     
     # Optionally add evidence sample
     if include_evidence:
-        evidence = get_evidence_transactions(
-            conn,
-            anomaly["company_id"],
-            str(anomaly["month"]),
-            anomaly["metric_name"],
-            limit=5
-        )
+        if evidence is None:
+            evidence = get_evidence_transactions(
+                conn,
+                anomaly["company_id"],
+                anomaly["month"],
+                anomaly["metric_name"],
+                limit=5
+            )
         payload["evidence_sample"] = [
             {
                 "date": str(e["tx_date"]),
@@ -176,6 +212,15 @@ def build_anomaly_payload(
     return payload
 
 
+# Writing rules shared by the single and multi-anomaly prompts
+_PROMPT_RULES = """KURALLAR:
+1. Sayıları değiştirme, sadece yüzde oranlarını en yakın tek ondalık haneye yuvarla (örnek: %1513.2, %73.1).
+2. Türkçe açıklama için doğal ve akıcı bir dil kullan.
+3. İngilizce açıklama için profesyonel ve özlü bir dil kullan.
+4. Her açıklama 2-3 cümle olsun.
+5. Değişimin yönünü (artış/azalış) ve ana nedenlerini belirt."""
+
+
 def build_prompt(payload: dict) -> str:
     """
     Build LLM prompt for anomaly explanation.
@@ -189,15 +234,10 @@ def build_prompt(payload: dict) -> str:
     prompt = f"""Sen deneyimli bir finansal analist ve CFO danışmanısın.
 Aşağıdaki finansal anomali hakkında kısa ve net bir açıklama yaz.
 
-KURALLAR:
-1. Sayıları değiştirme, sadece yüzde oranlarını en yakın tek ondalık haneye yuvarla (örnek: %1513.2, %73.1).
-2. Türkçe açıklama için doğal ve akıcı bir dil kullan.
-3. İngilizce açıklama için profesyonel ve özlü bir dil kullan.
-4. Her açıklama 2-3 cümle olsun.
-5. Değişimin yönünü (artış/azalış) ve ana nedenlerini belirt.
+{_PROMPT_RULES}
 
 VERİ:
-{json.dumps(payload, indent=2, ensure_ascii=False)}
+{prompt_json(payload)}
 
 ÇIKTI FORMATI (JSON):
 {{
@@ -210,140 +250,564 @@ Sadece JSON döndür, başka bir şey yazma."""
     return prompt
 
 
-def call_reasoning_llm(prompt: str) -> dict:
+def build_batch_prompt(payloads: list[dict]) -> str:
     """
-    Call OpenAI API to generate explanations using gpt-5-mini with reasoning.
+    Build one LLM prompt explaining several anomalies.
+    
+    The instructions are sent once for all anomalies, and the model returns
+    one result per anomaly in input order.
     
     Args:
-        prompt: Prompt string
+        payloads: Structured anomaly payloads
     
     Returns:
-        dict: {"tr_explanation": "...", "en_explanation": "..."}
+        str: Prompt string
+    """
+    anomalies = [{"n": n, **payload} for n, payload in enumerate(payloads, 1)]
+    prompt = f"""Sen deneyimli bir finansal analist ve CFO danışmanısın.
+Aşağıdaki {len(payloads)} finansal anomalinin her biri hakkında ayrı, kısa ve net bir açıklama yaz.
+
+{_PROMPT_RULES}
+6. Her anomali yalnızca kendi verisine göre açıklansın.
+
+ANOMALİLER:
+{prompt_json(anomalies)}
+
+ÇIKTI FORMATI (JSON, "results" anomalilerle aynı sırada ve aynı sayıda):
+{{
+  "results": [
+    {{"n": 1, "tr_explanation": "Türkçe açıklama buraya...", "en_explanation": "English explanation here..."}}
+  ]
+}}
+
+Sadece JSON döndür, başka bir şey yazma."""
+
+    return prompt
+
+
+# Responses API parameters for highlight generation (shared by the
+# synchronous and Batch API paths)
+HIGHLIGHT_REQUEST_PARAMS = {
+    "model": "gpt-5-mini",
+    "reasoning": {"effort": "low"},
+    "text": {"verbosity": "low", "format": JSON_TEXT_FORMAT},
+}
+
+
+def parse_highlight_response(raw_text: str) -> dict:
     """
-    config = get_config()
-    client = OpenAI(api_key=config.openai_api_key)
+    Parse a highlight LLM response.
+    
+    Args:
+        raw_text: Model output text
     
+    Returns:
+        dict: {"tr_explanation": "...", "en_explanation": "..."}
+    """
     try:
-        # Use gpt-5-mini with responses API and reasoning
-        result = client.responses.create(
-            model="gpt-5-mini",
-            input=prompt,
-            reasoning={"effort": "low"},
-            text={"verbosity": "low"},
-        )
-        
-        raw_text = result.output_text.strip()
-        
-        # Try to parse JSON
-        # Handle potential markdown code blocks
-        if raw_text.startswith("```"):
-            raw_text = raw_text.split("```")[1]
-            if raw_text.startswith("json"):
-                raw_text = raw_text[4:]
-        
-        result = json.loads(raw_text)
+        result = parse_llm_json(raw_text)
         return {
             "tr_explanation": result.get("tr_explanation", ""),
             "en_explanation": result.get("en_explanation", ""),
         }
         
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, AttributeError):
         # Fallback: use raw text as Turkish explanation
         return {
-            "tr_explanation": raw_text,
+            "tr_explanation": raw_text.strip(),
             "en_explanation": "",
         }
+
+
+def parse_batch_highlight_response(raw_text: str, count: int) -> list[Optional[dict]]:
+    """
+    Parse a multi-anomaly highlight LLM response.
+    
+    Results are matched to anomalies by their "n" (1-based position); an
+    anomaly without a usable result gets None.
+    
+    Args:
+        raw_text: Model output text
+        count: Number of anomalies in the prompt
+    
+    Returns:
+        List of {"tr_explanation": "...", "en_explanation": "..."} or None,
+        in prompt order
+    """
+    try:
+        results = parse_llm_json(raw_text).get("results")
+    except (json.JSONDecodeError, AttributeError):
+        return [None] * count
+    if not isinstance(results, list):
+        return [None] * count
+    
+    parsed = [None] * count
+    for position, item in enumerate(results):
+        if not isinstance(item, dict) or not item.get("tr_explanation"):
+            continue
+        n = item.get("n")
+        index = n - 1 if isinstance(n, int) else position
+        if 0 <= index < count:
+            parsed[index] = {
+                "tr_explanation": item["tr_explanation"],
+                "en_explanation": item.get("en_explanation", ""),
+            }
+    return parsed
+
+
+def call_reasoning_llm(prompt: str) -> dict:
+    """
+    Call OpenAI API to generate explanations using gpt-5-mini with reasoning.
+    
+    Args:
+        prompt: Prompt string
+    
+    Returns:
+        dict: {"tr_explanation": "...", "en_explanation": "..."}
+    """
+    client = get_openai_client()
+    
+    try:
+        # Use gpt-5-mini with responses API and reasoning; only the text is
+        # needed, so the raw body is parsed instead of the SDK model
+        raw = client.responses.with_raw_response.create(input=prompt, **HIGHLIGHT_REQUEST_PARAMS)
+        return parse_highlight_response(response_output_text(raw.content))
+        
+    except Exception as e:
+        return {
+            "tr_explanation": f"Açıklama oluşturulamadı: {e}",
+            "en_explanation": f"Could not generate explanation: {e}",
+            "error": str(e),
+        }
+
+
+async def call_reasoning_llm_async(prompt: str, client) -> dict:
+    """
+    Async variant of call_reasoning_llm on a caller-owned AsyncOpenAI client.
+    
+    Args:
+        prompt: Prompt string
+        client: AsyncOpenAI client created inside the running event loop
+    
+    Returns:
+        dict: {"tr_explanation": "...", "en_explanation": "..."}
+    """
+    try:
+        raw = await client.responses.with_raw_response.create(input=prompt, **HIGHLIGHT_REQUEST_PARAMS)
+        return parse_highlight_response(response_output_text(raw.content))
+        
     except Exception as e:
         return {
             "tr_explanation": f"Açıklama oluşturulamadı: {e}",
             "en_explanation": f"Could not generate explanation: {e}",
+            "error": str(e),
         }
 
 
-def generate_highlight_for_anomaly(
-    conn: psycopg.Connection,
-    anomaly_id: int,
-    llm_func=None
-) -> bool:
+async def call_reasoning_llm_batch_async(payloads: list[dict], client) -> list[Optional[dict]]:
     """
-    Generate and store highlights for a single anomaly.
+    Explain several anomalies with one LLM request (see build_batch_prompt).
     
     Args:
-        conn: Database connection
-        anomaly_id: ID of the anomaly
-        llm_func: Optional LLM function (for testing)
+        payloads: Structured anomaly payloads
+        client: AsyncOpenAI client created inside the running event loop
     
     Returns:
-        bool: True if successful
+        One result per payload, in order; None where the response had no
+        usable result for it
     """
-    if llm_func is None:
-        llm_func = call_reasoning_llm
+    if len(payloads) == 1:
+        return [await call_reasoning_llm_async(build_prompt(payloads[0]), client)]
     
-    # Get anomaly details
-    with conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            """
-            SELECT id, company_id, month, metric_name,
-                   prev_value, curr_value, pct_change
-            FROM anomalies
-            WHERE id = %s
-            """,
-            (anomaly_id,)
+    try:
+        raw = await client.responses.with_raw_response.create(
+            input=build_batch_prompt(payloads), **HIGHLIGHT_REQUEST_PARAMS
         )
+        return parse_batch_highlight_response(response_output_text(raw.content), len(payloads))
+        
+    except Exception as e:
+        return [
+            {
+                "tr_explanation": f"Açıklama oluşturulamadı: {e}",
+                "en_explanation": f"Could not generate explanation: {e}",
+                "error": str(e),
+            }
+        ] * len(payloads)
+
+
+async def _call_reasoning_llm_concurrently(
+    payload_chunks: list[list[dict]],
+    max_concurrency: int
+) -> list[list[Optional[dict]]]:
+    """Run one highlight request per chunk concurrently, at most `max_concurrency` in flight."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # Create the async client inside the running event loop
+    async with create_async_openai_client() as client:
+
+        async def bounded(payloads: list[dict]) -> list[Optional[dict]]:
+            async with semaphore:
+                return await call_reasoning_llm_batch_async(payloads, client)
+
+        return await asyncio.gather(*(bounded(chunk) for chunk in payload_chunks))
+
+
+_HIGHLIGHT_ANOMALY_COLUMNS = """
+    SELECT id, company_id, month, metric_name,
+           prev_value, curr_value, pct_change
+    FROM anomalies
+"""
+
+
+def _highlight_prompt(conn: psycopg.Connection, anomaly_id: int) -> Optional[str]:
+    """Build the highlight prompt for an anomaly (None if it does not exist)."""
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(_HIGHLIGHT_ANOMALY_COLUMNS + " WHERE id = %s", (anomaly_id,))
         anomaly = cur.fetchone()
         if not anomaly:
-            return False
+            return None
     
-    # Build payload and prompt
     payload = build_anomaly_payload(conn, anomaly)
-    prompt = build_prompt(payload)
+    return build_prompt(payload)
+
+
+def _highlight_prompts(conn: psycopg.Connection, anomaly_ids: list[int]) -> dict[int, str]:
+    """
+    Build highlight prompts for many anomalies with bulk lookups.
     
-    # Call LLM
-    result = llm_func(prompt)
+    Anomalies, contributors, companies and evidence take one query each.
+    """
+    return {
+        anomaly_id: build_prompt(payload)
+        for anomaly_id, payload in _highlight_payloads(conn, anomaly_ids).items()
+    }
+
+
+def _highlight_payloads(conn: psycopg.Connection, anomaly_ids: list[int]) -> dict[int, dict]:
+    """Build highlight payloads for many anomalies (see _highlight_prompts)."""
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(_HIGHLIGHT_ANOMALY_COLUMNS + " WHERE id = ANY(%s)", (list(anomaly_ids),))
+        anomalies = cur.fetchall()
+    if not anomalies:
+        return {}
     
-    # Store highlights
+    contributors_by_id = get_contributors_for_anomalies(conn, [a["id"] for a in anomalies])
+    with conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(
+            "SELECT finsmart_guid, name, business_model FROM companies WHERE finsmart_guid = ANY(%s)",
+            (list({a["company_id"] for a in anomalies}),)
+        )
+        companies = {row.pop("finsmart_guid"): row for row in cur.fetchall()}
+    
+    evidence = get_evidence_for_anomalies(
+        conn, [(a["company_id"], a["month"], a["metric_name"]) for a in anomalies], limit=5
+    )
+    
+    return {
+        a["id"]: build_anomaly_payload(
+            conn, a,
+            contributors=contributors_by_id.get(a["id"], []),
+            company=companies.get(a["company_id"], {}),
+            evidence=a_evidence,
+        )
+        for a, a_evidence in zip(anomalies, evidence)
+    }
+
+
+def highlight_prompt_hash(prompt: str) -> str:
+    """
+    Key a highlight prompt for the LLM result cache.
+    
+    Prompts are deterministic functions of the anomaly payload, so a rerun
+    over unchanged data (e.g. a backfill or forced refresh) reuses the
+    cached result. The model is part of the key.
+    
+    Args:
+        prompt: Highlight prompt
+    
+    Returns:
+        str: SHA-256 hex digest
+    """
+    key = f"{HIGHLIGHT_REQUEST_PARAMS['model']}|{prompt}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def get_cached_highlight_results(
+    conn: psycopg.Connection,
+    prompts: dict[int, str]
+) -> dict[int, dict]:
+    """
+    Look up cached LLM results for highlight prompts in one query.
+    
+    Args:
+        conn: Database connection
+        prompts: Dict mapping anomaly_id -> prompt
+    
+    Returns:
+        Dict mapping anomaly_id -> {"tr_explanation", "en_explanation"} for
+        every cache hit
+    """
+    if not prompts:
+        return {}
+    hashes = {anomaly_id: highlight_prompt_hash(p) for anomaly_id, p in prompts.items()}
     with conn.cursor() as cur:
-        # Turkish
-        if result.get("tr_explanation"):
-            cur.execute(
-                """
-                INSERT INTO anomaly_highlights (anomaly_id, language, text)
-                VALUES (%s, 'tr', %s)
-                ON CONFLICT (anomaly_id, language) DO UPDATE SET text = EXCLUDED.text
-                """,
-                (anomaly_id, result["tr_explanation"])
-            )
-        
-        # English
-        if result.get("en_explanation"):
+        cur.execute(
+            "SELECT prompt_hash, tr_text, en_text FROM llm_highlight_cache WHERE prompt_hash = ANY(%s)",
+            (list(set(hashes.values())),)
+        )
+        cached = {h: {"tr_explanation": tr, "en_explanation": en} for h, tr, en in cur.fetchall()}
+    return {anomaly_id: cached[h] for anomaly_id, h in hashes.items() if h in cached}
+
+
+def cache_highlight_results(
+    conn: psycopg.Connection,
+    prompts: dict[int, str],
+    results: dict[int, dict]
+) -> None:
+    """
+    Store LLM results for highlight prompts (no commit).
+    
+    Failed calls and results missing a language are not cached, so they
+    are retried next time.
+    
+    Args:
+        conn: Database connection
+        prompts: Dict mapping anomaly_id -> prompt
+        results: Dict mapping anomaly_id -> LLM result
+    """
+    rows = {
+        highlight_prompt_hash(prompts[anomaly_id]): (r["tr_explanation"], r["en_explanation"])
+        for anomaly_id, r in results.items()
+        if not r.get("error") and r.get("tr_explanation") and r.get("en_explanation")
+    }
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO llm_highlight_cache (prompt_hash, tr_text, en_text)
+            SELECT * FROM unnest(%s::text[], %s::text[], %s::text[])
+            ON CONFLICT (prompt_hash) DO NOTHING
+            """,
+            (list(rows), [tr for tr, _ in rows.values()], [en for _, en in rows.values()])
+        )
+
+
+def _store_highlights(conn: psycopg.Connection, results: dict[int, dict]) -> dict[int, dict]:
+    """
+    Upsert LLM results' highlights in one statement (no commit).
+    
+    Args:
+        conn: Database connection
+        results: Dict mapping anomaly_id -> LLM result
+    
+    Returns:
+        Dict mapping anomaly_id -> stored highlights by language (languages
+        the LLM left empty are absent)
+    """
+    highlights = {
+        anomaly_id: {
+            lang: result[key]
+            for lang, key in (("tr", "tr_explanation"), ("en", "en_explanation"))
+            if result.get(key)
+        }
+        for anomaly_id, result in results.items()
+    }
+    rows = [
+        (anomaly_id, lang, text)
+        for anomaly_id, by_lang in highlights.items()
+        for lang, text in by_lang.items()
+    ]
+    if rows:
+        with conn.cursor() as cur:
             cur.execute(
                 """
                 INSERT INTO anomaly_highlights (anomaly_id, language, text)
-                VALUES (%s, 'en', %s)
+                SELECT * FROM unnest(%s::bigint[], %s::text[], %s::text[])
                 ON CONFLICT (anomaly_id, language) DO UPDATE SET text = EXCLUDED.text
                 """,
-                (anomaly_id, result["en_explanation"])
+                ([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
             )
-        
-        conn.commit()
+    return highlights
+
+
+def generate_highlight_for_anomaly(
+    conn: psycopg.Connection,
+    anomaly_id: int,
+    llm_func=None
+) -> Optional[dict]:
+    """
+    Generate and store highlights for a single anomaly.
     
-    return True
+    The model is only called when the prompt's result is not cached (see
+    highlight_prompt_hash); results of a custom llm_func are not cached.
+    
+    Args:
+        conn: Database connection
+        anomaly_id: ID of the anomaly
+        llm_func: Optional LLM function (for testing)
+    
+    Returns:
+        dict: The stored highlights by language (e.g. {"tr": "...", "en": "..."};
+        languages the LLM left empty are absent), or None if the anomaly
+        does not exist
+    """
+    prompt = _highlight_prompt(conn, anomaly_id)
+    if prompt is None:
+        return None
+    
+    if llm_func is None:
+        prompts = {anomaly_id: prompt}
+        result = get_cached_highlight_results(conn, prompts).get(anomaly_id)
+        if result is None:
+            result = call_reasoning_llm(prompt)
+            cache_highlight_results(conn, prompts, {anomaly_id: result})
+    else:
+        result = llm_func(prompt)
+    
+    # Store highlights (returned as written, so callers need not re-query)
+    highlights = _store_highlights(conn, {anomaly_id: result})[anomaly_id]
+    conn.commit()
+    return highlights
+
+
+def generate_highlights_for_anomalies(
+    conn: psycopg.Connection,
+    anomaly_ids: list[int],
+    llm_func=None,
+    max_workers: int = 10
+) -> dict[int, dict]:
+    """
+    Generate and store highlights for a set of anomalies.
+    
+    Prompt inputs are fetched in bulk and results stored on `conn` in one
+    statement; only the LLM calls run in a thread pool, so up to
+    `max_workers` requests overlap without sharing the connection across
+    threads. With the default LLM, cached prompt results skip the call (see
+    highlight_prompt_hash). Everything is committed once at the end.
+    
+    Args:
+        conn: Database connection
+        anomaly_ids: IDs of the anomalies
+        llm_func: Optional LLM function (for testing)
+        max_workers: Maximum concurrent LLM calls
+    
+    Returns:
+        Dict mapping anomaly_id -> stored highlights by language; anomalies
+        that do not exist or whose LLM call failed are absent
+    """
+    prompts = _highlight_prompts(conn, anomaly_ids)
+    if not prompts:
+        return {}
+    
+    cached = {}
+    if llm_func is None:
+        llm_func = call_reasoning_llm
+        cached = get_cached_highlight_results(conn, prompts)
+    
+    fresh = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(llm_func, prompt): anomaly_id
+            for anomaly_id, prompt in prompts.items()
+            if anomaly_id not in cached
+        }
+        for future in as_completed(futures):
+            anomaly_id = futures[future]
+            try:
+                fresh[anomaly_id] = future.result()
+            except Exception as e:
+                log.warning("Error generating highlights for anomaly %s: %s", anomaly_id, e)
+    
+    generated = _store_highlights(conn, {**cached, **fresh})
+    if llm_func is call_reasoning_llm:
+        cache_highlight_results(conn, prompts, fresh)
+    conn.commit()
+    return generated
+
+
+def generate_highlights_for_anomalies_batch(
+    conn: psycopg.Connection,
+    anomaly_ids: list[int],
+    batch_func=None
+) -> dict[int, dict]:
+    """
+    Generate and store highlights for a set of anomalies via the Batch API.
+    
+    Same inputs and storage as generate_highlights_for_anomalies, but all
+    prompts go out as one batch (custom_id "anomaly:<id>") at batch pricing.
+    This blocks until the batch finishes, so use it for bulk jobs only.
+    With the default batch runner, cached prompt results are not resubmitted.
+    
+    Args:
+        conn: Database connection
+        anomaly_ids: IDs of the anomalies
+        batch_func: Optional function taking {custom_id: request body} and
+            returning {custom_id: output text} (for testing)
+    
+    Returns:
+        Dict mapping anomaly_id -> stored highlights by language; anomalies
+        that do not exist or whose request failed are absent
+    """
+    prompts = _highlight_prompts(conn, anomaly_ids)
+    if not prompts:
+        return {}
+    
+    cached = {}
+    if batch_func is None:
+        batch_func = run_response_batch
+        cached = get_cached_highlight_results(conn, prompts)
+    
+    outputs = batch_func({
+        f"anomaly:{anomaly_id}": {"input": prompt, **HIGHLIGHT_REQUEST_PARAMS}
+        for anomaly_id, prompt in prompts.items()
+        if anomaly_id not in cached
+    })
+    
+    fresh = {}
+    for anomaly_id in prompts:
+        if anomaly_id in cached:
+            continue
+        raw_text = outputs.get(f"anomaly:{anomaly_id}")
+        if raw_text is None:
+            log.warning("Error generating highlights for anomaly %s: no batch result", anomaly_id)
+            continue
+        fresh[anomaly_id] = parse_highlight_response(raw_text)
+    
+    generated = _store_highlights(conn, {**cached, **fresh})
+    if batch_func is run_response_batch:
+        cache_highlight_results(conn, prompts, fresh)
+    conn.commit()
+    return generated
 
 
 def generate_highlights_for_new_anomalies(
     conn: psycopg.Connection,
     company_id: Optional[UUID] = None,
     batch_size: int = 200,
-    llm_func=None
+    llm_func=None,
+    max_concurrency: int = 10,
+    anomalies_per_request: int = 5
 ) -> int:
     """
     Generate highlights for anomalies that don't have them yet.
     
+    Payloads are built with bulk lookups and uncached anomalies are sent
+    `anomalies_per_request` at a time (one prompt, shared instructions).
+    The requests run concurrently on one AsyncOpenAI client (at most
+    `max_concurrency` in flight). Cached prompt results skip the call (see
+    highlight_prompt_hash). Results are stored on `conn` and committed once
+    at the end; anomalies the model returned no result for are left for
+    the next run.
+    
     Args:
         conn: Database connection
         company_id: Optional company filter
         batch_size: Maximum anomalies to process
-        llm_func: Optional LLM function (for testing)
+        llm_func: Optional synchronous LLM function (for testing); its calls
+            run in a thread pool instead
+        max_concurrency: Maximum concurrent LLM requests
+        anomalies_per_request: Anomalies explained per LLM request
     
     Returns:
         int: Number of anomalies processed
@@ -359,7 +823,7 @@ def generate_highlights_for_new_anomalies(
     
     if company_id:
         query += " AND a.company_id = %s"
-        params.append(str(company_id))
+        params.append(company_id)
     
     query += " ORDER BY a.severity_score DESC LIMIT %s"
     params.append(batch_size)
@@ -368,16 +832,40 @@ def generate_highlights_for_new_anomalies(
         cur.execute(query, params)
         anomaly_ids = [row[0] for row in cur.fetchall()]
     
-    count = 0
-    for anomaly_id in anomaly_ids:
-        try:
-            if generate_highlight_for_anomaly(conn, anomaly_id, llm_func):
-                count += 1
-                print(f"Generated highlights for anomaly {anomaly_id}")
-        except Exception as e:
-            print(f"Error generating highlights for anomaly {anomaly_id}: {e}")
-    
-    return count
+    if llm_func is not None:
+        return len(generate_highlights_for_anomalies(
+            conn, anomaly_ids, llm_func=llm_func, max_workers=max_concurrency
+        ))
+    
+    payloads = _highlight_payloads(conn, anomaly_ids)
+    if not payloads:
+        return 0
+    
+    # Cache keys are the single-anomaly prompts, whichever way they are sent
+    prompts = {anomaly_id: build_prompt(payload) for anomaly_id, payload in payloads.items()}
+    results = get_cached_highlight_results(conn, prompts)
+    pending = [anomaly_id for anomaly_id in payloads if anomaly_id not in results]
+    if pending:
+        chunks = [
+            pending[i:i + anomalies_per_request]
+            for i in range(0, len(pending), anomalies_per_request)
+        ]
+        chunk_results = run_sync(_call_reasoning_llm_concurrently(
+            [[payloads[anomaly_id] for anomaly_id in chunk] for chunk in chunks],
+            max_concurrency,
+        ))
+        fresh = {
+            anomaly_id: result
+            for chunk, chunk_result in zip(chunks, chunk_results)
+            for anomaly_id, result in zip(chunk, chunk_result)
+            if result is not None
+        }
+        cache_highlight_results(conn, prompts, fresh)
+        results.update(fresh)
+    _store_highlights(conn, results)
+    conn.commit()
+    log.info("Generated highlights for %d anomalies", len(results))
+    return len(results)
 
 
 def get_highlights_for_anomaly(
@@ -401,7 +889,8 @@ def get_highlights_for_anomaly(
             FROM anomaly_highlights
             WHERE anomaly_id = %s
             """,
-            (anomaly_id,)
+            (anomaly_id,),
+            prepare=True
         )
         rows = cur.fetchall()
     
@@ -411,3 +900,39 @@ def get_highlights_for_anomaly(
             result[lang] = text
     
     return result
+
+
+def get_highlights_for_anomalies(
+    conn: psycopg.Connection,
+    anomaly_ids: list[int]
+) -> dict[int, dict]:
+    """
+    Get highlights for many anomalies in one query.
+    
+    Args:
+        conn: Database connection
+        anomaly_ids: IDs of the anomalies
+    
+    Returns:
+        Dict mapping anomaly_id -> {"tr": "...", "en": "..."} (empty strings
+        if not found) for every requested anomaly
+    """
+    result = {anomaly_id: {"tr": "", "en": ""} for anomaly_id in anomaly_ids}
+    if not anomaly_ids:
+        return result
+    
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT anomaly_id, language, text
+            FROM anomaly_highlights
+            WHERE anomaly_id = ANY(%s)
+            """,
+            (list(anomaly_ids),),
+            prepare=True
+        )
+        for anomaly_id, lang, text in cur.fetchall():
+            if lang in result[anomaly_id]:
+                result[anomaly_id][lang] = text
+    
+    return result
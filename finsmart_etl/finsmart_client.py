@@ -4,8 +4,13 @@ HTTP client for Finsmart-style API.
 Handles authentication and data retrieval from the external financial data source.
 """
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from typing import Optional, Union
+from urllib3.util.retry import Retry
 
 
 class FinsmartClientError(Exception):
@@ -17,13 +22,26 @@ class FinsmartClient:
     """
     HTTP client for Finsmart API.
     
+    Requests share one keep-alive session, so consecutive calls reuse the
+    TCP/TLS connection; 429 and 5xx responses and connection errors are
+    retried with exponential backoff. Close the client (or use it as a
+    context manager) to release the connections.
+    
     Usage:
-        client = FinsmartClient(base_url, api_key, password)
-        token = client.login()
-        data = client.analyze_data(token, company_guid)
+        with FinsmartClient(base_url, api_key, password) as client:
+            token = client.login()
+            data = client.analyze_data(token, company_guid)
     """
     
-    def __init__(self, base_url: str, api_key: str, password: str, timeout: int = 60):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        password: str,
+        timeout: int = 60,
+        max_retries: int = 3,
+        pool_maxsize: int = 10
+    ):
         """
         Initialize the Finsmart client.
         
@@ -32,12 +50,44 @@ class FinsmartClient:
             api_key: API key for authentication
             password: Password for authentication
             timeout: Request timeout in seconds
+            max_retries: Retries for transient failures (429, 5xx, connection errors)
+            pool_maxsize: Connections kept alive per host
         """
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.password = password
         self.timeout = timeout
         self._token: Optional[str] = None
+        
+        self.max_retries = max_retries
+        self._session = self._create_session(pool_maxsize)
+    
+    def _create_session(self, pool_maxsize: int) -> requests.Session:
+        """Create a keep-alive session that retries transient failures."""
+        # Both endpoints are POST but read-only, so retrying them is safe;
+        # the last response is returned so raise_for_status reports it
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        )
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    
+    def close(self) -> None:
+        """Close the session and its pooled connections."""
+        self._session.close()
+    
+    def __enter__(self) -> "FinsmartClient":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
     
     def login(self) -> str:
         """
@@ -58,7 +108,7 @@ class FinsmartClient:
         }
         
         try:
-            response = requests.post(url, json=payload, timeout=self.timeout)
+            response = self._session.post(url, json=payload, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             
@@ -93,35 +143,118 @@ class FinsmartClient:
         Raises:
             FinsmartClientError: If the request fails.
         """
-        url = f"{self.base_url}/ai-insight/analyze-data"
-        headers = {"Authorization": f"Bearer {token}"}
-        payload = {"CompanyGuid": company_guid}
+        try:
+            return self._post_analyze(self._session, token, company_guid).json()
+            
+        except requests.exceptions.RequestException as e:
+            raise FinsmartClientError(f"analyze_data failed: {e}") from e
+    
+    def analyze_data_raw(self, token: str, company_guid: str) -> bytes:
+        """
+        Fetch financial data for a company as the undecoded response body.
+        
+        Same request as analyze_data(), but the JSON is not parsed: callers
+        that only store the payload (the database parses it) skip building
+        a Python object for every reportData row.
+        
+        Args:
+            token: Bearer token from login()
+            company_guid: Company GUID to fetch data for
         
+        Returns:
+            bytes: UTF-8 JSON response body.
+        
+        Raises:
+            FinsmartClientError: If the request fails.
+        """
         try:
-            response = requests.post(
-                url, 
-                json=payload, 
-                headers=headers, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._post_analyze(self._session, token, company_guid).content
             
         except requests.exceptions.RequestException as e:
             raise FinsmartClientError(f"analyze_data failed: {e}") from e
     
-    def fetch_company_data(self, company_guid: str) -> dict:
+    def _post_analyze(
+        self,
+        session: requests.Session,
+        token: str,
+        company_guid: str
+    ) -> requests.Response:
+        """POST /ai-insight/analyze-data on `session` and raise for HTTP errors."""
+        response = session.post(
+            f"{self.base_url}/ai-insight/analyze-data",
+            json={"CompanyGuid": company_guid},
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response
+    
+    def fetch_company_data(self, company_guid: str, raw: bool = False) -> Union[dict, bytes]:
         """
         Convenience method: login + analyze_data in one call.
         
         Args:
             company_guid: Company GUID to fetch data for
+            raw: If True, return the undecoded response body (analyze_data_raw)
         
         Returns:
-            dict: Parsed JSON response containing financial data.
+            dict: Parsed JSON response containing financial data (bytes if raw).
         """
         token = self.login()
+        if raw:
+            return self.analyze_data_raw(token, company_guid)
         return self.analyze_data(token, company_guid)
+    
+    def fetch_companies_data(
+        self,
+        company_guids: list[str],
+        raw: bool = False,
+        max_workers: int = 8
+    ) -> dict[str, Union[dict, bytes]]:
+        """
+        Fetch data for many companies with one login and overlapping requests.
+        
+        The analyze-data calls run in a thread pool. requests.Session is not
+        documented as thread-safe, so each worker thread gets its own
+        keep-alive session (reused for all of that thread's companies)
+        sharing the one token. N companies take about N / max_workers request
+        durations instead of N logins plus N sequential fetches.
+        
+        Args:
+            company_guids: Company GUIDs to fetch data for
+            raw: If True, return undecoded response bodies (analyze_data_raw)
+            max_workers: Maximum concurrent requests
+        
+        Returns:
+            Dict mapping company GUID -> response data, in input order.
+        
+        Raises:
+            FinsmartClientError: If the login or any company's request fails.
+        """
+        if not company_guids:
+            return {}
+        token = self.login()
+        
+        local = threading.local()
+        sessions = []
+        
+        def fetch(company_guid: str) -> Union[dict, bytes]:
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = self._create_session(pool_maxsize=1)
+                sessions.append(session)
+            try:
+                response = self._post_analyze(session, token, company_guid)
+                return response.content if raw else response.json()
+            except requests.exceptions.RequestException as e:
+                raise FinsmartClientError(f"analyze_data failed: {e}") from e
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return dict(zip(company_guids, executor.map(fetch, company_guids)))
+        finally:
+            for session in sessions:
+                session.close()
 
 
 # Factory function for dependency injection
@@ -0,0 +1,164 @@
+"""
+Background compute jobs.
+
+Provides:
+- In-process queue running the monthly compute pipeline off the caller's path
+- Job status lookups for polling clients
+
+Jobs run on a small thread pool and borrow connections from the shared
+pool, so a caller (UI request, agent) can return a "computing" view right
+away and rebuild the view once the job is done. Status lives in process
+memory; requests for a company-month that is already queued or running
+share the existing job.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import Optional
+from uuid import UUID, uuid4
+
+from .db import get_pool
+
+log = logging.getLogger(__name__)
+
+COMPUTE_WORKERS = 2
+JOB_HISTORY_SIZE = 256  # finished jobs kept for status lookups
+
+_executor: Optional[ThreadPoolExecutor] = None
+_jobs: dict[str, dict] = {}
+_futures: dict[str, Future] = {}
+_active: dict[tuple[str, date], str] = {}
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the worker pool (lazy initialization)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=COMPUTE_WORKERS, thread_name_prefix="compute")
+    return _executor
+
+
+def enqueue_compute(
+    company_id: UUID,
+    month: date,
+    generate_highlights: bool = True
+) -> str:
+    """
+    Queue the compute pipeline for a company and month.
+
+    Args:
+        company_id: Company GUID (primary key)
+        month: Target month (will be normalized to first of month)
+        generate_highlights: If True, also generate highlights
+
+    Returns:
+        str: Job ID (an existing one if this company-month is already
+        queued or running)
+    """
+    month = month.replace(day=1)
+    key = (str(company_id), month)
+
+    with _lock:
+        if key in _active:
+            return _active[key]
+
+        job_id = uuid4().hex
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "company_id": str(company_id),
+            "month": month.strftime("%Y-%m"),
+            "status": "queued",
+            "stage": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None,
+        }
+        _active[key] = job_id
+        _futures[job_id] = _get_executor().submit(
+            _run_compute, job_id, key, company_id, month, generate_highlights
+        )
+        _prune_history()
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """
+    Get a snapshot of a job's status.
+
+    Args:
+        job_id: ID returned by enqueue_compute
+
+    Returns:
+        dict with status ("queued", "running", "done" or "failed"), current
+        stage and error, or None for an unknown job
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def wait_for_job(job_id: str, timeout: Optional[float] = None) -> Optional[dict]:
+    """
+    Block until a job finishes (for CLIs and tests).
+
+    Args:
+        job_id: ID returned by enqueue_compute
+        timeout: Seconds to wait (None = no limit)
+
+    Returns:
+        The job's final status snapshot, or None for an unknown job
+    """
+    future = _futures.get(job_id)
+    if future is not None:
+        future.result(timeout=timeout)
+    return get_job(job_id)
+
+
+def _run_compute(
+    job_id: str,
+    key: tuple[str, date],
+    company_id: UUID,
+    month: date,
+    generate_highlights: bool
+) -> None:
+    """Worker body: run the pipeline and record its outcome on the job."""
+    from .cfo_view import run_compute_pipeline
+
+    def on_stage(stage: str) -> None:
+        _update(job_id, stage=stage)
+
+    _update(job_id, status="running")
+    try:
+        pool = get_pool()
+        with pool.connection() as conn:
+            run_compute_pipeline(
+                conn, company_id, month,
+                generate_highlights=generate_highlights,
+                pool=pool,
+                on_stage=on_stage,
+            )
+        _update(job_id, status="done", finished_at=time.time())
+    except Exception as e:
+        log.warning("[Jobs] ✗ Compute job %s failed: %s", job_id, e)
+        _update(job_id, status="failed", error=str(e), finished_at=time.time())
+    finally:
+        with _lock:
+            _active.pop(key, None)
+            _futures.pop(job_id, None)
+
+
+def _update(job_id: str, **fields) -> None:
+    """Update a job's status fields."""
+    with _lock:
+        _jobs[job_id].update(fields)
+
+
+def _prune_history() -> None:
+    """Drop the oldest finished jobs beyond JOB_HISTORY_SIZE (caller holds the lock)."""
+    finished = [job_id for job_id, job in _jobs.items() if job["finished_at"] is not None]
+    for job_id in finished[:max(0, len(finished) - JOB_HISTORY_SIZE)]:
+        del _jobs[job_id]
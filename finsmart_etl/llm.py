@@ -0,0 +1,311 @@
+"""
+Shared OpenAI client.
+
+Provides:
+- Lazy-initialized, process-wide OpenAI client
+- Factory for identically configured async clients
+- Runner for async LLM fan-out from synchronous code
+- Batch API helper for running many Responses API requests offline
+- Output text extraction from raw Responses API bodies
+- Tolerant JSON parsing of model output
+- Compact JSON serialization for prompts
+
+The client owns an HTTP connection pool, so reusing one instance keeps TLS
+sessions and keep-alive sockets warm across every LLM call in the process.
+Rate limits (429), 5xx responses and connection errors are retried by the
+SDK with exponential backoff and jitter, up to OPENAI_MAX_RETRIES times.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Optional, TypeVar
+
+import jiter
+from openai import AsyncOpenAI, OpenAI
+
+from .config import get_config
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used when not installed
+    orjson = None
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Module-level client (lazily initialized)
+_client: Optional[OpenAI] = None
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Get or create the shared OpenAI client (lazy initialization).
+
+    Returns:
+        OpenAI: The process-wide OpenAI client.
+    """
+    global _client
+    if _client is None:
+        config = get_config()
+        _client = OpenAI(
+            api_key=config.openai_api_key,
+            max_retries=config.openai_max_retries,
+        )
+    return _client
+
+
+def create_async_openai_client() -> AsyncOpenAI:
+    """
+    Create an AsyncOpenAI client configured like the shared client.
+    
+    Async clients hold connections bound to the event loop they run on, so
+    they are not shared process-wide: create one inside the running loop
+    and use it as an async context manager so it is closed with the loop.
+    
+    Returns:
+        AsyncOpenAI: A new async client.
+    """
+    config = get_config()
+    return AsyncOpenAI(
+        api_key=config.openai_api_key,
+        max_retries=config.openai_max_retries,
+    )
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    Uses asyncio.run when the calling thread has no event loop. Inside a
+    running loop (e.g. a sync helper called from async code) asyncio.run
+    would fail, so the coroutine runs on a fresh loop in a dedicated thread
+    instead; this blocks the caller's loop until it finishes, so async code
+    should await the async entry points directly.
+    
+    Args:
+        coro: Coroutine to run
+    
+    Returns:
+        The coroutine's result.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def close_openai_client() -> None:
+    """Close the shared OpenAI client and its connection pool."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+# Constrains Responses API output to a single JSON object (no markdown
+# fences); the prompt must mention JSON
+JSON_TEXT_FORMAT = {"type": "json_object"}
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_JSON_DECODER = json.JSONDecoder()
+
+
+def parse_llm_json(raw_text: str) -> Any:
+    """
+    Parse the first JSON value in model output.
+    
+    Tolerates markdown fences (any language tag) and prose around the
+    value, trailing commas, and output truncated mid-string.
+    
+    Args:
+        raw_text: Model output text
+    
+    Returns:
+        The parsed JSON value
+    
+    Raises:
+        json.JSONDecodeError: If no JSON value can be recovered
+    """
+    starts = [i for i in (raw_text.find("{"), raw_text.find("[")) if i >= 0]
+    if not starts:
+        raise json.JSONDecodeError("No JSON value found", raw_text, 0)
+    text = raw_text[min(starts):]
+    
+    try:
+        # raw_decode stops at the end of the value, ignoring what follows
+        return _JSON_DECODER.raw_decode(text)[0]
+    except json.JSONDecodeError as e:
+        error = e
+    
+    text = _TRAILING_COMMA.sub(r"\1", text.rstrip().removesuffix("```").rstrip())
+    try:
+        return _JSON_DECODER.raw_decode(text)[0]
+    except json.JSONDecodeError:
+        pass
+    
+    # Truncated output: close open strings, arrays and objects
+    try:
+        return jiter.from_json(text.encode("utf-8"), partial_mode="trailing-strings")
+    except ValueError:
+        raise error from None
+
+
+def prompt_json(value: Any) -> str:
+    """
+    Serialize data for embedding in a prompt.
+    
+    Compact separators and no indentation: whitespace costs prompt tokens
+    without helping the model. Non-ASCII text stays literal, which
+    tokenizes far shorter than \\u escapes.
+    
+    Args:
+        value: JSON-serializable data
+    
+    Returns:
+        str: Compact JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+BATCH_ENDPOINT = "/v1/responses"
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_file(bodies: dict[str, dict]) -> bytes:
+    """
+    Build a Batch API input file.
+    
+    Args:
+        bodies: Dict mapping custom_id -> Responses API request body
+    
+    Returns:
+        bytes: JSONL content, one request per line
+    """
+    lines = [
+        json.dumps(
+            {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+            ensure_ascii=False,
+        )
+        for custom_id, body in bodies.items()
+    ]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def parse_batch_output(content: str) -> dict[str, str]:
+    """
+    Extract output text from a Batch API result file.
+    
+    Args:
+        content: JSONL content of the batch output file
+    
+    Returns:
+        Dict mapping custom_id -> output text; failed requests are absent
+    """
+    outputs = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            log.warning("Batch request %s failed: %s", item.get("custom_id"), item.get("error"))
+            continue
+        outputs[item["custom_id"]] = _output_text(response["body"])
+    return outputs
+
+
+def _output_text(body: dict) -> str:
+    """Join the output_text parts of a raw Responses API body."""
+    # Raw bodies carry no output_text shortcut; join the text parts of the
+    # message items the way the SDK property does
+    return "".join(
+        part.get("text", "")
+        for output in body.get("output", [])
+        if output.get("type") == "message"
+        for part in output.get("content", [])
+        if part.get("type") == "output_text"
+    )
+
+
+def response_output_text(content: bytes) -> str:
+    """
+    Extract the output text from a raw Responses API HTTP body.
+    
+    Used with `client.responses.with_raw_response.create(...)`, which keeps
+    the SDK's retries and connection pool but skips building the pydantic
+    response model; only the text is needed.
+    
+    Args:
+        content: Response body bytes
+    
+    Returns:
+        str: Concatenated output text
+    """
+    return _output_text(jiter.from_json(content))
+
+
+def run_response_batch(
+    bodies: dict[str, dict],
+    poll_interval: float = 5.0,
+    max_poll_interval: float = 300.0,
+    timeout: float = 24 * 3600,
+    client: Optional[OpenAI] = None
+) -> dict[str, str]:
+    """
+    Run Responses API requests through the Batch API and wait for the results.
+    
+    Batched requests are billed at half price but may take up to the 24h
+    completion window, so this suits bulk jobs rather than interactive use.
+    Status is polled with exponential backoff from `poll_interval` up to
+    `max_poll_interval` seconds.
+    
+    Args:
+        bodies: Dict mapping custom_id -> Responses API request body
+        poll_interval: Initial seconds between status checks
+        max_poll_interval: Upper bound on seconds between status checks
+        timeout: Seconds to wait before giving up on the batch
+        client: Optional OpenAI client (defaults to the shared client)
+    
+    Returns:
+        Dict mapping custom_id -> output text; failed requests are absent
+    
+    Raises:
+        RuntimeError: If the batch fails, expires, is cancelled or times out
+    """
+    if not bodies:
+        return {}
+    client = client or get_openai_client()
+    
+    input_file = client.files.create(
+        file=("batch.jsonl", build_batch_file(bodies)),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    
+    deadline = time.monotonic() + timeout
+    delay = poll_interval
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        if time.monotonic() + delay > deadline:
+            raise RuntimeError(f"Batch {batch.id} did not finish within {timeout:.0f}s (status: {batch.status})")
+        time.sleep(delay)
+        delay = min(delay * 2, max_poll_interval)
+        batch = client.batches.retrieve(batch.id)
+    
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+    if not batch.output_file_id:
+        return {}
+    return parse_batch_output(client.files.content(batch.output_file_id).text)
@@ -4,12 +4,13 @@ Metrics Computation (Gold Layer): Compute monthly KPIs from transactions.
 Defines metric definitions and computes aggregated KPIs per month.
 """
 
-import json
 from dataclasses import dataclass
+from datetime import date
 from typing import Optional
 from uuid import UUID
 
 import psycopg
+from psycopg.types.json import Jsonb
 
 
 @dataclass
@@ -145,7 +146,7 @@ def compute_single_metric(
             month,
             %s AS metric_name,
             COALESCE(SUM(amount), 0) AS value,
-            %s::jsonb AS meta
+            %s AS meta
         FROM transactions
         WHERE company_id = %s
           AND {metric.sql_filter}
@@ -164,16 +165,74 @@ def compute_single_metric(
     }
     
     with conn.cursor() as cur:
-        cur.execute(query, (metric.name, json.dumps(meta), str(company_id)))
+        # Jsonb goes through the dumper configured in db.py (orjson when installed)
+        cur.execute(query, (metric.name, Jsonb(meta), company_id))
         rows = cur.fetchall()
         conn.commit()
         return len(rows)
 
 
+def _build_monthly_kpis_query(metrics: list[MetricDefinition]) -> tuple[str, list]:
+    """
+    Build the single-pass KPI upsert for `metrics` and its per-metric params.
+    
+    One scan of the company's transactions aggregates every metric with
+    FILTER clauses; a LATERAL VALUES list then unpivots the columns into
+    one row per (month, metric). A metric only gets a row for months with
+    at least one matching transaction, as with compute_single_metric.
+    """
+    aggregates = ",\n".join(
+        f"""                COUNT(*) FILTER (WHERE {m.sql_filter}) AS n{i},
+                COALESCE(SUM(amount) FILTER (WHERE {m.sql_filter}), 0) AS v{i}"""
+        for i, m in enumerate(metrics)
+    )
+    rows = ",\n".join(
+        f"            (%s::text, m.v{i}, m.n{i}, %s::jsonb)" for i in range(len(metrics))
+    )
+    query = f"""
+        WITH m AS (
+            SELECT
+                company_id,
+                month,
+{aggregates}
+            FROM transactions
+            WHERE company_id = %s
+            GROUP BY company_id, month
+        )
+        INSERT INTO monthly_kpis (company_id, month, metric_name, value, meta)
+        SELECT m.company_id, m.month, k.metric_name, k.value, k.meta
+        FROM m
+        CROSS JOIN LATERAL (VALUES
+{rows}
+        ) AS k(metric_name, value, n, meta)
+        WHERE k.n > 0
+        ON CONFLICT (company_id, month, metric_name)
+        DO UPDATE SET
+            value = EXCLUDED.value,
+            meta = EXCLUDED.meta
+        RETURNING metric_name
+    """
+    params = []
+    for m in metrics:
+        params += [m.name, Jsonb({
+            "description": m.description,
+            "sql_filter": m.sql_filter,
+            "is_revenue": m.is_revenue,
+        })]
+    return query, params
+
+
+# Generated from METRIC_DEFINITIONS at import, so new metrics are included
+_MONTHLY_KPIS_QUERY, _MONTHLY_KPIS_PARAMS = _build_monthly_kpis_query(METRIC_DEFINITIONS)
+
+
 def compute_monthly_kpis(conn: psycopg.Connection, company_id: UUID) -> dict[str, int]:
     """
     Compute all monthly KPIs for a company.
     
+    Every metric is computed in one statement with a single scan of the
+    company's transactions, and committed once.
+    
     Args:
         conn: Database connection
         company_id: Company GUID
@@ -181,13 +240,18 @@ def compute_monthly_kpis(conn: psycopg.Connection, company_id: UUID) -> dict[str
     Returns:
         dict: Metric name -> number of rows upserted
     """
-    results = {}
-    for metric in METRIC_DEFINITIONS:
-        count = compute_single_metric(conn, company_id, metric)
-        results[metric.name] = count
-        if count > 0:
-            print(f"  Computed {metric.name}: {count} months")
+    results = {metric.name: 0 for metric in METRIC_DEFINITIONS}
+    with conn.cursor() as cur:
+        cur.execute(
+            _MONTHLY_KPIS_QUERY, (company_id, *_MONTHLY_KPIS_PARAMS), prepare=True
+        )
+        for (metric_name,) in cur.fetchall():
+            results[metric_name] += 1
+    conn.commit()
     
+    for metric_name, count in results.items():
+        if count > 0:
+            print(f"  Computed {metric_name}: {count} months")
     return results
 
 
@@ -226,7 +290,7 @@ def compute_total_revenue(conn: psycopg.Connection, company_id: UUID) -> int:
     """
     
     with conn.cursor() as cur:
-        cur.execute(query, (str(company_id), *revenue_metrics))
+        cur.execute(query, (company_id, *revenue_metrics))
         rows = cur.fetchall()
         conn.commit()
         return len(rows)
@@ -267,7 +331,7 @@ def compute_total_expenses(conn: psycopg.Connection, company_id: UUID) -> int:
     """
     
     with conn.cursor() as cur:
-        cur.execute(query, (str(company_id), *expense_metrics))
+        cur.execute(query, (company_id, *expense_metrics))
         rows = cur.fetchall()
         conn.commit()
         return len(rows)
@@ -276,7 +340,7 @@ def compute_total_expenses(conn: psycopg.Connection, company_id: UUID) -> int:
 def get_kpis_for_month(
     conn: psycopg.Connection,
     company_id: UUID,
-    month: str  # YYYY-MM-DD format (first of month)
+    month: date
 ) -> list[dict]:
     """
     Get all KPIs for a specific month.
@@ -284,22 +348,23 @@ def get_kpis_for_month(
     Args:
         conn: Database connection
         company_id: Internal company UUID
-        month: Month as string (YYYY-MM-DD, first of month)
+        month: Month (first day)
     
     Returns:
         List of KPI dictionaries
     """
-    with conn.cursor() as cur:
+    with conn.cursor(binary=True) as cur:
         cur.execute(
             """
-            SELECT metric_name, value, meta
+            SELECT metric_name, value::float8, meta
             FROM monthly_kpis
             WHERE company_id = %s AND month = %s
             ORDER BY metric_name
             """,
-            (str(company_id), month)
+            (company_id, month),
+            prepare=True
         )
         return [
-            {"metric_name": row[0], "value": float(row[1]), "meta": row[2]}
-            for row in cur.fetchall()
+            {"metric_name": metric_name, "value": value, "meta": meta}
+            for metric_name, value, meta in cur
         ]
@@ -10,7 +10,10 @@ Commands:
 
 import argparse
 import json
+import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from datetime import date, datetime
 from uuid import UUID
 
@@ -20,12 +23,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from .config import get_config
-from .db import get_conn, ping, close_pool
+from .db import get_conn, get_pool, ping, close_pool
 from .finsmart_client import FinsmartClient
 from .etl_raw import get_or_create_company, ensure_raw_report, load_from_file
 from .etl_normalize import normalize_raw_report, normalize_all_pending
 from .metrics import compute_monthly_kpis
-from .anomalies import detect_anomalies, get_anomalies_for_month, build_detection_prompt
+from .anomalies import ANOMALY_COLUMNS, detect_anomalies, get_anomalies_for_month, build_detection_prompt
 from .contributors import compute_contributors_for_company
 from .explanations import (
     generate_highlights_for_new_anomalies,
@@ -34,6 +37,7 @@ from .explanations import (
 )
 from .cfo_view import (
     build_cfo_month_view,
+    build_cfo_month_view_readonly,
     get_company_by_guid,
     get_available_months,
     get_anomaly_details,
@@ -85,15 +89,15 @@ def run_full_pipeline_for_company_period(
         
         # Step 2: Fetch/ensure raw report
         print("\n[2/7] Fetching raw report (idempotent)...")
-        client = FinsmartClient(
+        with FinsmartClient(
             config.finsmart_base_url,
             config.finsmart_api_key,
             config.finsmart_password
-        )
-        raw_report_id = ensure_raw_report(
-            conn, client, company_id, company_guid,
-            period_start, period_end, force_refresh
-        )
+        ) as client:
+            raw_report_id = ensure_raw_report(
+                conn, client, company_id, company_guid,
+                period_start, period_end, force_refresh
+            )
         
         # Step 3: Normalize transactions
         print("\n[3/7] Normalizing transactions (idempotent)...")
@@ -109,7 +113,7 @@ def run_full_pipeline_for_company_period(
         
         # Step 6: Compute contributors
         print("\n[6/7] Computing anomaly contributors...")
-        contributor_count = compute_contributors_for_company(conn, company_id)
+        contributor_count = compute_contributors_for_company(conn, company_id, autocommit=True)
         
         # Step 7: Generate highlights
         print("\n[7/7] Generating LLM highlights...")
@@ -180,7 +184,7 @@ def run_load_from_file(
         
         # Compute contributors
         print("\n[6/6] Computing contributors...")
-        compute_contributors_for_company(conn, company_id)
+        compute_contributors_for_company(conn, company_id, autocommit=True)
         
         print("\n" + "=" * 60)
         print("Load complete!")
@@ -200,6 +204,7 @@ def print_cfo_month_view_cli(
     generate_highlights: bool = True,
     skip_compute: bool = False,
     output_dir: str = None,
+    batch_mode: bool = False,
 ) -> None:
     """
     Print CFO month view to stdout as JSON and save reports.
@@ -210,6 +215,8 @@ def print_cfo_month_view_cli(
         generate_highlights: Generate LLM highlights
         skip_compute: Skip recomputing KPIs/anomalies
         output_dir: Directory to save report files (optional)
+        batch_mode: Generate highlights and the executive report through
+            the OpenAI Batch API (cheaper, but waits for the batch)
     """
     from .cfo_view import format_report_markdown, save_reports_to_files
     
@@ -232,30 +239,37 @@ def print_cfo_month_view_cli(
         company_id = company["finsmart_guid"]
         company_name = company["name"]
         
-        # Build CFO view
-        view = build_cfo_month_view(
-            conn, company_id, month,
-            ensure_computed=not skip_compute,
-            generate_highlights=generate_highlights
-        )
+        # Build CFO view (pure reads run concurrently when nothing is computed)
+        if skip_compute and not generate_highlights:
+            view = build_cfo_month_view_readonly(get_pool(), company_id, month)
+        else:
+            view = build_cfo_month_view(
+                conn, company_id, month,
+                ensure_computed=not skip_compute,
+                generate_highlights=generate_highlights,
+                pool=get_pool(),
+                batch_mode=batch_mode,
+            )
         
         # Display Markdown reports if executive_report exists
         exec_report = view.get("executive_report")
         if exec_report:
+            markdown = {lang: format_report_markdown(exec_report, lang) for lang in ("tr", "en")}
             print("\n" + "="*80, file=sys.stderr)
             print("TÜRKÇE RAPOR", file=sys.stderr)
             print("="*80, file=sys.stderr)
-            print(format_report_markdown(exec_report, "tr"), file=sys.stderr)
+            print(markdown["tr"], file=sys.stderr)
             
             print("\n" + "="*80, file=sys.stderr)
             print("ENGLISH REPORT", file=sys.stderr)
             print("="*80, file=sys.stderr)
-            print(format_report_markdown(exec_report, "en"), file=sys.stderr)
+            print(markdown["en"], file=sys.stderr)
             
             # Save to files if output_dir specified
             if output_dir:
                 files = save_reports_to_files(
-                    exec_report, company_name, month_short, output_dir
+                    exec_report, company_name, month_short, output_dir,
+                    markdown=markdown,
                 )
                 print(f"\n[CFO View] Reports saved:", file=sys.stderr)
                 print(f"  - Turkish: {files['tr']}", file=sys.stderr)
@@ -315,7 +329,7 @@ def dump_llm_inputs_cli(
         company_id = company["finsmart_guid"]
 
         # Load raw anomalies for the month
-        anomalies = get_anomalies_for_month(conn, company_id, str(month))
+        anomalies = get_anomalies_for_month(conn, company_id, month, columns=ANOMALY_COLUMNS)
 
         anomaly_highlight_prompts = []
         anomaly_detection_prompts = []
@@ -381,6 +395,28 @@ def dump_llm_inputs_cli(
             print(serialized)
 
 
+def configure_logging(level: int = logging.INFO) -> QueueListener:
+    """
+    Route library logging to stderr through a background thread.
+    
+    Callers only enqueue records; the listener thread does the blocking
+    write, so logging never stalls the ETL loop.
+    
+    Returns:
+        QueueListener: The started listener (stop it on shutdown to flush)
+    """
+    log_queue = queue.SimpleQueue()
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, stderr_handler)
+    
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+
 def main():
     """CLI entrypoint."""
     parser = argparse.ArgumentParser(
@@ -428,6 +464,7 @@ Examples:
     view_parser.add_argument("--no-highlights", action="store_true", help="Skip LLM highlight generation")
     view_parser.add_argument("--skip-compute", action="store_true", help="Skip recomputing KPIs/anomalies, just fetch existing")
     view_parser.add_argument("--output-dir", help="Directory to save report files (TR and EN markdown)")
+    view_parser.add_argument("--batch", action="store_true", help="Generate LLM output via the OpenAI Batch API (half price, waits for completion)")
     
     # list-months command
     months_parser = subparsers.add_parser("list-months", help="List available months")
@@ -451,6 +488,7 @@ Examples:
         parser.print_help()
         sys.exit(1)
     
+    log_listener = configure_logging()
     try:
         if args.command == "ping":
             if ping():
@@ -522,10 +560,14 @@ Examples:
                             exec_report = view.get("executive_report")
                             if exec_report:
                                 # Display the full TR and EN reports as continuous text
+                                markdown = {
+                                    lang: format_report_markdown(exec_report, lang)
+                                    for lang in ("tr", "en")
+                                }
                                 print("\n=== CFO EXECUTIVE REPORT (TR) ===")
-                                print(format_report_markdown(exec_report, "tr"))
+                                print(markdown["tr"])
                                 print("\n=== CFO EXECUTIVE REPORT (EN) ===")
-                                print(format_report_markdown(exec_report, "en"))
+                                print(markdown["en"])
 
                                 # Save reports under ./reports with generation date tag
                                 output_dir = os.path.join(os.getcwd(), "reports")
@@ -540,6 +582,7 @@ Examples:
                                     company["name"],
                                     tagged_month,
                                     output_dir,
+                                    markdown=markdown,
                                 )
                                 print("\nReports saved:")
                                 print(f"  - Turkish: {files['tr']}")
@@ -574,6 +617,7 @@ Examples:
                 generate_highlights=not args.no_highlights,
                 skip_compute=args.skip_compute,
                 output_dir=args.output_dir,
+                batch_mode=args.batch,
             )
         
         elif args.command == "list-months":
@@ -594,6 +638,7 @@ Examples:
         sys.exit(1)
     finally:
         close_pool()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -15,9 +15,14 @@ CREATE TABLE IF NOT EXISTS companies (
     finsmart_guid  UUID PRIMARY KEY,
     name           TEXT NOT NULL,
     business_model TEXT,
-    created_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+    created_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+    -- Bumped by triggers on every write to the company's month data (see
+    -- bump_company_data_version); keys the in-process month view cache
+    data_version   BIGINT NOT NULL DEFAULT 0
 );
 
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS data_version BIGINT NOT NULL DEFAULT 0;
+
 -- Raw JSON payloads (append-only audit trail)
 CREATE TABLE IF NOT EXISTS raw_reports (
     id           BIGSERIAL PRIMARY KEY,
@@ -45,7 +50,9 @@ CREATE TABLE IF NOT EXISTS transactions (
     id              BIGSERIAL PRIMARY KEY,
     company_id      UUID NOT NULL REFERENCES companies(finsmart_guid),
     tx_date         DATE NOT NULL,
-    month           DATE NOT NULL,  -- first of month (e.g. 2025-09-01)
+    -- first of month (e.g. 2025-09-01), derived from tx_date on write
+    month           DATE NOT NULL
+                    GENERATED ALWAYS AS (date_trunc('month', tx_date::timestamp)::date) STORED,
     account_code    TEXT NOT NULL,  -- e.g. '2.5.2'
     account_name    TEXT NOT NULL,  -- e.g. 'Advisory'
     coa_code        TEXT,
@@ -53,18 +60,63 @@ CREATE TABLE IF NOT EXISTS transactions (
     description     TEXT,
     customer_name   TEXT,
     amount          NUMERIC(18,2) NOT NULL,
-    source_report_id BIGINT NOT NULL REFERENCES raw_reports(id)
+    source_report_id BIGINT NOT NULL REFERENCES raw_reports(id),
+    line_no         INTEGER  -- 0-based index in the report's reportData (NULL if not loaded from one)
 );
 
--- Indexes for fast querying
-CREATE INDEX IF NOT EXISTS idx_transactions_company_month
-    ON transactions (company_id, month);
+-- Migrate a plain month column to the generated one (dropping the column
+-- drops its indexes; they are recreated below)
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'transactions' AND column_name = 'month'
+          AND is_generated = 'NEVER'
+    ) THEN
+        ALTER TABLE transactions DROP COLUMN month;
+        ALTER TABLE transactions ADD COLUMN month DATE NOT NULL
+            GENERATED ALWAYS AS (date_trunc('month', tx_date::timestamp)::date) STORED;
+    END IF;
+END $$;
+
+-- Covering index for per-month transaction scans: the contributor
+-- aggregation (label, amount and every metric filter column) is an
+-- index-only scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_company_month_cov
+    ON transactions (company_id, month)
+    INCLUDE (amount, account_code, account_name, coa_name, customer_name, description);
+
+-- Superseded by idx_transactions_company_month_cov
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_company_month;
 
 CREATE INDEX IF NOT EXISTS idx_transactions_company_account_month
     ON transactions (company_id, account_code, month);
 
-CREATE INDEX IF NOT EXISTS idx_transactions_source_report
-    ON transactions (source_report_id);
+-- Backfill line_no for reports normalized before it existed (insert order)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'transactions' AND column_name = 'line_no'
+    ) THEN
+        ALTER TABLE transactions ADD COLUMN line_no INTEGER;
+        UPDATE transactions t
+        SET line_no = n.line_no
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY source_report_id ORDER BY id) - 1 AS line_no
+            FROM transactions
+        ) n
+        WHERE t.id = n.id;
+    END IF;
+END $$;
+
+-- One row per reportData item: normalization inserts with ON CONFLICT DO
+-- NOTHING, so re-running it (even concurrently) never duplicates rows.
+-- Also serves per-report lookups, replacing idx_transactions_source_report
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_source_line
+    ON transactions (source_report_id, line_no);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_source_report;
 
 -- -----------------------------------------------------------------------------
 -- GOLD LAYER: KPIs, Anomalies, Contributors, Explanations
@@ -81,8 +133,20 @@ CREATE TABLE IF NOT EXISTS monthly_kpis (
     UNIQUE (company_id, month, metric_name)
 );
 
-CREATE INDEX IF NOT EXISTS idx_monthly_kpis_company_month
-    ON monthly_kpis (company_id, month);
+-- Covering index for per-month lookups (metrics overview current/previous
+-- month): both sides of the MoM join are index-only scans
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_monthly_kpis_company_month_cov
+    ON monthly_kpis (company_id, month) INCLUDE (metric_name, value);
+
+-- Superseded by idx_monthly_kpis_company_month_cov
+DROP INDEX CONCURRENTLY IF EXISTS idx_monthly_kpis_company_month;
+
+-- Covering index for anomaly detection: rows come back already ordered by
+-- (metric_name, month) per company, so the window functions need no Sort.
+-- CONCURRENTLY keeps writes flowing when applied to a live database
+-- (run this file with plain `psql -f`, not inside a transaction).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_monthly_kpis_cmm
+    ON monthly_kpis (company_id, metric_name, month) INCLUDE (value);
 
 -- Detected anomalies (smart detection: YoY + Rolling Avg + Z-Score)
 CREATE TABLE IF NOT EXISTS anomalies (
@@ -100,8 +164,20 @@ CREATE TABLE IF NOT EXISTS anomalies (
     UNIQUE (company_id, month, metric_name)
 );
 
-CREATE INDEX IF NOT EXISTS idx_anomalies_company_month
-    ON anomalies (company_id, month);
+-- The UNIQUE (company_id, month, metric_name) index serves per-month
+-- lookups and the metrics overview's per-metric EXISTS probe; a separate
+-- (company_id, month) index only added write cost
+DROP INDEX CONCURRENTLY IF EXISTS idx_anomalies_company_month;
+
+-- Serves get_anomalies_for_company (status filter + month/severity ordering)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_anomalies_company_status_month_sev
+    ON anomalies (company_id, status, month DESC, severity_score DESC);
+
+-- Open anomalies are the common list view; this partial index stays small
+-- (triaged rows drop out) and returns them pre-sorted with no filter
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_anomalies_open_sev
+    ON anomalies (company_id, month DESC, severity_score DESC)
+    WHERE status = 'open';
 
 -- Root-cause contributors for each anomaly
 CREATE TABLE IF NOT EXISTS anomaly_contributors (
@@ -128,6 +204,27 @@ CREATE TABLE IF NOT EXISTS anomaly_highlights (
 CREATE INDEX IF NOT EXISTS idx_anomaly_highlights_anomaly
     ON anomaly_highlights (anomaly_id);
 
+-- Detection explanations keyed by bucketed detection-signal fingerprint,
+-- shared across companies/months so identical signals skip the LLM call
+CREATE TABLE IF NOT EXISTS llm_explanation_cache (
+    fingerprint TEXT PRIMARY KEY,          -- blake2b(metric|reason|signals)[:16]
+    text        TEXT NOT NULL,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Highlight LLM results keyed by prompt hash, so reruns over unchanged
+-- anomaly payloads (backfills, forced refreshes) skip the LLM call
+CREATE TABLE IF NOT EXISTS llm_highlight_cache (
+    prompt_hash TEXT PRIMARY KEY,          -- sha256(model|prompt)
+    tr_text     TEXT NOT NULL,
+    en_text     TEXT NOT NULL,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Refresh planner statistics so the new indexes are picked up immediately
+ANALYZE monthly_kpis;
+ANALYZE anomalies;
+
 -- -----------------------------------------------------------------------------
 -- VIEWS (optional convenience)
 -- -----------------------------------------------------------------------------
@@ -155,3 +252,135 @@ SELECT
              / LAG(k.value) OVER (PARTITION BY k.company_id, k.metric_name ORDER BY k.month) * 100
     END AS pct_change
 FROM monthly_kpis k;
+
+-- -----------------------------------------------------------------------------
+-- FUNCTIONS
+-- -----------------------------------------------------------------------------
+
+-- CFO month view data as one JSONB document (read-only dashboard path):
+-- metrics overview (current vs previous month) and the month's anomalies
+-- with contributors, highlights and summary counts. Mirrors get_metrics_overview,
+-- get_anomalies_for_report and get_anomaly_summary; labels, formatting and
+-- evidence stay in Python.
+CREATE OR REPLACE FUNCTION cfo_month_view(p_company_id UUID, p_month DATE)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'metrics_overview', COALESCE((
+            SELECT jsonb_agg(m ORDER BY m.metric_name)
+            FROM (
+                SELECT
+                    metric_name,
+                    p.value::float8 AS prev_value,
+                    c.value::float8 AS curr_value,
+                    ROUND(
+                        (c.value - p.value) / NULLIF(ABS(p.value), 0) * 100,
+                        1
+                    )::float8 AS pct_change,
+                    EXISTS (
+                        SELECT 1 FROM anomalies a
+                        WHERE a.company_id = p_company_id
+                          AND a.month = p_month
+                          AND a.metric_name = COALESCE(c.metric_name, p.metric_name)
+                    ) AS is_anomalous
+                FROM (
+                    SELECT metric_name, value FROM monthly_kpis
+                    WHERE company_id = p_company_id AND month = p_month
+                ) c
+                FULL OUTER JOIN (
+                    SELECT metric_name, value FROM monthly_kpis
+                    WHERE company_id = p_company_id
+                      AND month = (p_month - INTERVAL '1 month')::date
+                ) p USING (metric_name)
+            ) m
+        ), '[]'::jsonb),
+        'anomalies', COALESCE((
+            SELECT jsonb_agg(r ORDER BY r.severity_score DESC NULLS FIRST)
+            FROM (
+                SELECT
+                    a.metric_name, a.status, a.meta,
+                    a.prev_value::float8 AS prev_value,
+                    a.curr_value::float8 AS curr_value,
+                    ROUND(a.pct_change, 1)::float8 AS pct_change,
+                    ROUND(a.severity_score, 1)::float8 AS severity_score,
+                    ROUND((a.meta->>'yoy_pct')::numeric, 1)::float8 AS yoy_pct,
+                    ROUND((a.meta->>'rolling_pct')::numeric, 1)::float8 AS rolling_pct,
+                    ROUND((a.meta->>'zscore')::numeric, 2)::float8 AS zscore,
+                    COALESCE((
+                        SELECT jsonb_agg(
+                            jsonb_build_object(
+                                'label', ac.label,
+                                'amount', ac.amount,
+                                'share_of_total', ac.share_of_total
+                            )
+                            ORDER BY ABS(ac.amount) DESC
+                        )
+                        FROM anomaly_contributors ac
+                        WHERE ac.anomaly_id = a.id
+                    ), '[]'::jsonb) AS contributors,
+                    COALESCE((
+                        SELECT jsonb_object_agg(ah.language, ah.text)
+                        FROM anomaly_highlights ah
+                        WHERE ah.anomaly_id = a.id
+                    ), '{}'::jsonb) AS highlights
+                FROM anomalies a
+                WHERE a.company_id = p_company_id AND a.month = p_month
+            ) r
+        ), '[]'::jsonb),
+        'summary', (
+            SELECT jsonb_build_object(
+                'total_anomalies', COUNT(*),
+                'positive_anomalies', COUNT(*) FILTER (WHERE ROUND(pct_change, 1) > 0),
+                'negative_anomalies', COUNT(*) FILTER (WHERE (ROUND(pct_change, 1) > 0) IS NOT TRUE)
+            )
+            FROM anomalies
+            WHERE company_id = p_company_id AND month = p_month
+        )
+    )
+$$;
+
+-- Bump companies.data_version once per statement that writes month view
+-- data, so cache checks are a primary-key lookup instead of scanning the
+-- month's rows. Statement-level triggers with transition tables touch each
+-- affected company once, however many rows the statement wrote.
+CREATE OR REPLACE FUNCTION bump_company_data_version()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_TABLE_NAME IN ('anomaly_contributors', 'anomaly_highlights') THEN
+        UPDATE companies SET data_version = data_version + 1
+        WHERE finsmart_guid IN (
+            SELECT a.company_id FROM changed c JOIN anomalies a ON a.id = c.anomaly_id
+        );
+    ELSE
+        UPDATE companies SET data_version = data_version + 1
+        WHERE finsmart_guid IN (SELECT company_id FROM changed);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Transition tables allow one event per trigger: three triggers per table
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        'transactions', 'monthly_kpis', 'anomalies', 'anomaly_contributors', 'anomaly_highlights'
+    ] LOOP
+        EXECUTE format(
+            'CREATE OR REPLACE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS changed '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_company_data_version()',
+            tbl || '_version_ins', tbl);
+        EXECUTE format(
+            'CREATE OR REPLACE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS changed '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_company_data_version()',
+            tbl || '_version_upd', tbl);
+        EXECUTE format(
+            'CREATE OR REPLACE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS changed '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_company_data_version()',
+            tbl || '_version_del', tbl);
+    END LOOP;
+END $$;
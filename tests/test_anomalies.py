@@ -107,6 +107,87 @@ class TestAnomalyDetection:
         
         # Lower threshold should catch more anomalies
         assert count_10 >= count_50
+    
+    def test_since_month_limits_detection(self, db_conn, setup_kpis):
+        """Test that since_month only emits anomalies from that month on."""
+        from finsmart_etl.anomalies import detect_anomalies
+        
+        company_id = setup_kpis
+        count = detect_anomalies(db_conn, company_id, threshold_pct=20.0, since_month="2022-09-01")
+        
+        with db_conn.cursor() as cur:
+            cur.execute(
+                "SELECT DISTINCT month FROM anomalies WHERE company_id = %s",
+                (str(company_id),)
+            )
+            months = [row[0] for row in cur.fetchall()]
+        
+        # marketing's August jump is outside the range; advisory_expense still
+        # sees its August baseline through the lookback window
+        assert count == 1
+        assert months == [date(2022, 9, 1)]
+    
+    def test_detection_leaves_transaction_to_caller(self, db_conn, setup_kpis):
+        """Test detection does not commit unless asked to."""
+        from psycopg.pq import TransactionStatus
+        from finsmart_etl.anomalies import detect_anomalies
+        
+        detect_anomalies(db_conn, setup_kpis, threshold_pct=20.0)
+        assert db_conn.info.transaction_status == TransactionStatus.INTRANS
+    
+    def test_lookback_months_bounds_scan(self, db_conn, setup_kpis):
+        """Test that lookback_months skips history older than the window."""
+        from finsmart_etl.anomalies import detect_anomalies
+        
+        company_id = setup_kpis
+        
+        # Fixture data is from 2022, far outside an 18-month lookback
+        assert detect_anomalies(db_conn, company_id, threshold_pct=20.0, lookback_months=18) == 0
+        assert detect_anomalies(db_conn, company_id, threshold_pct=20.0, lookback_months=1200) >= 1
+        with pytest.raises(ValueError):
+            detect_anomalies(db_conn, company_id, lookback_months=6)
+    
+    @pytest.mark.parametrize("threshold_pct", [None, 20.0])
+    def test_vectorized_matches_sql(self, db_conn, test_company_id, threshold_pct):
+        """Test the client-side pass produces the same anomalies as the SQL path."""
+        from finsmart_etl.anomalies import detect_anomalies, detect_anomalies_vectorized
+        
+        company_id = test_company_id
+        series = {
+            "net_sales": [100, 104, 98, 102, 101, 99, 103, 100, 97, 180, 102, 101, 100, 140, 99],
+            "marketing": [10, 10, 10, 10, 12, 11, 0, 10, 10, 10, 10, 10, 10, 10, 25],
+        }
+        with db_conn.cursor() as cur:
+            for metric_name, values in series.items():
+                for i, value in enumerate(values):
+                    cur.execute(
+                        "INSERT INTO monthly_kpis (company_id, month, metric_name, value) VALUES (%s, %s, %s, %s)",
+                        (company_id, date(2021 + (i // 12), i % 12 + 1, 1), metric_name, value)
+                    )
+        
+        def snapshot():
+            with db_conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT metric_name, month, meta->>'detection_reason',
+                           round(severity_score, 2), round(pct_change, 2)
+                    FROM anomalies WHERE company_id = %s
+                    ORDER BY metric_name, month
+                    """,
+                    (company_id,)
+                )
+                rows = cur.fetchall()
+                cur.execute("DELETE FROM anomalies WHERE company_id = %s", (company_id,))
+            return rows
+        
+        sql_count = detect_anomalies(db_conn, company_id, threshold_pct=threshold_pct)
+        sql_rows = snapshot()
+        vec_count = detect_anomalies_vectorized(db_conn, company_id, threshold_pct=threshold_pct)
+        vec_rows = snapshot()
+        
+        assert sql_count > 0
+        assert vec_count == sql_count
+        assert vec_rows == sql_rows
 
 
 class TestAnomalyQueries:
@@ -135,11 +216,35 @@ class TestAnomalyQueries:
         from finsmart_etl.anomalies import get_anomalies_for_month
         
         company_id = setup_anomalies
-        anomalies = get_anomalies_for_month(db_conn, company_id, str(date(2022, 9, 1)))
+        anomalies = get_anomalies_for_month(db_conn, company_id, date(2022, 9, 1))
         
         assert len(anomalies) == 1
         assert anomalies[0]["metric_name"] == "advisory_expense"
     
+    def test_get_anomalies_column_projection(self, db_conn, setup_anomalies):
+        """Test list views skip meta by default and detail views opt back in."""
+        from finsmart_etl.anomalies import ANOMALY_COLUMNS, get_anomalies_for_month
+        
+        company_id = setup_anomalies
+        month = date(2022, 9, 1)
+        
+        assert "meta" not in get_anomalies_for_month(db_conn, company_id, month)[0]
+        assert "meta" in get_anomalies_for_month(db_conn, company_id, month, columns=ANOMALY_COLUMNS)[0]
+        with pytest.raises(ValueError):
+            get_anomalies_for_month(db_conn, company_id, month, columns=["id", "1; DROP TABLE anomalies"])
+
+    def test_get_anomalies_for_report(self, db_conn, setup_anomalies):
+        """Test report rows come back as rounded floats."""
+        from finsmart_etl.anomalies import get_anomalies_for_report
+
+        company_id = setup_anomalies
+        (row,) = get_anomalies_for_report(db_conn, company_id, date(2022, 9, 1))
+
+        assert row["curr_value"] == 80000.0 and isinstance(row["curr_value"], float)
+        assert row["pct_change"] == 166.7
+        assert row["severity_score"] == 166.7
+        assert row["yoy_pct"] is None  # No detection meta
+
     def test_get_anomalies_ordered_by_severity(self, db_conn, setup_anomalies):
         """Test that anomalies are ordered by severity."""
         from finsmart_etl.anomalies import get_anomalies_for_company
@@ -151,3 +256,176 @@ class TestAnomalyQueries:
         # Should be ordered by severity descending
         severities = [a["severity_score"] for a in anomalies]
         assert severities == sorted(severities, reverse=True)
+    
+    def test_get_anomalies_status_filter(self, db_conn, setup_anomalies):
+        """Test the status-filtered query shape."""
+        from finsmart_etl.anomalies import get_anomalies_for_company, update_anomaly_status
+        
+        company_id = setup_anomalies
+        marketing = [a for a in get_anomalies_for_company(db_conn, company_id)
+                     if a["metric_name"] == "marketing"][0]
+        update_anomaly_status(db_conn, marketing["id"], "muted")
+        
+        muted = get_anomalies_for_company(db_conn, company_id, status="muted")
+        assert [a["metric_name"] for a in muted] == ["marketing"]
+    
+    def test_get_anomalies_for_company_iter(self, db_conn, setup_anomalies):
+        """Test the streaming variant yields the same rows as the list variant."""
+        from finsmart_etl.anomalies import get_anomalies_for_company, get_anomalies_for_company_iter
+        
+        company_id = setup_anomalies
+        streamed = list(get_anomalies_for_company_iter(db_conn, company_id, itersize=1))
+        
+        assert streamed == get_anomalies_for_company(db_conn, company_id)
+    
+    def test_get_pending_work(self, db_conn, setup_anomalies):
+        """Test pipelined pending-work lookup matches the individual getters."""
+        from finsmart_etl.anomalies import (
+            get_anomalies_without_contributors,
+            get_anomalies_without_highlights,
+            get_pending_work,
+        )
+        
+        company_id = setup_anomalies
+        pending = get_pending_work(db_conn, company_id)
+        
+        assert len(pending["without_contributors"]) == 2
+        assert pending["without_contributors"] == get_anomalies_without_contributors(db_conn, company_id)
+        assert pending["without_highlights"] == get_anomalies_without_highlights(db_conn, company_id)
+
+
+class TestDetectionExplanations:
+    """Tests for detection explanations (LLM mocked)."""
+    
+    @pytest.fixture
+    def fake_async_openai(self, monkeypatch):
+        """Replace AsyncOpenAI with a fake that fails for 'marketing'."""
+        from finsmart_etl import llm
+        
+        class FakeResponses:
+            async def create(self, model, input, **kwargs):
+                if "METRIC: marketing" in input:
+                    raise RuntimeError("429 Too Many Requests")
+                metric = input.split("METRIC: ")[1].split("\n")[0]
+                return type("Result", (), {"output_text": f" LLM says {metric} "})()
+        
+        class FakeAsyncOpenAI:
+            def __init__(self, api_key, **kwargs):
+                self.responses = FakeResponses()
+            
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc):
+                return False
+        
+        monkeypatch.setattr(llm, "AsyncOpenAI", FakeAsyncOpenAI)
+    
+    def test_fallback_explanation_uses_signals(self):
+        """Test rule-based explanation formats the triggering signal."""
+        from finsmart_etl.anomalies import fallback_detection_explanation
+        
+        anomaly = {"meta": {"detection_reason": "yoy", "yoy_pct": 166.94}}
+        assert "166.9%" in fallback_detection_explanation(anomaly)
+        
+        anomaly = {"meta": '{"detection_reason": "zscore", "zscore": 2.5}'}
+        assert "2.50" in fallback_detection_explanation(anomaly)
+        
+        assert "legacy" in fallback_detection_explanation({"meta": None})
+    
+    def test_explain_batch_preserves_order_and_falls_back(self, fake_async_openai):
+        """Test batch explanations keep input order and isolate failures."""
+        from finsmart_etl.anomalies import explain_anomalies_batch
+        
+        anomalies = [
+            {"metric_name": "advisory_expense", "meta": {"detection_reason": "yoy_and_rolling", "yoy_pct": 166.9, "rolling_pct": 158.1}},
+            {"metric_name": "marketing", "meta": {"detection_reason": "yoy_and_rolling", "yoy_pct": 31.0, "rolling_pct": 25.0}},
+            {"metric_name": "net_sales", "meta": {"detection_reason": "yoy_and_rolling", "yoy_pct": 40.0, "rolling_pct": 30.0}},
+        ]
+        
+        explanations = explain_anomalies_batch(anomalies, max_concurrency=2)
+        
+        assert explanations[0] == "LLM says advisory_expense"
+        assert "25.0%" in explanations[1]  # Rule-based fallback
+        assert explanations[2] == "LLM says net_sales"
+    
+    def test_explain_batch_inside_running_loop(self, fake_async_openai):
+        """Test the sync batch works from async code and matches the async entry point."""
+        import asyncio
+        from finsmart_etl.anomalies import explain_anomalies_batch, explain_anomalies_batch_async
+        
+        anomalies = [
+            {"metric_name": "cogs", "meta": {"detection_reason": "yoy_and_rolling", "yoy_pct": 61.0, "rolling_pct": 31.0}},
+        ]
+        
+        async def main():
+            return explain_anomalies_batch(anomalies), await explain_anomalies_batch_async(anomalies)
+        
+        assert asyncio.run(main()) == (["LLM says cogs"], ["LLM says cogs"])
+    
+    def test_clear_cut_anomalies_skip_llm(self, fake_async_openai):
+        """Test single-signal or far-above-threshold anomalies use the template."""
+        from finsmart_etl.anomalies import explain_anomalies_batch, needs_llm_explanation
+        
+        single = {"metric_name": "cogs", "meta": {"detection_reason": "rolling", "rolling_pct": 158.1}}
+        clear = {"metric_name": "cogs", "meta": {"detection_reason": "yoy", "yoy_pct": 90.0, "rolling_pct": 10.0}}
+        borderline = {"metric_name": "cogs", "meta": {"detection_reason": "yoy", "yoy_pct": 35.0, "rolling_pct": 10.0}}
+        
+        assert not needs_llm_explanation(single)
+        assert not needs_llm_explanation(clear)
+        assert needs_llm_explanation(borderline)
+        assert explain_anomalies_batch([single]) == ["Flagged because value deviates 158.1% from the trailing 3-month average."]
+    
+    def test_fingerprint_buckets_signals(self):
+        """Test near-identical signals share a fingerprint, different ones don't."""
+        from finsmart_etl.anomalies import detection_fingerprint
+        
+        a = {"metric_name": "marketing", "meta": {"detection_reason": "yoy", "yoy_pct": 40.2, "zscore": 2.31}}
+        b = {"metric_name": "marketing", "meta": {"detection_reason": "yoy", "yoy_pct": 39.9, "zscore": 2.28}}
+        c = {"metric_name": "net_sales", "meta": {"detection_reason": "yoy", "yoy_pct": 40.2, "zscore": 2.31}}
+        
+        assert detection_fingerprint(a) == detection_fingerprint(b)
+        assert detection_fingerprint(a) != detection_fingerprint(c)
+        assert len(detection_fingerprint(a)) == 16
+    
+    def test_detection_prompt_matches_fingerprint(self):
+        """Test anomalies sharing a fingerprint get the same prompt (no per-company figures)."""
+        from finsmart_etl.anomalies import build_detection_prompt, detection_fingerprint
+        
+        a = {"metric_name": "marketing", "month": "2022-09-01", "curr_value": 120000,
+             "meta": {"detection_reason": "yoy", "yoy_pct": 40.2, "zscore": 2.31, "yoy_value": 85000}}
+        b = {"metric_name": "marketing", "month": "2023-03-01", "curr_value": 9000,
+             "meta": {"detection_reason": "yoy", "yoy_pct": 39.9, "zscore": 2.28, "yoy_value": 6400}}
+        
+        assert detection_fingerprint(a) == detection_fingerprint(b)
+        assert build_detection_prompt(a) == build_detection_prompt(b)
+        assert "120000" not in build_detection_prompt(a)
+    
+    def test_explain_batch_uses_cache(self, db_conn, fake_async_openai):
+        """Test cached fingerprints skip the LLM and duplicates are called once."""
+        import finsmart_etl.anomalies as anomalies_module
+        from finsmart_etl.anomalies import (
+            cache_explanations, detection_fingerprint, explain_anomalies_batch,
+        )
+        
+        anomalies_module._explanation_memo.clear()
+        cached = {"metric_name": "net_sales", "meta": {"detection_reason": "yoy_and_rolling", "yoy_pct": 45.0, "rolling_pct": 30.0}}
+        cache_explanations(db_conn, {detection_fingerprint(cached): "From cache"})
+        anomalies_module._explanation_memo.clear()  # Force the DB lookup
+        
+        fresh = {"metric_name": "cogs", "meta": {"detection_reason": "yoy_and_rolling", "yoy_pct": 60.0, "rolling_pct": 30.0}}
+        explanations = explain_anomalies_batch([cached, fresh, fresh], conn=db_conn)
+        
+        assert explanations == ["From cache", "LLM says cogs", "LLM says cogs"]
+        with db_conn.cursor() as cur:
+            cur.execute(
+                "SELECT text FROM llm_explanation_cache WHERE fingerprint = %s",
+                (detection_fingerprint(fresh),)
+            )
+            assert cur.fetchone()[0] == "LLM says cogs"
+            cur.execute(
+                "DELETE FROM llm_explanation_cache WHERE fingerprint = ANY(%s)",
+                ([detection_fingerprint(cached), detection_fingerprint(fresh)],)
+            )
+        db_conn.commit()
+        anomalies_module._explanation_memo.clear()
@@ -5,6 +5,7 @@ Tests for CFO Month View.
 import pytest
 from datetime import date
 from decimal import Decimal
+from uuid import uuid4
 
 
 class TestCFOView:
@@ -75,8 +76,8 @@ class TestCFOView:
             cur.execute(
                 """
                 INSERT INTO anomaly_highlights (anomaly_id, language, text)
-                VALUES (%s, 'tr', 'Eylül ayında danışmanlık giderleri %167 arttı.'),
-                       (%s, 'en', 'Advisory expenses increased by 167% in September.')
+                VALUES (%s, 'tr', 'Eylül ayında danışmanlık giderleri %%167 arttı.'),
+                       (%s, 'en', 'Advisory expenses increased by 167%% in September.')
                 """,
                 (anomaly_id, anomaly_id)
             )
@@ -86,16 +87,16 @@ class TestCFOView:
             cur.execute(
                 """
                 INSERT INTO transactions 
-                (company_id, tx_date, month, account_code, account_name,
+                (company_id, tx_date, account_code, account_name,
                  coa_code, coa_name, description, customer_name, amount, source_report_id)
                 VALUES 
-                (%s, %s, %s, '2.5.2', 'Advisory', '760.01', 'DANISMANLIK', 
+                (%s, %s, '2.5.2', 'Advisory', '760.01', 'DANISMANLIK', 
                  'Consultant X', NULL, 50000, %s),
-                (%s, %s, %s, '2.5.2', 'Advisory', '760.01', 'DANISMANLIK',
+                (%s, %s, '2.5.2', 'Advisory', '760.01', 'DANISMANLIK',
                  'Consultant Y', NULL, 30000, %s)
                 """,
-                (str(test_company_id), date(2022, 9, 15), month, raw_report_id,
-                 str(test_company_id), date(2022, 9, 20), month, raw_report_id)
+                (str(test_company_id), date(2022, 9, 15), raw_report_id,
+                 str(test_company_id), date(2022, 9, 20), raw_report_id)
             )
         
         return {
@@ -119,11 +120,67 @@ class TestCFOView:
         assert net_sales["prev_value"] == 100000.0
         assert net_sales["curr_value"] == 150000.0
         assert net_sales["pct_change"] == 50.0  # (150-100)/100 * 100
+        assert net_sales["is_anomalous"] is False
         
         # Find advisory_expense - should be flagged as anomalous
         advisory = next((m for m in metrics if m["metric_name"] == "advisory_expense"), None)
         assert advisory is not None
         assert advisory["is_anomalous"] is True
+
+    def test_get_metrics_overview_keeps_zero_values(self, db_conn, test_company_id):
+        """Test zero values and unchanged metrics are reported, not blanked."""
+        from finsmart_etl.cfo_view import get_metrics_overview
+
+        with db_conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO monthly_kpis (company_id, month, metric_name, value)
+                VALUES (%(c)s, '2022-08-01', 'returns', 0),
+                       (%(c)s, '2022-09-01', 'returns', 5000),
+                       (%(c)s, '2022-08-01', 'payroll', 40000),
+                       (%(c)s, '2022-09-01', 'payroll', 40000)
+                """,
+                {"c": test_company_id}
+            )
+
+        metrics = {m["metric_name"]: m for m in get_metrics_overview(db_conn, test_company_id, date(2022, 9, 1))}
+
+        assert metrics["returns"]["prev_value"] == 0.0
+        assert metrics["returns"]["prev_formatted"] == "0 TL"
+        assert metrics["returns"]["pct_change"] is None  # No base to compare against
+        assert metrics["payroll"]["pct_change"] == 0.0
+
+    def test_has_data_for_month(self, db_conn, setup_complete_data):
+        """Test KPI, anomaly and contributor counts for the month."""
+        from finsmart_etl.cfo_view import has_data_for_month
+        
+        data = setup_complete_data
+        
+        existing = has_data_for_month(db_conn, data["company_id"], data["month"])
+        
+        assert existing == {"kpis": 2, "anomalies": 1, "contributors": 2, "complete": True}
+        empty = has_data_for_month(db_conn, data["company_id"], date(2021, 1, 1))
+        assert empty["complete"] is False
+
+    def test_get_anomaly_summary(self, db_conn, setup_complete_data):
+        """Test anomaly counts by direction; no change and NULL count as negative."""
+        from finsmart_etl.cfo_view import get_anomaly_summary
+
+        data = setup_complete_data
+        with db_conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO anomalies (company_id, month, metric_name, curr_value, pct_change)
+                VALUES (%(c)s, %(m)s, 'net_sales', 150000, -20),
+                       (%(c)s, %(m)s, 'payroll', 40000, 0.01),
+                       (%(c)s, %(m)s, 'returns', 5000, NULL)
+                """,
+                {"c": data["company_id"], "m": data["month"]}
+            )
+
+        summary = get_anomaly_summary(db_conn, data["company_id"], data["month"])
+
+        assert summary == {"total_anomalies": 4, "positive_anomalies": 1, "negative_anomalies": 3}
     
     def test_get_anomaly_details(self, db_conn, setup_complete_data):
         """Test anomaly details retrieval."""
@@ -188,6 +245,58 @@ class TestCFOView:
         assert len(view["anomalies"]) == 1
         assert view["anomalies"][0]["metric_name"] == "advisory_expense"
     
+    def test_build_cfo_month_view_includes_generated_text(self, db_conn, setup_complete_data, monkeypatch):
+        """Test generated highlights reach the view and the report is added on top."""
+        from finsmart_etl import cfo_view
+        from finsmart_etl.explanations import _store_highlights
+
+        data = setup_complete_data
+        with db_conn.cursor() as cur:
+            cur.execute("DELETE FROM anomaly_highlights WHERE anomaly_id = %s", (data["anomaly_id"],))
+
+        def fake_generate(conn, anomaly_ids):
+            return _store_highlights(conn, {
+                anomaly_id: {"tr_explanation": "Üretildi", "en_explanation": "Generated"}
+                for anomaly_id in anomaly_ids
+            })
+
+        monkeypatch.setattr(cfo_view, "generate_highlights_for_anomalies", fake_generate)
+        monkeypatch.setattr(cfo_view, "generate_executive_report", lambda **kwargs: {"report_tr": "Rapor"})
+
+        view = cfo_view.build_cfo_month_view(
+            db_conn, data["company_id"], data["month"], ensure_computed=False
+        )
+
+        assert view["anomalies"][0]["highlights"] == {"tr": "Üretildi", "en": "Generated"}
+        assert view["executive_report"] == {"report_tr": "Rapor"}
+
+    def test_repeat_build_does_not_rewrite_reasoning(self, db_conn, setup_complete_data, monkeypatch):
+        """Test a second build stores no reasoning, so data_version stays put."""
+        from psycopg.types.json import Jsonb
+        from finsmart_etl import cfo_view
+        
+        data = setup_complete_data
+        db_conn.execute(
+            "UPDATE anomalies SET meta = %s WHERE id = %s",
+            (Jsonb({"detection_reason": "rolling", "rolling_pct": 158.1}), data["anomaly_id"])
+        )
+        monkeypatch.setattr(db_conn, "commit", lambda: None)  # Keep the rollback fixture
+        monkeypatch.setattr(cfo_view, "generate_executive_report", lambda **kwargs: {})
+        
+        def build_and_read_version():
+            cfo_view.build_cfo_month_view(db_conn, data["company_id"], data["month"], ensure_computed=False)
+            return db_conn.execute(
+                "SELECT data_version FROM companies WHERE finsmart_guid = %s", (data["company_id"],)
+            ).fetchone()[0]
+        
+        first = build_and_read_version()
+        reasoning = db_conn.execute(
+            "SELECT meta->>'reasoning' FROM anomalies WHERE id = %s", (data["anomaly_id"],)
+        ).fetchone()[0]
+        
+        assert reasoning
+        assert build_and_read_version() == first
+    
     def test_cfo_view_includes_evidence(self, db_conn, setup_complete_data):
         """Test that CFO view includes transaction evidence."""
         from finsmart_etl.cfo_view import build_cfo_month_view
@@ -214,6 +323,139 @@ class TestCFOView:
         assert "amount_formatted" in sample
 
 
+class TestExecutiveReportStreaming:
+    """Tests for streaming the executive report."""
+    
+    def test_stream_yields_partials_then_final_report(self, monkeypatch):
+        """Test partial drafts arrive before the stream ends and the last item is the full report."""
+        import asyncio
+        import json
+        from types import SimpleNamespace
+        
+        from finsmart_etl import cfo_view, llm
+        
+        report = {
+            "report_tr": {"title": "Eylül 2023", "overview": "Gelirler arttı."},
+            "report_en": {"title": "September 2023", "overview": "Revenue rose."},
+        }
+        text = "```json\n" + json.dumps(report, ensure_ascii=False) + "\n```"
+        
+        class FakeStream:
+            async def __aiter__(self):
+                yield SimpleNamespace(type="response.created")
+                for i in range(0, len(text), 4):
+                    yield SimpleNamespace(type="response.output_text.delta", delta=text[i:i + 4])
+        
+        class FakeAsyncOpenAI:
+            def __init__(self, api_key, **kwargs):
+                self.responses = self
+            
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc_info):
+                return False
+            
+            async def create(self, **kwargs):
+                assert kwargs["stream"] is True
+                return FakeStream()
+        
+        monkeypatch.setattr(llm, "AsyncOpenAI", FakeAsyncOpenAI)
+        
+        async def collect():
+            return [
+                draft async for draft in
+                cfo_view.stream_executive_report("Test", "Eylül 2023", [], parse_every=2)
+            ]
+        
+        drafts = asyncio.run(collect())
+        
+        assert drafts[-1] == report
+        assert len(drafts) > 2
+        assert "report_en" not in drafts[0]
+        assert any(
+            d.get("report_tr", {}).get("overview") == "Gelirler arttı." and "report_en" not in d
+            for d in drafts
+        )
+
+
+class TestExecutiveReportParsing:
+    """Tests for parsing the executive report response."""
+    
+    def test_unusable_response_falls_back_to_existing_data(self):
+        """Test invalid JSON and non-report JSON both build the fallback report."""
+        from finsmart_etl.cfo_view import build_executive_report_prompt, parse_executive_report
+        
+        anomalies = [{
+            "metric_name": "advisory_expense", "metric_name_tr": "Danışmanlık Giderleri",
+            "pct_change": 166.7, "highlights": {"tr": "Kök neden", "en": "Root cause"},
+        }]
+        _, details = build_executive_report_prompt("Test", "Eylül 2022", anomalies)
+        
+        for raw_text in ("not json", "[1, 2]"):
+            report = parse_executive_report(raw_text, "Eylül 2022", anomalies, details)
+            assert report["report_tr"]["anomalies"][0]["root_cause"] == "Kök neden"
+            assert report["report_en"]["anomalies"][0]["metric"] == "advisory_expense"
+            assert "error" in report
+        
+        assert parse_executive_report('{"report_tr": {}}', "Eylül 2022", anomalies, details) == {"report_tr": {}}
+
+
+class TestReportMarkdown:
+    """Tests for executive report Markdown rendering."""
+    
+    def test_format_report_markdown(self):
+        """Test sections render in order with language labels and fallbacks."""
+        from finsmart_etl.cfo_view import format_report_markdown
+        
+        report = {
+            "report_en": {
+                "title": "September 2022 Report",
+                "overview": "Costs rose.",
+                "anomalies": [{"metric": "Advisory", "change": "167%", "why_anomaly": "Spike"}],
+                "action_recommendations": ["Review contracts"],
+            },
+            "narrative_en": "Advisory costs drove the month.",
+        }
+        
+        assert format_report_markdown(report, "en") == "\n".join([
+            "# September 2022 Report", "", "---", "",
+            "## Executive Overview", "", "Costs rose.", "",
+            "## Detected Anomalies", "",
+            "### 1. Advisory", "", "**Change:** 167%", "",
+            "**Why Anomaly?**", "> Spike", "",
+            "**Root Cause Analysis:**", "> Analysis pending", "",
+            "---", "", "## Recommended Actions", "", "- Review contracts", "",
+            "---", "", "## Executive Narrative Summary", "", "Advisory costs drove the month.", "",
+            "---", "", "*This report was generated automatically.*",
+        ])
+        assert format_report_markdown(report, "tr") == "# Report not available for language: tr"
+
+
+    def test_save_reports_to_files(self, tmp_path):
+        """Test both languages are written (sync and async) with identical content."""
+        import asyncio
+        from finsmart_etl.cfo_view import save_reports_to_files, save_reports_to_files_async
+        
+        report = {"report_tr": {"title": "Eylül Raporu"}, "report_en": {"title": "September Report"}}
+        
+        files = save_reports_to_files(report, "Acme Ltd.", "2022-09", str(tmp_path))
+        written = {lang: open(path, encoding="utf-8").read() for lang, path in files.items()}
+        (tmp_path / "async").mkdir()
+        async_files = asyncio.run(save_reports_to_files_async(
+            report, "Acme Ltd.", "2022-09", str(tmp_path / "async"), markdown={"tr": "önceden"}
+        ))
+        
+        assert files == {
+            "tr": str(tmp_path / "report_acme_ltd__2022-09_tr.md"),
+            "en": str(tmp_path / "report_acme_ltd__2022-09_en.md"),
+        }
+        assert written["tr"].startswith("# Eylül Raporu")
+        assert written["en"].startswith("# September Report")
+        assert open(async_files["tr"], encoding="utf-8").read() == "önceden"
+        assert open(async_files["en"], encoding="utf-8").read() == written["en"]
+
+
 class TestAvailableMonths:
     """Tests for available months query."""
     
@@ -229,9 +471,10 @@ class TestAvailableMonths:
                 VALUES 
                 (%s, '2022-07-01', 'net_sales', 100000),
                 (%s, '2022-08-01', 'net_sales', 110000),
-                (%s, '2022-09-01', 'net_sales', 120000)
+                (%s, '2022-09-01', 'net_sales', 120000),
+                (%s, '2022-09-01', 'advisory_expense', 8000)
                 """,
-                (str(test_company_id), str(test_company_id), str(test_company_id))
+                (str(test_company_id),) * 4
             )
         
         months = get_available_months(db_conn, test_company_id)
@@ -241,3 +484,217 @@ class TestAvailableMonths:
         assert "2022-09" in months[0]
         assert "2022-08" in months[1]
         assert "2022-07" in months[2]
+        assert months == ["2022-09-01", "2022-08-01", "2022-07-01"]
+
+
+class TestCompanyLookup:
+    """Tests for company lookups."""
+    
+    def test_company_lookup_is_cached(self, db_conn, test_company_id):
+        """Test repeated lookups are served from the in-process cache."""
+        from finsmart_etl.cfo_view import (
+            clear_company_cache, get_company_by_guid, get_company_info,
+        )
+        
+        company = get_company_by_guid(db_conn, test_company_id)
+        assert company["name"] == "Test Company"
+        
+        with db_conn.cursor() as cur:
+            cur.execute("DELETE FROM companies WHERE finsmart_guid = %s", (test_company_id,))
+        
+        # Still served from cache
+        assert get_company_info(db_conn, test_company_id)["name"] == "Test Company"
+        
+        clear_company_cache(test_company_id)
+        assert get_company_by_guid(db_conn, test_company_id) is None
+    
+    def test_lookups_accept_a_pool(self, db_dsn):
+        """Test entrypoints borrow a session when given a connection pool."""
+        from psycopg_pool import ConnectionPool
+        from finsmart_etl.cfo_view import get_available_months, get_company_by_guid
+        
+        with ConnectionPool(db_dsn, min_size=1, max_size=2) as pool:
+            assert get_company_by_guid(pool, str(uuid4())) is None
+            assert get_available_months(pool, uuid4()) == []
+
+
+    def test_enrichment_with_single_connection_pool(self, db_dsn, monkeypatch):
+        """Test enrichment reuses the caller's pooled connection instead of waiting on the pool."""
+        from psycopg_pool import ConnectionPool
+        from finsmart_etl import cfo_view
+        
+        enriched = []
+        monkeypatch.setattr(cfo_view, "compute_contributors_for_company", lambda conn, company_id, autocommit: 0)
+        monkeypatch.setattr(cfo_view, "generate_highlight_for_anomaly", lambda conn, anomaly_id: enriched.append(anomaly_id))
+        
+        company_id = uuid4()
+        with ConnectionPool(db_dsn, min_size=1, max_size=1, timeout=2) as pool:
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO companies (finsmart_guid, name) VALUES (%s, 'Pool Test')", (company_id,))
+                anomaly_id = conn.execute(
+                    "INSERT INTO anomalies (company_id, month, metric_name, curr_value, severity_score) "
+                    "VALUES (%s, '2022-09-01', 'net_sales', 1, 1) RETURNING id",
+                    (company_id,)
+                ).fetchone()[0]
+                
+                cfo_view._enrich_anomalies_concurrently(conn, pool, company_id, generate_highlights=True)
+                conn.rollback()
+        
+        assert enriched == [anomaly_id]
+
+
+class TestReadonlyView:
+    """Tests for the read-only CFO view."""
+    
+    @pytest.fixture
+    def committed_company(self, db_dsn):
+        """Commit a company with two months of KPIs and one anomaly (pool sessions need committed data)."""
+        import psycopg
+        
+        company_id = uuid4()
+        with psycopg.connect(db_dsn, autocommit=True) as conn:
+            conn.execute(
+                "INSERT INTO companies (finsmart_guid, name, business_model) VALUES (%s, 'RO Company', 'B2B')",
+                (company_id,)
+            )
+            conn.execute(
+                """
+                INSERT INTO monthly_kpis (company_id, month, metric_name, value)
+                VALUES (%(c)s, '2022-08-01', 'net_sales', 100000),
+                       (%(c)s, '2022-09-01', 'net_sales', 250000)
+                """,
+                {"c": company_id}
+            )
+            anomaly_id = conn.execute(
+                """
+                INSERT INTO anomalies (company_id, month, metric_name, prev_value, curr_value, pct_change, severity_score)
+                VALUES (%s, '2022-09-01', 'net_sales', 100000, 250000, 150, 150)
+                RETURNING id
+                """,
+                (company_id,)
+            ).fetchone()[0]
+            conn.execute(
+                """
+                INSERT INTO anomaly_contributors (anomaly_id, label, amount, share_of_total)
+                VALUES (%(a)s, 'Customer A', 120000.50, 0.8), (%(a)s, 'Customer B', 30000, 0.2)
+                """,
+                {"a": anomaly_id}
+            )
+            conn.execute(
+                "INSERT INTO anomaly_highlights (anomaly_id, language, text) VALUES (%s, 'tr', 'Satışlar arttı')",
+                (anomaly_id,)
+            )
+        yield company_id
+        with psycopg.connect(db_dsn, autocommit=True) as conn:
+            conn.execute("DELETE FROM anomalies WHERE company_id = %s", (company_id,))
+            conn.execute("DELETE FROM monthly_kpis WHERE company_id = %s", (company_id,))
+            conn.execute("DELETE FROM companies WHERE finsmart_guid = %s", (company_id,))
+    
+    def test_readonly_view_matches_skip_compute_view(self, db_dsn, committed_company):
+        """Test the read-only view equals the skip-compute view."""
+        from psycopg_pool import ConnectionPool
+        from finsmart_etl.cfo_view import build_cfo_month_view, build_cfo_month_view_readonly
+        
+        month = date(2022, 9, 15)
+        with ConnectionPool(db_dsn, min_size=1, max_size=3) as pool:
+            readonly = build_cfo_month_view_readonly(pool, committed_company, month)
+            serial = build_cfo_month_view(
+                pool, committed_company, month,
+                ensure_computed=False, generate_highlights=False
+            )
+        
+        assert readonly == serial
+        assert readonly["summary"]["total_anomalies"] == 1
+        assert readonly["metrics_overview"][0]["is_anomalous"] is True
+        assert [c["label"] for c in readonly["anomalies"][0]["contributors"]] == ["Customer A", "Customer B"]
+        assert readonly["anomalies"][0]["highlights"] == {"tr": "Satışlar arttı", "en": ""}
+    
+    def test_readonly_view_cache_follows_data_version(self, db_dsn, committed_company):
+        """Test cached views are reused until the month's data changes."""
+        import psycopg
+        from finsmart_etl.cfo_view import build_cfo_month_view_readonly, clear_cfo_view_cache
+        
+        month = date(2022, 9, 1)
+        clear_cfo_view_cache()
+        with psycopg.connect(db_dsn) as conn:
+            first = build_cfo_month_view_readonly(conn, committed_company, month)
+            first["anomalies"].clear()  # Callers get a copy, not the cached view
+            assert len(build_cfo_month_view_readonly(conn, committed_company, month)["anomalies"]) == 1
+            conn.commit()
+            
+            conn.execute(
+                "UPDATE anomaly_highlights SET text = 'Güncellendi' WHERE anomaly_id IN "
+                "(SELECT id FROM anomalies WHERE company_id = %s)",
+                (committed_company,)
+            )
+            conn.commit()
+            view = build_cfo_month_view_readonly(conn, committed_company, month)
+        
+        assert view["anomalies"][0]["highlights"]["tr"] == "Güncellendi"
+        clear_cfo_view_cache()
+    
+    def test_writes_bump_company_data_version(self, db_dsn, committed_company):
+        """Test statement triggers bump the company's data version once per write."""
+        import psycopg
+        
+        with psycopg.connect(db_dsn, autocommit=True) as conn:
+            def version():
+                return conn.execute(
+                    "SELECT data_version FROM companies WHERE finsmart_guid = %s", (committed_company,)
+                ).fetchone()[0]
+            
+            before = version()
+            conn.execute(
+                "UPDATE anomaly_highlights SET text = text WHERE anomaly_id IN "
+                "(SELECT id FROM anomalies WHERE company_id = %s)",
+                (committed_company,)
+            )
+            assert version() == before + 1
+            conn.execute(
+                "UPDATE monthly_kpis SET value = value WHERE company_id = %s", (committed_company,)
+            )
+            assert version() == before + 2
+    
+    def test_async_view_matches_readonly_view(self, db_dsn, committed_company):
+        """Test the async view equals the sync read-only view."""
+        import asyncio
+        from psycopg_pool import AsyncConnectionPool, ConnectionPool
+        from finsmart_etl.cfo_view import (
+            build_cfo_month_view_async,
+            build_cfo_month_view_readonly,
+            clear_cfo_view_cache,
+        )
+        
+        async def build():
+            async with AsyncConnectionPool(db_dsn, min_size=1, max_size=3) as pool:
+                return await build_cfo_month_view_async(pool, committed_company, date(2022, 9, 1))
+        
+        clear_cfo_view_cache()
+        async_view = asyncio.run(build())
+        clear_cfo_view_cache()
+        with ConnectionPool(db_dsn, min_size=1, max_size=2) as pool:
+            sync_view = build_cfo_month_view_readonly(pool, committed_company, date(2022, 9, 1))
+        clear_cfo_view_cache()
+        
+        assert async_view == sync_view
+        assert async_view["anomalies"][0]["highlights"]["tr"] == "Satışlar arttı"
+    
+    def test_async_view_uses_shared_pool(self, committed_company):
+        """Test the async view borrows from the shared async pool when none is given."""
+        import asyncio
+        from finsmart_etl.cfo_view import build_cfo_month_view_async, clear_cfo_view_cache
+        from finsmart_etl.db import close_async_pool, get_async_pool
+        
+        async def build():
+            try:
+                pool = await get_async_pool()
+                assert await get_async_pool() is pool
+                return await build_cfo_month_view_async(None, committed_company, date(2022, 9, 1))
+            finally:
+                await close_async_pool()
+        
+        clear_cfo_view_cache()
+        view = asyncio.run(build())
+        clear_cfo_view_cache()
+        
+        assert view["anomalies"][0]["highlights"]["tr"] == "Satışlar arttı"
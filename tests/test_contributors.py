@@ -30,6 +30,16 @@ class TestMetricFilterCondition:
         cond = metric_filter_condition("some_custom_metric")
         assert "some_custom_metric" in cond
 
+    def test_fallback_quotes_metric_name(self, db_conn, test_company_id):
+        """Test quotes and % in a metric name cannot break out of the condition."""
+        from finsmart_etl.contributors import get_evidence_transactions
+
+        cond = metric_filter_condition("x' OR '1'='1 100%")
+        assert cond == "account_name = 'x'' OR ''1''=''1 100%%'"
+        assert get_evidence_transactions(
+            db_conn, test_company_id, date(2022, 9, 1), "x' OR '1'='1 100%"
+        ) == []
+
 
 class TestContributorsComputation:
     """Integration tests for contributors computation."""
@@ -64,11 +74,11 @@ class TestContributorsComputation:
                 cur.execute(
                     """
                     INSERT INTO transactions 
-                    (company_id, tx_date, month, account_code, account_name,
+                    (company_id, tx_date, account_code, account_name,
                      coa_code, coa_name, description, customer_name, amount, source_report_id)
-                    VALUES (%s, %s, %s, '2.5.2', %s, '760.01', 'DANISMANLIK', %s, NULL, %s, %s)
+                    VALUES (%s, %s, '2.5.2', %s, '760.01', 'DANISMANLIK', %s, NULL, %s, %s)
                     """,
-                    (str(test_company_id), date(2022, 9, 15), month, 
+                    (str(test_company_id), date(2022, 9, 15),
                      account_name, description, amount, raw_report_id)
                 )
         
@@ -110,6 +120,79 @@ class TestContributorsComputation:
         assert "Alpha" in top["label"]
         assert float(top["amount"]) == 50000.0
     
+    def test_recompute_replaces_contributors(self, db_conn, setup_anomaly_with_transactions):
+        """Test recomputing replaces the stored contributors instead of appending."""
+        from finsmart_etl.contributors import compute_contributors_for_anomaly
+
+        data = setup_anomaly_with_transactions
+        first = compute_contributors_for_anomaly(db_conn, data["anomaly_id"])
+        second = compute_contributors_for_anomaly(db_conn, data["anomaly_id"])
+
+        contributors = get_contributors_for_anomaly(db_conn, data["anomaly_id"])
+
+        assert first == second == len(contributors)
+
+    def test_selection_stops_at_coverage_or_top_n(self, db_conn, setup_anomaly_with_transactions):
+        """Test labels are kept until the coverage threshold is reached, up to top_n."""
+        from finsmart_etl.contributors import compute_contributors_for_anomaly
+
+        data = setup_anomaly_with_transactions
+
+        # Shares are 0.5, 0.3, 0.15, 0.05: Beta reaches 80% coverage
+        assert compute_contributors_for_anomaly(db_conn, data["anomaly_id"]) == 2
+        contributors = get_contributors_for_anomaly(db_conn, data["anomaly_id"])
+        assert [c["label"] for c in contributors] == ["Consultant Alpha", "Consultant Beta"]
+        assert [float(c["share_of_total"]) for c in contributors] == [0.5, 0.3]
+
+        assert compute_contributors_for_anomaly(db_conn, data["anomaly_id"], coverage_threshold=0.9) == 3
+        assert compute_contributors_for_anomaly(db_conn, data["anomaly_id"], top_n=1) == 1
+
+    def test_company_pass_matches_per_anomaly(self, db_conn, setup_anomaly_with_transactions):
+        """Test the one-statement company pass selects what the per-anomaly path does."""
+        from finsmart_etl.contributors import (
+            compute_contributors_for_anomaly,
+            compute_contributors_for_company,
+        )
+
+        data = setup_anomaly_with_transactions
+        with db_conn.cursor() as cur:
+            # A second anomaly with no matching transactions gets none
+            cur.execute(
+                """
+                INSERT INTO anomalies (company_id, month, metric_name, curr_value)
+                VALUES (%s, %s, 'net_sales', 1000)
+                """,
+                (data["company_id"], data["month"])
+            )
+
+        assert compute_contributors_for_company(db_conn, data["company_id"]) == 2
+        by_company = get_contributors_for_anomaly(db_conn, data["anomaly_id"])
+
+        compute_contributors_for_anomaly(db_conn, data["anomaly_id"])
+        by_anomaly = get_contributors_for_anomaly(db_conn, data["anomaly_id"])
+
+        assert [(c["label"], c["amount"], c["share_of_total"]) for c in by_company] == [
+            (c["label"], c["amount"], c["share_of_total"]) for c in by_anomaly
+        ]
+
+        # Anomalies that already have contributors are skipped
+        assert compute_contributors_for_company(db_conn, data["company_id"]) == 0
+
+    def test_company_pass_error_keeps_caller_transaction(self, db_conn, setup_anomaly_with_transactions):
+        """Test a failing company pass raises and rolls back only its own insert."""
+        import psycopg
+        from finsmart_etl.contributors import compute_contributors_for_company
+        
+        data = setup_anomaly_with_transactions
+        with pytest.raises(psycopg.Error):
+            compute_contributors_for_company(db_conn, data["company_id"], coverage_threshold="n/a")
+        
+        # The caller's uncommitted anomaly is still there and the connection usable
+        with db_conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM anomalies WHERE id = %s", (data["anomaly_id"],))
+            assert cur.fetchone()[0] == 1
+        assert compute_contributors_for_company(db_conn, data["company_id"]) == 2
+    
     def test_contributors_share_sums_correctly(self, db_conn, setup_anomaly_with_transactions):
         """Test that share_of_total values are reasonable."""
         from finsmart_etl.contributors import compute_contributors_for_anomaly
@@ -135,3 +218,49 @@ class TestContributorsComputation:
         
         amounts = [abs(float(c["amount"])) for c in contributors]
         assert amounts == sorted(amounts, reverse=True)
+    
+    def test_bulk_getters_match_single_getters(self, db_conn, setup_anomaly_with_transactions):
+        """Test batched contributor/evidence lookups match the per-anomaly ones."""
+        from finsmart_etl.contributors import (
+            compute_contributors_for_anomaly,
+            get_contributors_for_anomalies,
+            get_evidence_transactions,
+            get_evidence_transactions_for_metrics,
+        )
+        
+        data = setup_anomaly_with_transactions
+        compute_contributors_for_anomaly(db_conn, data["anomaly_id"])
+        month = data["month"]
+        
+        by_id = get_contributors_for_anomalies(db_conn, [data["anomaly_id"], -1])
+        assert by_id[data["anomaly_id"]] == get_contributors_for_anomaly(db_conn, data["anomaly_id"])
+        assert -1 not in by_id
+        
+        by_metric = get_evidence_transactions_for_metrics(
+            db_conn, data["company_id"], month, ["advisory_expense", "net_sales"], limit=2
+        )
+        assert by_metric["advisory_expense"] == get_evidence_transactions(
+            db_conn, data["company_id"], month, "advisory_expense", limit=2
+        )
+        assert len(by_metric["advisory_expense"]) == 2
+        assert "net_sales" not in by_metric
+    
+    def test_evidence_for_anomalies_matches_single(self, db_conn, setup_anomaly_with_transactions):
+        """Test the one-query evidence lookup matches per-anomaly lookups, in input order."""
+        from finsmart_etl.contributors import (
+            get_evidence_for_anomalies,
+            get_evidence_transactions,
+        )
+        
+        data = setup_anomaly_with_transactions
+        keys = [
+            (data["company_id"], data["month"], "net_sales"),
+            (data["company_id"], data["month"], "advisory_expense"),
+            (data["company_id"], date(2021, 1, 1), "advisory_expense"),
+        ]
+        
+        evidence = get_evidence_for_anomalies(db_conn, keys, limit=3)
+        
+        assert evidence == [get_evidence_transactions(db_conn, *key, limit=3) for key in keys]
+        assert [len(e) for e in evidence] == [0, 3, 0]
+        assert get_evidence_for_anomalies(db_conn, []) == []
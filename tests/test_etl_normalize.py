@@ -6,10 +6,7 @@ import pytest
 from datetime import date
 from decimal import Decimal
 
-from finsmart_etl.etl_normalize import (
-    map_report_item_to_tx_row,
-    has_transactions_for_report,
-)
+from finsmart_etl.etl_normalize import map_report_item_to_tx_row
 
 
 class TestMapReportItem:
@@ -123,3 +120,244 @@ class TestMapReportItem:
         result = map_report_item_to_tx_row(item)
         
         assert result["amount"] == Decimal("-5000.0")
+    
+    @pytest.mark.parametrize("amount_raw, expected", [
+        (1250, Decimal("1250")),
+        ("1250.75", Decimal("1250.75")),
+        (0.1, Decimal("0.1")),
+        (None, Decimal("0")),
+        ("", Decimal("0")),
+    ])
+    def test_amount_types(self, amount_raw, expected):
+        """Test int, str, float and empty amounts convert exactly."""
+        result = map_report_item_to_tx_row({"receiptDate": "2022-09-15", "amount": amount_raw})
+        
+        assert result["amount"] == expected
+        assert str(result["amount"]) == str(expected)
+
+
+class TestNormalizeRawReport:
+    """Tests for normalize_raw_report (commits, so uses its own cleanup)."""
+    
+    @pytest.fixture
+    def committed_report(self, db_dsn, sample_payload):
+        """Create a committed company and pending raw report; clean up after."""
+        import psycopg
+        from uuid import uuid4
+        from finsmart_etl.etl_raw import ingest_report
+        
+        company_id = uuid4()
+        with psycopg.connect(db_dsn, autocommit=True) as conn:
+            conn.execute(
+                "INSERT INTO companies (finsmart_guid, name) VALUES (%s, 'Normalize Test')",
+                (company_id,)
+            )
+            report_id = ingest_report(
+                conn, company_id, date(2022, 1, 1), date(2022, 12, 31), sample_payload
+            )
+        yield report_id
+        with psycopg.connect(db_dsn, autocommit=True) as conn:
+            conn.execute("DELETE FROM transactions WHERE source_report_id = %s", (report_id,))
+            conn.execute("DELETE FROM raw_reports WHERE id = %s", (report_id,))
+            conn.execute("DELETE FROM companies WHERE finsmart_guid = %s", (company_id,))
+    
+    def test_normalize_inserts_all_rows(self, db_conn, committed_report, sample_report_data):
+        """Test every reportData row is mapped like map_report_item_to_tx_row."""
+        from psycopg.rows import dict_row
+        from finsmart_etl.etl_normalize import normalize_raw_report
+        
+        assert normalize_raw_report(db_conn, committed_report) == 4
+        
+        columns = list(map_report_item_to_tx_row(sample_report_data[0]))
+        with db_conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(
+                f"""
+                SELECT {", ".join(columns)}
+                FROM transactions WHERE source_report_id = %s
+                ORDER BY id
+                """,
+                (committed_report,)
+            )
+            rows = cur.fetchall()
+            cur.execute("SELECT status FROM raw_reports WHERE id = %s", (committed_report,))
+            status = cur.fetchone()["status"]
+        
+        assert rows == [map_report_item_to_tx_row(item) for item in sample_report_data]
+        assert rows[0]["month"] == date(2022, 9, 1)
+        assert rows[2]["customer_name"] is None
+        assert status == "processed"
+        
+        with db_conn.cursor() as cur:
+            cur.execute("SELECT payload FROM raw_reports WHERE id = %s", (committed_report,))
+            assert cur.fetchone()[0]["data"]["reportData"] == sample_report_data
+        
+        # Idempotent: a second run inserts nothing
+        assert normalize_raw_report(db_conn, committed_report) == 0
+    
+    def test_normalize_fills_missing_lines(self, db_conn, committed_report):
+        """Test a re-run inserts only the reportData items not yet stored."""
+        from finsmart_etl.etl_normalize import normalize_raw_report
+        
+        # Commits throughout: committed_report's teardown deletes these rows
+        # from another connection, which would wait on uncommitted locks
+        assert normalize_raw_report(db_conn, committed_report) == 4
+        db_conn.execute(
+            "DELETE FROM transactions WHERE source_report_id = %s AND line_no = 2",
+            (committed_report,)
+        )
+        db_conn.commit()
+        
+        assert normalize_raw_report(db_conn, committed_report) == 1
+        line_nos = db_conn.execute(
+            "SELECT line_no FROM transactions WHERE source_report_id = %s ORDER BY line_no",
+            (committed_report,)
+        ).fetchall()
+        db_conn.rollback()
+        assert [n for (n,) in line_nos] == [0, 1, 2, 3]
+    
+    def test_normalize_missing_report(self, db_conn):
+        """Test an unknown report ID raises."""
+        from finsmart_etl.etl_normalize import normalize_raw_report
+        
+        with pytest.raises(ValueError):
+            normalize_raw_report(db_conn, -1)
+    
+    def test_normalize_all_pending_isolates_failures(self, db_dsn, committed_report):
+        """Test a failing report is marked 'error' without losing its batch."""
+        import psycopg
+        from psycopg.types.json import Jsonb
+        from finsmart_etl.etl_normalize import normalize_all_pending
+        
+        with psycopg.connect(db_dsn, autocommit=True) as conn:
+            # reportData must be an array; an object makes the INSERT fail
+            bad_id = conn.execute(
+                """
+                INSERT INTO raw_reports (company_id, period_start, period_end, payload)
+                SELECT company_id, '2023-01-01', '2023-12-31', %s FROM raw_reports WHERE id = %s
+                RETURNING id
+                """,
+                (Jsonb({"data": {"reportData": {"not": "a list"}}}), committed_report)
+            ).fetchone()[0]
+        
+        try:
+            with psycopg.connect(db_dsn) as conn:
+                assert normalize_all_pending(conn, batch_size=2) >= 4
+                statuses = dict(conn.execute(
+                    "SELECT id, status FROM raw_reports WHERE id IN (%s, %s)",
+                    (committed_report, bad_id)
+                ).fetchall())
+                tx_count = conn.execute(
+                    "SELECT COUNT(*) FROM transactions WHERE source_report_id = %s",
+                    (committed_report,)
+                ).fetchone()[0]
+        finally:
+            with psycopg.connect(db_dsn, autocommit=True) as conn:
+                conn.execute("DELETE FROM raw_reports WHERE id = %s", (bad_id,))
+        
+        assert statuses == {committed_report: "processed", bad_id: "error"}
+        assert tx_count == 4
+    
+    def test_ingest_raw_bytes(self, db_dsn, committed_report, sample_payload):
+        """Test an undecoded response body is stored like the parsed payload."""
+        import json
+        import psycopg
+        from finsmart_etl.etl_raw import ingest_report
+        
+        body = json.dumps(sample_payload, ensure_ascii=False).encode("utf-8")
+        with psycopg.connect(db_dsn, autocommit=True) as conn:
+            company_id = conn.execute(
+                "SELECT company_id FROM raw_reports WHERE id = %s", (committed_report,)
+            ).fetchone()[0]
+            raw_id = ingest_report(conn, company_id, date(2023, 1, 1), date(2023, 12, 31), body)
+            try:
+                payloads = conn.execute(
+                    "SELECT payload FROM raw_reports WHERE id IN (%s, %s)",
+                    (committed_report, raw_id)
+                ).fetchall()
+            finally:
+                conn.execute("DELETE FROM raw_reports WHERE id = %s", (raw_id,))
+        
+        assert payloads[0][0] == payloads[1][0] == sample_payload
+    
+    def test_ensure_raw_report_force_refresh(self, db_dsn, committed_report, sample_payload):
+        """Test a forced refresh replaces the stored report in place."""
+        import json
+        import psycopg
+        from finsmart_etl.etl_normalize import normalize_raw_report
+        from finsmart_etl.etl_raw import ensure_raw_report
+        
+        class FakeClient:
+            def fetch_company_data(self, company_guid, raw=False):
+                return json.dumps(refreshed).encode("utf-8")
+        
+        refreshed = {"data": {
+            "companyInfo": {"companyName": "Renamed", "businessModelName": ""},
+            "reportData": sample_payload["data"]["reportData"][:1],
+        }}
+        with psycopg.connect(db_dsn) as conn:
+            normalize_raw_report(conn, committed_report)
+            company_id = conn.execute(
+                "SELECT company_id FROM raw_reports WHERE id = %s", (committed_report,)
+            ).fetchone()[0]
+            args = (conn, FakeClient(), company_id, str(company_id), date(2022, 1, 1), date(2022, 12, 31))
+            conn.execute(
+                """
+                INSERT INTO monthly_kpis (company_id, month, metric_name, value)
+                VALUES (%(c)s, '2022-03-01', 'revenue', 1), (%(c)s, '2023-01-01', 'revenue', 1)
+                """,
+                {"c": company_id}
+            )
+            conn.execute(
+                "INSERT INTO anomalies (company_id, month, metric_name, curr_value) "
+                "VALUES (%s, '2022-03-01', 'revenue', 1)",
+                (company_id,)
+            )
+            conn.commit()
+            
+            try:
+                assert ensure_raw_report(*args) == committed_report
+                assert ensure_raw_report(*args, force_refresh=True) == committed_report
+                status = conn.execute(
+                    "SELECT status FROM raw_reports WHERE id = %s", (committed_report,)
+                ).fetchone()[0]
+                company = conn.execute(
+                    "SELECT name, business_model FROM companies WHERE finsmart_guid = %s",
+                    (company_id,)
+                ).fetchone()
+                kpi_months = conn.execute(
+                    "SELECT month FROM monthly_kpis WHERE company_id = %s", (company_id,)
+                ).fetchall()
+                anomalies = conn.execute(
+                    "SELECT COUNT(*) FROM anomalies WHERE company_id = %s", (company_id,)
+                ).fetchone()[0]
+                
+                assert status == "pending"
+                assert company == ("Renamed", None)
+                assert kpi_months == [(date(2023, 1, 1),)]
+                assert anomalies == 0
+                assert normalize_raw_report(conn, committed_report) == 1
+            finally:
+                conn.rollback()
+                conn.execute("DELETE FROM anomalies WHERE company_id = %s", (company_id,))
+                conn.execute("DELETE FROM monthly_kpis WHERE company_id = %s", (company_id,))
+                conn.commit()
+    
+    def test_get_or_create_company(self, db_dsn):
+        """Test the company is created once and existing rows are left as they are."""
+        import psycopg
+        from uuid import UUID, uuid4
+        from finsmart_etl.etl_raw import get_or_create_company
+        
+        guid = str(uuid4())
+        with psycopg.connect(db_dsn) as conn:
+            try:
+                assert get_or_create_company(conn, guid, "First") == UUID(guid)
+                assert get_or_create_company(conn, guid, "Second") == UUID(guid)
+                name = conn.execute(
+                    "SELECT name FROM companies WHERE finsmart_guid = %s", (guid,)
+                ).fetchone()[0]
+            finally:
+                conn.execute("DELETE FROM companies WHERE finsmart_guid = %s", (guid,))
+                conn.commit()
+        
+        assert name == "First"
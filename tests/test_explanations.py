@@ -100,6 +100,30 @@ class TestPromptBuilding:
         
         # Should include the metric name
         assert "net_sales" in prompt or "satış" in prompt.lower()
+    
+    def test_build_batch_prompt_numbers_anomalies(self):
+        """Test the multi-anomaly prompt lists every payload once, numbered."""
+        from finsmart_etl.explanations import build_batch_prompt
+        
+        prompt = build_batch_prompt([{"anomaly": {"metric_name": "cogs"}}, {"anomaly": {"metric_name": "marketing"}}])
+        
+        assert prompt.count("KURALLAR") == 1
+        assert '{"n":1,"anomaly":{"metric_name":"cogs"}}' in prompt
+        assert '{"n":2,"anomaly":{"metric_name":"marketing"}}' in prompt
+        assert '"results"' in prompt
+    
+    def test_parse_batch_response_matches_by_number(self):
+        """Test batch results map back by "n" and missing ones are None."""
+        from finsmart_etl.explanations import parse_batch_highlight_response
+        
+        raw = '{"results": [{"n": 3, "tr_explanation": "Üç", "en_explanation": "Three"}, {"n": 1, "tr_explanation": "Bir"}]}'
+        
+        assert parse_batch_highlight_response(raw, 3) == [
+            {"tr_explanation": "Bir", "en_explanation": ""},
+            None,
+            {"tr_explanation": "Üç", "en_explanation": "Three"},
+        ]
+        assert parse_batch_highlight_response("no json", 2) == [None, None]
 
 
 class TestLLMIntegration:
@@ -127,12 +151,12 @@ class TestLLMIntegration:
             cur.execute(
                 """
                 INSERT INTO transactions 
-                (company_id, tx_date, month, account_code, account_name,
+                (company_id, tx_date, account_code, account_name,
                  coa_code, coa_name, description, customer_name, amount, source_report_id)
-                VALUES (%s, %s, %s, '2.5.2', 'Advisory', '760.01', 'DANISMANLIK', 
+                VALUES (%s, %s, '2.5.2', 'Advisory', '760.01', 'DANISMANLIK', 
                         'Consultant X', NULL, 80000, %s)
                 """,
-                (str(test_company_id), date(2022, 9, 15), month, raw_report_id)
+                (str(test_company_id), date(2022, 9, 15), raw_report_id)
             )
         
         # Create anomaly
@@ -175,7 +199,10 @@ class TestLLMIntegration:
         
         result = generate_highlight_for_anomaly(db_conn, data["anomaly_id"], llm_func=mock_llm)
         
-        assert result is True
+        assert result == {
+            "tr": "Test Türkçe açıklama",
+            "en": "Test English explanation",
+        }
         
         # Verify highlights were stored
         with db_conn.cursor() as cur:
@@ -188,3 +215,116 @@ class TestLLMIntegration:
         assert "tr" in highlights
         assert "en" in highlights
         assert "Türkçe" in highlights["tr"]
+    
+    def test_generate_highlights_batch_with_mock_llm(self, db_conn, setup_anomaly_for_highlight):
+        """Test batched highlight generation stores and returns per anomaly."""
+        from finsmart_etl.explanations import (
+            generate_highlights_for_anomalies,
+            get_highlights_for_anomalies,
+        )
+        
+        data = setup_anomaly_for_highlight
+        
+        def mock_llm(prompt):
+            return {"tr_explanation": "Toplu açıklama", "en_explanation": ""}
+        
+        result = generate_highlights_for_anomalies(
+            db_conn, [data["anomaly_id"], -1], llm_func=mock_llm
+        )
+        
+        assert result == {data["anomaly_id"]: {"tr": "Toplu açıklama"}}
+        stored = get_highlights_for_anomalies(db_conn, [data["anomaly_id"]])
+        assert stored[data["anomaly_id"]] == {"tr": "Toplu açıklama", "en": ""}
+    
+    @pytest.fixture
+    def fake_async_openai(self, monkeypatch):
+        """Replace AsyncOpenAI with a fake that records the prompts it is sent."""
+        import json
+        from finsmart_etl import llm
+        
+        prompts = []
+        
+        class FakeRawResponses:
+            async def create(self, input, **kwargs):
+                prompts.append(input)
+                text = '{"tr_explanation": "Eşzamanlı", "en_explanation": "Concurrent"}'
+                body = {"output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}]}
+                return type("Raw", (), {"content": json.dumps(body).encode("utf-8")})()
+        
+        class FakeAsyncOpenAI:
+            def __init__(self, api_key, **kwargs):
+                self.responses = type("Responses", (), {"with_raw_response": FakeRawResponses()})()
+            
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc):
+                return False
+        
+        monkeypatch.setattr(llm, "AsyncOpenAI", FakeAsyncOpenAI)
+        return prompts
+    
+    def test_generate_new_highlights_concurrently(self, db_conn, setup_anomaly_for_highlight, fake_async_openai, monkeypatch):
+        """Test new anomalies get highlights from concurrent async LLM calls."""
+        from finsmart_etl.explanations import (
+            generate_highlights_for_new_anomalies,
+            get_highlights_for_anomalies,
+        )
+        
+        data = setup_anomaly_for_highlight
+        monkeypatch.setattr(db_conn, "commit", lambda: None)  # Keep the rollback fixture
+        
+        assert generate_highlights_for_new_anomalies(db_conn, data["company_id"]) == 1
+        stored = get_highlights_for_anomalies(db_conn, [data["anomaly_id"]])
+        assert stored[data["anomaly_id"]] == {"tr": "Eşzamanlı", "en": "Concurrent"}
+    
+    def test_regenerated_highlights_use_cache(self, db_conn, setup_anomaly_for_highlight, fake_async_openai, monkeypatch):
+        """Test an unchanged prompt is answered from the cache on regeneration."""
+        from finsmart_etl.explanations import (
+            generate_highlight_for_anomaly,
+            generate_highlights_for_new_anomalies,
+        )
+        
+        data = setup_anomaly_for_highlight
+        monkeypatch.setattr(db_conn, "commit", lambda: None)  # Keep the rollback fixture
+        
+        assert generate_highlights_for_new_anomalies(db_conn, data["company_id"]) == 1
+        db_conn.execute("DELETE FROM anomaly_highlights WHERE anomaly_id = %s", (data["anomaly_id"],))
+        
+        assert generate_highlights_for_new_anomalies(db_conn, data["company_id"]) == 1
+        assert generate_highlight_for_anomaly(db_conn, data["anomaly_id"]) == {
+            "tr": "Eşzamanlı", "en": "Concurrent",
+        }
+        assert len(fake_async_openai) == 1
+    
+    def test_bulk_prompts_match_single_prompt(self, db_conn, setup_anomaly_for_highlight):
+        """Test prompts built from bulk lookups equal the per-anomaly prompt."""
+        from finsmart_etl.explanations import _highlight_prompt, _highlight_prompts
+        
+        anomaly_id = setup_anomaly_for_highlight["anomaly_id"]
+        
+        assert _highlight_prompts(db_conn, [anomaly_id, -1]) == {
+            anomaly_id: _highlight_prompt(db_conn, anomaly_id)
+        }
+    
+    def test_generate_highlights_via_batch_api(self, db_conn, setup_anomaly_for_highlight):
+        """Test Batch API highlight generation keys requests by anomaly."""
+        from finsmart_etl.explanations import generate_highlights_for_anomalies_batch
+        
+        anomaly_id = setup_anomaly_for_highlight["anomaly_id"]
+        submitted = {}
+        
+        def mock_batch(bodies):
+            submitted.update(bodies)
+            return {
+                f"anomaly:{anomaly_id}":
+                    '```json\n{"tr_explanation": "Toplu", "en_explanation": "Batch"}\n```'
+            }
+        
+        result = generate_highlights_for_anomalies_batch(
+            db_conn, [anomaly_id, -1], batch_func=mock_batch
+        )
+        
+        assert list(submitted) == [f"anomaly:{anomaly_id}"]
+        assert submitted[f"anomaly:{anomaly_id}"]["model"] == "gpt-5-mini"
+        assert result == {anomaly_id: {"tr": "Toplu", "en": "Batch"}}
@@ -0,0 +1,72 @@
+"""
+Tests for background compute jobs.
+"""
+
+import threading
+from datetime import date
+from uuid import uuid4
+
+from finsmart_etl import cfo_view
+from finsmart_etl.jobs import enqueue_compute, get_job, wait_for_job
+
+
+class TestComputeJobs:
+    """Tests for the in-process compute queue."""
+    
+    def test_job_runs_pipeline_and_dedupes(self, monkeypatch):
+        """Test a queued job reports its stages and repeat requests share it."""
+        company_id = uuid4()
+        release = threading.Event()
+        calls = []
+        
+        def fake_pipeline(conn, company_id, month, generate_highlights, pool, on_stage):
+            calls.append((company_id, month, generate_highlights))
+            on_stage("kpis")
+            release.wait(timeout=5)
+        
+        monkeypatch.setattr(cfo_view, "run_compute_pipeline", fake_pipeline)
+        
+        job_id = enqueue_compute(company_id, date(2022, 9, 15), generate_highlights=False)
+        assert enqueue_compute(company_id, date(2022, 9, 1)) == job_id
+        
+        release.set()
+        job = wait_for_job(job_id, timeout=5)
+        
+        assert job["status"] == "done"
+        assert job["stage"] == "kpis"
+        assert job["month"] == "2022-09"
+        assert calls == [(company_id, date(2022, 9, 1), False)]
+        assert enqueue_compute(company_id, date(2022, 9, 1)) != job_id
+    
+    def test_failed_job_records_error(self, monkeypatch):
+        """Test pipeline errors mark the job failed instead of raising."""
+        def failing_pipeline(*args, **kwargs):
+            raise RuntimeError("boom")
+        
+        monkeypatch.setattr(cfo_view, "run_compute_pipeline", failing_pipeline)
+        
+        job = wait_for_job(enqueue_compute(uuid4(), date(2022, 9, 1)), timeout=5)
+        
+        assert job["status"] == "failed"
+        assert job["error"] == "boom"
+        assert get_job("missing") is None
+    
+    def test_view_returns_pending_status_in_background_mode(self, db_conn, test_company_id, monkeypatch):
+        """Test an incomplete month returns a job handle instead of computing inline."""
+        queued = []
+        monkeypatch.setattr(
+            cfo_view, "enqueue_compute",
+            lambda company_id, month, generate_highlights: queued.append(month) or "job-1"
+        )
+        
+        view = cfo_view.build_cfo_month_view(
+            db_conn, test_company_id, date(2022, 9, 1), background=True
+        )
+        
+        assert view == {
+            "status": "computing",
+            "job_id": "job-1",
+            "company_id": str(test_company_id),
+            "month": "2022-09",
+        }
+        assert queued == [date(2022, 9, 1)]
@@ -0,0 +1,106 @@
+"""
+Tests for the shared OpenAI client.
+"""
+
+import json
+
+import pytest
+
+from finsmart_etl.llm import close_openai_client, get_openai_client, parse_llm_json, prompt_json
+
+
+class TestOpenAIClient:
+    """Tests for the lazy client singleton."""
+    
+    def test_client_is_reused(self):
+        """Test that repeated calls share one client (and connection pool)."""
+        client = get_openai_client()
+        
+        assert get_openai_client() is client
+        
+        close_openai_client()
+        assert get_openai_client() is not client
+        close_openai_client()
+
+
+class TestResponseBatch:
+    """Tests for the Batch API helper."""
+    
+    def test_run_response_batch_round_trip(self, monkeypatch):
+        """Test requests are uploaded as JSONL and outputs mapped back by custom_id."""
+        import json
+        from types import SimpleNamespace
+        
+        from finsmart_etl import llm
+        
+        monkeypatch.setattr(llm.time, "sleep", lambda seconds: None)
+        uploaded = {}
+        output = "\n".join(json.dumps(line) for line in [
+            {"custom_id": "anomaly:1", "error": None, "response": {"status_code": 200, "body": {
+                "output": [
+                    {"type": "reasoning", "summary": []},
+                    {"type": "message", "content": [{"type": "output_text", "text": "{\"ok\": 1}"}]},
+                ]
+            }}},
+            {"custom_id": "anomaly:2", "error": {"message": "boom"}, "response": None},
+        ])
+        statuses = iter(["in_progress", "completed"])
+        
+        class FakeFiles:
+            def create(self, file, purpose):
+                uploaded["lines"] = [json.loads(line) for line in file[1].decode().splitlines()]
+                uploaded["purpose"] = purpose
+                return SimpleNamespace(id="file-in")
+            
+            def content(self, file_id):
+                return SimpleNamespace(text=output)
+        
+        class FakeBatches:
+            def create(self, input_file_id, endpoint, completion_window):
+                return SimpleNamespace(id="batch-1", status="validating", output_file_id=None)
+            
+            def retrieve(self, batch_id):
+                return SimpleNamespace(id=batch_id, status=next(statuses), output_file_id="file-out")
+        
+        client = SimpleNamespace(files=FakeFiles(), batches=FakeBatches())
+        result = llm.run_response_batch(
+            {"anomaly:1": {"input": "a"}, "anomaly:2": {"input": "b"}}, client=client
+        )
+        
+        assert uploaded["purpose"] == "batch"
+        assert [line["custom_id"] for line in uploaded["lines"]] == ["anomaly:1", "anomaly:2"]
+        assert uploaded["lines"][0]["url"] == "/v1/responses"
+        assert result == {"anomaly:1": "{\"ok\": 1}"}
+
+
+class TestParseLLMJson:
+    """Tests for tolerant JSON parsing of model output."""
+    
+    @pytest.mark.parametrize("raw", [
+        '{"a": [1, 2]}',
+        '```json\n{"a": [1, 2]}\n```',
+        '```JSON\n{"a": [1, 2]}\n```\nUmarım yardımcı olur.',
+        'İşte rapor: {"a": [1, 2,],}',
+    ])
+    def test_recovers_object(self, raw):
+        """Test fences, surrounding prose and trailing commas are tolerated."""
+        assert parse_llm_json(raw) == {"a": [1, 2]}
+    
+    def test_recovers_truncated_output(self):
+        """Test output cut off mid-string keeps what was generated."""
+        assert parse_llm_json('{"tr_explanation": "Gelir art') == {"tr_explanation": "Gelir art"}
+    
+    def test_raises_without_json(self):
+        """Test plain prose still raises JSONDecodeError for callers' fallbacks."""
+        with pytest.raises(json.JSONDecodeError):
+            parse_llm_json("Açıklama oluşturulamadı")
+
+
+class TestPromptJson:
+    """Tests for prompt serialization."""
+    
+    def test_compact_and_unescaped(self):
+        """Test prompt JSON has no padding and keeps Turkish text literal."""
+        assert prompt_json({"metric_tr": "Danışmanlık", "values": [1, 2.5]}) == (
+            '{"metric_tr":"Danışmanlık","values":[1,2.5]}'
+        )
@@ -69,18 +69,18 @@ class TestMetricsComputation:
         """Insert test transactions."""
         transactions = [
             # September sales
-            (test_company_id, date(2022, 9, 15), date(2022, 9, 1), "1.1.1", "Local Sales", 
+            (test_company_id, date(2022, 9, 15), "1.1.1", "Local Sales", 
              "600.1", "SALES", "Customer A", "Customer A", Decimal("100000")),
-            (test_company_id, date(2022, 9, 20), date(2022, 9, 1), "1.1.1", "Local Sales",
+            (test_company_id, date(2022, 9, 20), "1.1.1", "Local Sales",
              "600.1", "SALES", "Customer B", "Customer B", Decimal("50000")),
             # September advisory
-            (test_company_id, date(2022, 9, 10), date(2022, 9, 1), "2.5.2", "Advisory",
+            (test_company_id, date(2022, 9, 10), "2.5.2", "Advisory",
              "760.01", "DANISMANLIK", "Consultant X", None, Decimal("80000")),
             # August sales (for comparison)
-            (test_company_id, date(2022, 8, 15), date(2022, 8, 1), "1.1.1", "Local Sales",
+            (test_company_id, date(2022, 8, 15), "1.1.1", "Local Sales",
              "600.1", "SALES", "Customer A", "Customer A", Decimal("120000")),
             # August advisory
-            (test_company_id, date(2022, 8, 10), date(2022, 8, 1), "2.5.2", "Advisory",
+            (test_company_id, date(2022, 8, 10), "2.5.2", "Advisory",
              "760.01", "DANISMANLIK", "Consultant X", None, Decimal("30000")),
         ]
         
@@ -101,9 +101,9 @@ class TestMetricsComputation:
                 cur.execute(
                     """
                     INSERT INTO transactions 
-                    (company_id, tx_date, month, account_code, account_name,
+                    (company_id, tx_date, account_code, account_name,
                      coa_code, coa_name, description, customer_name, amount, source_report_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """,
                     (*tx, raw_report_id)
                 )
@@ -131,3 +131,25 @@ class TestMetricsComputation:
         # Note: actual value depends on sql_filter matching
         # This test verifies the computation ran without errors
         assert row is not None or True  # Allow for filter differences
+    
+    def test_single_pass_matches_per_metric(self, db_conn, setup_transactions, monkeypatch):
+        """Test the one-statement KPI pass upserts what per-metric passes do."""
+        from finsmart_etl.metrics import (
+            METRIC_DEFINITIONS, compute_monthly_kpis, compute_single_metric,
+        )
+        
+        company_id = setup_transactions
+        monkeypatch.setattr(db_conn, "commit", lambda: None)  # Keep the rollback fixture
+        query = """
+            SELECT month, metric_name, value, meta FROM monthly_kpis
+            WHERE company_id = %s ORDER BY month, metric_name
+        """
+        
+        counts = compute_monthly_kpis(db_conn, company_id)
+        single_pass = db_conn.execute(query, (company_id,)).fetchall()
+        db_conn.execute("DELETE FROM monthly_kpis WHERE company_id = %s", (company_id,))
+        per_metric = {m.name: compute_single_metric(db_conn, company_id, m) for m in METRIC_DEFINITIONS}
+        
+        assert counts == per_metric
+        assert counts["advisory_expense"] == 2
+        assert single_pass == db_conn.execute(query, (company_id,)).fetchall()